@@ -1,16 +1,17 @@
+import asyncio
+import os
 import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
-import requests
+import httpx
 
 # Comando de ejecución: uvicorn Streamflix:app --reload --host localhost --port 8003
 
-# Creación de la API de interfaz
-app = FastAPI()
-
 """
 
 Acceso a bases de datos antes de realizar los cambios de Docker
@@ -26,9 +27,115 @@ BASE_URL_CONTENIDOS = "http://contenidos:8000"  # Nombre del servicio 'contenido
 BASE_URL_USUARIOS = "http://usuarios:8001"    # Nombre del servicio 'usuarios' en docker-compose.yml
 BASE_URL_INTERACCIONES = "http://interacciones:8002"  # Nombre del servicio 'interacciones' en docker-compose.yml
 
+# Tiempo máximo de espera (en segundos) de las llamadas a cada microservicio
+TIMEOUTS_MICROSERVICIOS = {
+    BASE_URL_CONTENIDOS: float(os.getenv("TIMEOUT_CONTENIDOS", "10")),
+    BASE_URL_USUARIOS: float(os.getenv("TIMEOUT_USUARIOS", "10")),
+    BASE_URL_INTERACCIONES: float(os.getenv("TIMEOUT_INTERACCIONES", "10")),
+}
+
+# Límites del pool de conexiones keep-alive de cada microservicio
+LIMITES_CONEXIONES = httpx.Limits(
+    max_connections=int(os.getenv("HTTP_MAX_CONEXIONES", "100")),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_CONEXIONES_KEEPALIVE", "20")),
+)
+
+# Respuestas con ETag que se guardan para repetir las peticiones GET de forma condicional
+MAX_RESPUESTAS_ETAG = int(os.getenv("HTTP_MAX_RESPUESTAS_ETAG", "1000"))
+
+
+class ClienteMicroservicios:
+    """
+    Cliente HTTP asíncrono compartido por todos los endpoints de la interfaz.
+    Mantiene un httpx.AsyncClient por microservicio, de modo que las conexiones se
+    reutilizan entre peticiones y cada microservicio tiene su propio tiempo de espera.
+    Las respuestas GET con ETag se guardan y, al repetir la petición, se envía If-None-Match:
+    si el microservicio responde 304 (sin cuerpo), se devuelve la respuesta guardada.
+    """
+
+    def __init__(self, timeouts: dict, max_respuestas_etag: int = MAX_RESPUESTAS_ETAG):
+        self.timeouts = timeouts
+        self.clientes = {}
+        self.max_respuestas_etag = max_respuestas_etag
+        self.respuestas_etag = OrderedDict()  # URL -> última respuesta 200 con ETag
+
+    def iniciar(self):
+        for base_url, timeout in self.timeouts.items():
+            if base_url not in self.clientes:
+                self.clientes[base_url] = httpx.AsyncClient(
+                    timeout=timeout, limits=LIMITES_CONEXIONES, follow_redirects=True
+                )
+
+    async def cerrar(self):
+        for cliente in self.clientes.values():
+            await cliente.aclose()
+        self.clientes = {}
+
+    def cliente(self, url: str) -> httpx.AsyncClient:
+        # Elige el cliente del microservicio al que va dirigida la URL
+        if not self.clientes:
+            self.iniciar()
+        for base_url, cliente in self.clientes.items():
+            if url.startswith(base_url):
+                return cliente
+        raise ValueError(f"URL de un microservicio desconocido: {url}")
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        clave = str(httpx.URL(url, params=kwargs.get("params")))
+        guardada = self.respuestas_etag.get(clave)
+        if guardada is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "If-None-Match": guardada.headers["ETag"]}
+
+        response = await self.cliente(url).get(url, **kwargs)
+
+        if response.status_code == 304 and guardada is not None:
+            if clave in self.respuestas_etag:
+                self.respuestas_etag.move_to_end(clave)
+            return guardada
+        if response.status_code == 200 and "ETag" in response.headers:
+            self.respuestas_etag[clave] = response
+            self.respuestas_etag.move_to_end(clave)
+            while len(self.respuestas_etag) > self.max_respuestas_etag:
+                self.respuestas_etag.popitem(last=False)
+        elif guardada is not None:
+            self.respuestas_etag.pop(clave, None)
+        return response
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.cliente(url).post(url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.cliente(url).put(url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.cliente(url).delete(url, **kwargs)
+
+
+http = ClienteMicroservicios(TIMEOUTS_MICROSERVICIOS)
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # Abre los pools de conexiones al arrancar y los cierra al apagar la interfaz
+    http.iniciar()
+    yield
+    await http.cerrar()
+
+
+# Creación de la API de interfaz
+app = FastAPI(lifespan=ciclo_de_vida)
+
 
 # Métodos auxiliares
-def cargar_datos(user_id: str):
+def respuesta_correcta(response) -> bool:
+    """
+    Indica si una respuesta obtenida con asyncio.gather(..., return_exceptions=True)
+    es una respuesta HTTP correcta (y no un error de conexión).
+    """
+    return isinstance(response, httpx.Response) and response.is_success
+
+
+async def cargar_datos(user_id: str):
     """
     Obtiene y organiza los datos necesarios para la pantalla principal.
     """
@@ -36,55 +143,52 @@ def cargar_datos(user_id: str):
     recomendaciones = []
     tendencias = []
     historial = []
-    generos = []
     generos_con_contenidos = []
     lista_personalizada = []
 
-    # Realizamos las solicitudes a los microservicios
-    recomendaciones_response = requests.get(
-        f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/recomendaciones"
+    # Realizamos las solicitudes a los microservicios a la vez, ya que son independientes.
+    # Si un microservicio falla, el resto de la pantalla se carga igualmente.
+    (
+        recomendaciones_response,
+        tendencias_response,
+        historial_response,
+        generos_response,
+        lista_personalizada_response,
+    ) = await asyncio.gather(
+        http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/recomendaciones"),
+        http.get(f"{BASE_URL_INTERACCIONES}/contenido/tendencias"),
+        http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial"),
+        # Recuperar todos los géneros con sus contenidos en una sola llamada
+        http.get(f"{BASE_URL_CONTENIDOS}/generos/contenidos"),
+        http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada"),
+        return_exceptions=True,
     )
-    if recomendaciones_response.ok:
+
+    if respuesta_correcta(recomendaciones_response):
         recomendaciones = recomendaciones_response.json()
     else:
         mensajes.append("No se pudieron obtener las recomendaciones personalizadas.")
 
-    tendencias_response = requests.get(f"{BASE_URL_INTERACCIONES}/contenido/tendencias")
-    if tendencias_response.ok:
+    if respuesta_correcta(tendencias_response):
         tendencias = tendencias_response.json()
     else:
         mensajes.append("No se pudieron obtener las tendencias.")
 
-    historial_response = requests.get(
-        f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial"
-    )
-    if historial_response.ok:
+    if respuesta_correcta(historial_response):
         historial = historial_response.json()
     else:
         mensajes.append("No se pudo recuperar el historial de usuario.")
 
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
-    if generos_response.ok:
-        generos = generos_response.json()
+    if respuesta_correcta(generos_response):
+        generos_con_contenidos = [
+            {"nombre": genero["nombre"], "contenidos": genero["contenidos"]}
+            for genero in generos_response.json()
+            if genero["contenidos"]  # Los géneros sin contenidos no se muestran
+        ]
     else:
         mensajes.append("No se pudieron obtener los géneros.")
 
-    # Recuperar los contenidos por género
-    for genero in generos:
-        contenidos_response = requests.get(
-            f"{BASE_URL_CONTENIDOS}/generos/{genero['id']}/contenidos"
-        )
-        if contenidos_response.ok:
-            generos_con_contenidos.append(
-                {"nombre": genero["nombre"], "contenidos": contenidos_response.json()}
-            )
-        else:
-            mensajes.append(
-                f"No se pudieron obtener los contenidos para el género {genero['nombre']}."
-            )
-
-    lista_personalizada_response = requests.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada")
-    if lista_personalizada_response.ok:
+    if respuesta_correcta(lista_personalizada_response):
         lista_personalizada = lista_personalizada_response.json()
     else:
         mensajes.append("No se pudo obtener la lista personalizada.")
@@ -124,7 +228,7 @@ async def index(request: Request, mensaje_credenciales: str = None):
 async def login(request: Request, email: str = Form(...), password: str = Form(...)):
     # Enviar las credenciales al microservicio para verificar el login
     data = {"email": email, "password": password}
-    response = requests.post(f"{BASE_URL_USUARIOS}/usuarios/login", json=data)
+    response = await http.post(f"{BASE_URL_USUARIOS}/usuarios/login", json=data)
 
     if response.status_code != 200:
         mensaje_credenciales = "Error: las credenciales no son correctas"
@@ -152,7 +256,7 @@ async def registro_usuario(request: Request):
 @app.get("/planes_suscripcion")
 async def obtener_planes():
     # Aquí haces una solicitud a tu microservicio que devuelve los planes
-    response = requests.get(f"{BASE_URL_USUARIOS}/planes-suscripcion")
+    response = await http.get(f"{BASE_URL_USUARIOS}/planes-suscripcion")
     if response.status_code != 200:
         raise HTTPException(
             status_code=500, detail="No se pudieron obtener los planes."
@@ -177,7 +281,7 @@ async def registrar_usuario(
         "idioma": language,
         "idPlanSuscripcion": subscription_plan,
     }
-    response = requests.post(f"{BASE_URL_USUARIOS}/usuarios/registro", json=data)
+    response = await http.post(f"{BASE_URL_USUARIOS}/usuarios/registro", json=data)
 
     if response.status_code != 200:
         mensaje_credenciales = "Error: Las credenciales ya están en uso"
@@ -198,8 +302,13 @@ async def registrar_usuario(
 # Endpoint para mostrar los detalles de un contenido
 @app.get("/detalles_contenido/{idContenido}", response_class=HTMLResponse)
 async def detalles_contenido(request: Request, idContenido: str, user_id: str):
-    # Solicita los detalles del contenido al microservicio de contenidos
-    contenido = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idContenido}")
+    # Solicita todos los datos del detalle (género, director, temporadas, reparto, subtítulos y doblajes)
+    # al microservicio de contenidos en una sola llamada
+    # junto con el historial del usuario, ya que las dos peticiones son independientes
+    contenido, historial_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idContenido}/detalle"),
+        http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial"),
+    )
 
     if contenido.status_code != 200:
         raise HTTPException(
@@ -209,66 +318,32 @@ async def detalles_contenido(request: Request, idContenido: str, user_id: str):
     # Extrae los detalles de la película del JSON de la respuesta
     detalles_contenido = contenido.json()
 
-    #Extraer nombre del genero a partir del id
-    genero = requests.get(f"{BASE_URL_CONTENIDOS}/generos/{detalles_contenido['idGenero']}")
-    detalles_genero = genero.json()
-    nombre_genero = detalles_genero["nombre"]
-
     if detalles_contenido["tipoContenido"] == "Pelicula":
-        #Extraer nombre del director a partir del id
-        director = requests.get(f"{BASE_URL_CONTENIDOS}/directores/{detalles_contenido['idDirector']}")
-        detalles_director = director.json()
-        nombre_director = detalles_director["nombre"]
-        detalles_contenido["idDirector"] = nombre_director
+        #Cambiar el id del director por su nombre
+        detalles_contenido["idDirector"] = detalles_contenido["director"]
         temporadas = None
         todos_los_episodios = None
     else:
-        # Obtener las temporadas y los capítulos de una serie
-        temps_caps = requests.get(f"{BASE_URL_CONTENIDOS}/series/{detalles_contenido['id']}")
-        detalles_temps_caps = temps_caps.json()
-
         # Obtener todas las temporadas
-        temporadas = detalles_temps_caps["Temporadas"]
+        temporadas = detalles_contenido["Temporadas"]
 
-        # Lista para almacenar todos los episodios
+        # Lista para almacenar todos los episodios (ya incluyen el nombre de su director)
         todos_los_episodios = []
-
-        # Recorrer las temporadas para acceder a los episodios
         for temporada in temporadas:
             episodios = temporada["Episodios"]  # Acceder a los episodios de la temporada
             for episodio in episodios:
-                idDirector = episodio.get("idDirector")
-                if idDirector:  # Verificar si existe un idDirector
-                    director_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores/{idDirector}")
-                    if director_response.status_code == 200:
-                        director_data = director_response.json()
-                        episodio["director"] = director_data.get("nombre", "Desconocido")
-                    else:
-                        raise HTTPException(
-                            status_code=404, detail="No se encontraron los detalles del director del episodio."
-                        )
+                episodio["director"] = episodio.get("director") or "Desconocido"
             todos_los_episodios.extend(episodios) # Agregar todos los episodios a la lista
 
-
     #Cambiar los valores de ids por nombres
-    detalles_contenido["idGenero"] = nombre_genero
-    
-
-    #Obtener el reparto
-    reparto = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{detalles_contenido['id']}/reparto")
-    detalles_reparto = reparto.json()
+    detalles_contenido["idGenero"] = detalles_contenido["genero"]
 
-    #Obtener los subtitulos
-    subtitulos = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{detalles_contenido['idSubtitulosContenido']}/subtitulos")
-    detalles_subtitulos = subtitulos.json()
-    
-    #Obtener los doblajes
-    doblajes = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{detalles_contenido['idDoblajeContenido']}/doblajes")
-    detalles_doblajes = doblajes.json()
+    detalles_reparto = detalles_contenido["reparto"]
+    detalles_subtitulos = detalles_contenido["subtitulos"]
+    detalles_doblajes = detalles_contenido["doblajes"]
          
     # Obtener el historial
     estaEnHistorial = False
-    historial_response = requests.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial")
 
     # Validar que la respuesta sea válida
     if historial_response.status_code == 200:
@@ -283,7 +358,7 @@ async def detalles_contenido(request: Request, idContenido: str, user_id: str):
     # Si no está en el historial, agregarlo
     if not estaEnHistorial:
         try:
-            response = requests.post(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial/{idContenido}")
+            response = await http.post(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/historial/{idContenido}")
             if response.status_code == 200:
                 print(f"Contenido {idContenido} agregado al historial.")
             else:
@@ -315,18 +390,20 @@ async def buscar(request: Request, query: str, tipo: str):
 
     if tipo == "contenido":
         # Búsqueda de contenidos
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/buscar")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/buscar")
         if response.status_code == 200:
             contenidos = response.json().get("resultados", [])
     elif tipo == "actor":
         # Búsqueda de actores
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/actores")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/actores")
         if response.status_code == 200:
             actores = response.json().get("resultados", [])
     elif tipo == "todos":
         # Búsqueda combinada
-        response_contenido = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/buscar")
-        response_actor = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/actores")
+        response_contenido, response_actor = await asyncio.gather(
+            http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/buscar"),
+            http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{query}/actores"),
+        )
 
         # Almacenar resultados si las respuestas son exitosas
         if response_contenido.status_code == 200:
@@ -343,9 +420,11 @@ async def buscar(request: Request, query: str, tipo: str):
     # Para devolver las peliculas en las que ha participado un actor
     contenidos_por_actor = {}  # Diccionario para almacenar contenidos por actor
     if actores:
-        for actor in actores:
-            # Obtenemos los contenidos relacionados con el actor
-            response_contenidos_actor = requests.get(f"{BASE_URL_CONTENIDOS}/actores/{actor['id']}/contenidos")
+        # Obtenemos a la vez los contenidos relacionados con cada actor
+        responses_contenidos_actor = await asyncio.gather(
+            *(http.get(f"{BASE_URL_CONTENIDOS}/actores/{actor['id']}/contenidos") for actor in actores)
+        )
+        for actor, response_contenidos_actor in zip(actores, responses_contenidos_actor):
             if response_contenidos_actor.status_code == 200:
                 # Guardamos los contenidos del actor en el diccionario usando el id del actor
                 contenidos_por_actor[actor['id']] = response_contenidos_actor.json()
@@ -372,7 +451,7 @@ logging.basicConfig(level=logging.INFO)
 
 @app.get("/pantalla_principal", response_class=HTMLResponse)
 async def pantalla_principal(request: Request, user_id: str = None, mensaje_credenciales: str = None):
-    datos = cargar_datos(user_id)  # Centralizamos la lógica aquí
+    datos = await cargar_datos(user_id)  # Centralizamos la lógica aquí
     mensaje = datos.get("mensaje", "Error al cargar los datos")
 
     # Renderizamos la pantalla principal
@@ -394,9 +473,9 @@ async def pantalla_principal(request: Request, user_id: str = None, mensaje_cred
 @app.get("/usuarios/{user_id}/perfil", response_class=HTMLResponse)
 async def get_user_profile(request: Request, user_id: str, mensaje: str = None):
     # Llama al endpoint /perfil para obtener el perfil de un usuario y lo renderiza en HTML
-    response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}")
-    me_gusta_response = requests.get(
-        f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta"
+    response, me_gusta_response = await asyncio.gather(
+        http.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}"),
+        http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta"),
     )
 
     if response.status_code == 200:
@@ -481,7 +560,7 @@ async def eliminar_interaccion(request: Request):
 
     # Realizar la petición DELETE a la API de interacciones
     try:
-        response = requests.delete(url)
+        response = await http.delete(url)
 
         # Verificar el estado de la respuesta
         if response.status_code == 200:
@@ -520,7 +599,7 @@ async def actualizar_perfil(request: Request, id_usuario: str):
 
     try:
         # Enviar la solicitud PUT a la API externa
-        response = requests.put(api_url, json=payload)
+        response = await http.put(api_url, json=payload)
 
         # Comprobar el estado de la respuesta de la API
         if response.status_code == 200:
@@ -535,7 +614,7 @@ async def actualizar_perfil(request: Request, id_usuario: str):
                 detail="Error al actualizar el perfil en la API externa",
             )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Manejar errores de red o conexión
         raise HTTPException(
             status_code=500, detail=f"Error al comunicarse con la API externa: {str(e)}"
@@ -549,7 +628,7 @@ async def obtener_perfil_usuario(user_id: str):
     """
     try:
         # Hacer una solicitud GET al servicio de usuarios para obtener el perfil
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}")
+        response = await http.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}")
 
         if response.status_code != 200:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -563,7 +642,7 @@ async def obtener_perfil_usuario(user_id: str):
             "email": user_data["email"],
             "idioma": user_data.get("idioma", "es"),  # Asumir 'es' si no está presente
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # En caso de error al hacer la petición a la API de usuarios
         raise HTTPException(
             status_code=500, detail=f"Error al obtener el perfil del usuario: {str(e)}"
@@ -571,11 +650,11 @@ async def obtener_perfil_usuario(user_id: str):
 
 
 @app.get("/usuarios/{userId}/me-gusta")
-def obtener_me_gusta(userId: str):
+async def obtener_me_gusta(userId: str):
 
     try:
         # Hacer una solicitud GET al servicio de usuarios para obtener el perfil
-        response = requests.get(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/me-gusta")
+        response = await http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/me-gusta")
 
         if response.status_code != 200:
             raise HTTPException(
@@ -588,7 +667,7 @@ def obtener_me_gusta(userId: str):
 
         # Devolver los datos del usuario
         return contenidos
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # En caso de error al hacer la petición a la API de usuarios
         raise HTTPException(
             status_code=500, detail=f"Error al obtener el perfil del usuario: {str(e)}"
@@ -603,7 +682,7 @@ async def get_user_payment_methods(user_id: str):
     """
     # Hacemos la petición GET a la API de usuarios para obtener los métodos de pago
     try:
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}/metodos-pago")
+        response = await http.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}/metodos-pago")
 
         # Verificamos si la respuesta fue exitosa
         if response.status_code == 200:
@@ -634,7 +713,7 @@ async def get_user_payment_methods(user_id: str):
                 detail="Error al obtener métodos de pago del usuario",
             )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500, detail=f"Error al comunicar con la API externa: {str(e)}"
         )
@@ -667,7 +746,7 @@ async def add_payment_method(user_id: str, request: Request):
             raise HTTPException(status_code=400, detail="Método de pago no válido")
 
         # Realizar la solicitud POST al servicio de la API de usuarios para agregar el método de pago
-        response = requests.post(
+        response = await http.post(
             f"{BASE_URL_USUARIOS}/usuarios/{user_id}/metodos-pago", json=data
         )
 
@@ -686,11 +765,20 @@ async def add_payment_method(user_id: str, request: Request):
 
 @app.get("/admin_menu", response_class=HTMLResponse)
 async def admin_menu(request: Request):
-    peliculas_response = requests.get(f"{BASE_URL_CONTENIDOS}/todopeliculas")
-    series_response = requests.get(f"{BASE_URL_CONTENIDOS}/series")
-    actores_response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
-    directores_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
+    # Las cinco listas son independientes, así que se piden a la vez
+    (
+        peliculas_response,
+        series_response,
+        actores_response,
+        directores_response,
+        generos_response,
+    ) = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/todopeliculas"),
+        http.get(f"{BASE_URL_CONTENIDOS}/series"),
+        http.get(f"{BASE_URL_CONTENIDOS}/actores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/directores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/generos"),
+    )
 
     if peliculas_response.status_code == 200:
         peliculas = peliculas_response.json()
@@ -727,7 +815,7 @@ async def admin_menu(request: Request):
 @app.get("/administrador/usuarios", response_class=HTMLResponse)
 async def lista_usuarios(request: Request):
     # Realizamos la solicitud al microservicio de usuarios
-    response = requests.get(f"{BASE_URL_USUARIOS}/usuarios")
+    response = await http.get(f"{BASE_URL_USUARIOS}/usuarios")
     if response.status_code != 200:
         raise HTTPException(
             status_code=500, detail="No se pudieron obtener los usuarios."
@@ -748,20 +836,18 @@ async def crear_pelicula_form(request: Request):
     """
     Muestra el formulario para crear una película.
     """
-    # Obtener los géneros y directores desde el microservicio de contenidos
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
+    # Obtener a la vez los géneros, directores y actores desde el microservicio de contenidos
+    generos_response, directores_response, actores_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/generos"),
+        http.get(f"{BASE_URL_CONTENIDOS}/directores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/actores"),
+    )
 
     generos = generos_response.json() if generos_response.status_code == 200 else []
-    
-    # Realizar una solicitud GET a la API de contenidos para obtener la lista de directores
-    directores_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
 
     # Verifica si la respuesta fue exitosa
     directores = directores_response.json() if directores_response.status_code == 200 else []
 
-    # Realizar una solicitud GET a la API de contenidos para obtener la lista de actores
-    actores_response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
-
     # Verifica si la respuesta fue exitosa
     actores = actores_response.json() if actores_response.status_code == 200 else []    
 
@@ -801,14 +887,14 @@ async def crear_pelicula(
         "idDirector": idDirector,
     }
 
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/peliculas", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/peliculas", json=data)
 
     if response.status_code == 200:
         idPelicula = response.json().get("id")
 
         # Añadir los actores uno por uno al reparto del contenido
         for idActor in actores:
-            response = requests.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto/{idActor}")
+            response = await http.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto/{idActor}")
 
             if response.status_code != 200:
                 return templates.TemplateResponse(
@@ -839,14 +925,14 @@ async def crear_serie_form(request: Request):
     """
     Muestra el formulario para crear una serie.
     """
-    # Obtener los géneros y directores desde el microservicio de contenidos
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
+    # Obtener a la vez los géneros y actores desde el microservicio de contenidos
+    generos_response, actores_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/generos"),
+        http.get(f"{BASE_URL_CONTENIDOS}/actores"),
+    )
 
     generos = generos_response.json() if generos_response.status_code == 200 else []
 
-    # Realizar una solicitud GET a la API de contenidos para obtener la lista de actores
-    actores_response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
-
     # Verifica si la respuesta fue exitosa
     actores = actores_response.json() if actores_response.status_code == 200 else []      
 
@@ -883,14 +969,14 @@ async def crear_serie(
         "idDirector": None,
     }
 
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/series", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/series", json=data)
 
     if response.status_code == 200:
         idSerie = response.json().get("id")
 
         # Añadir los actores uno por uno al reparto del contenido
         for idActor in actores:
-            response = requests.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto/{idActor}")
+            response = await http.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto/{idActor}")
 
             if response.status_code != 200:
                 return templates.TemplateResponse(
@@ -928,7 +1014,7 @@ async def crear_temporada_form(request: Request):
     Muestra el formulario para crear una temporada de una serie.
     """
     # Obtener los géneros y directores desde el microservicio de contenidos
-    series_response = requests.get(f"{BASE_URL_CONTENIDOS}/todoseries")
+    series_response = await http.get(f"{BASE_URL_CONTENIDOS}/todoseries")
 
     series = series_response.json() if series_response.status_code == 200 else []
 
@@ -955,7 +1041,7 @@ async def crear_temporada(
         "numeroTemporada": numeroTemporada
     }
 
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/contenidos/{id_serie}/temporadas", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/contenidos/{id_serie}/temporadas", json=data)
 
     if response.status_code == 200:
         redirect_response = RedirectResponse(url="/admin_menu", status_code=303)
@@ -992,7 +1078,7 @@ async def obtener_temporadas(idSerie: str):
     Endpoint para obtener todas las temporadas de una serie específica.
     """
     # Obtener temporadas desde el microservicio de contenidos
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas")
+    response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Error al obtener las temporadas.")
     
@@ -1005,13 +1091,13 @@ async def crear_episodio_form(request: Request):
     """
     Muestra el formulario para crear un episodio.
     """
-    # Obtener todas las series desde el microservicio de contenidos
-    series_response = requests.get(f"{BASE_URL_CONTENIDOS}/todoseries")
+    # Obtener a la vez todas las series y los directores desde el microservicio de contenidos
+    series_response, directores_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/todoseries"),
+        http.get(f"{BASE_URL_CONTENIDOS}/directores"),
+    )
     series = series_response.json() if series_response.status_code == 200 else []
 
-    # Realizar una solicitud GET a la API de contenidos para obtener la lista de directores
-    directores_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
-
     # Verifica si la respuesta fue exitosa
     directores = directores_response.json() if directores_response.status_code == 200 else []
 
@@ -1045,7 +1131,7 @@ async def crear_episodio(
     }
 
     # Hacer la solicitud POST al microservicio de contenidos
-    response = requests.post(
+    response = await http.post(
         f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios",
         json=data,
     )
@@ -1081,7 +1167,7 @@ async def crear_genero(
         "descripcion": descripcion,
     }
 
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/generos", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/generos", json=data)
 
     if response.status_code == 200:
         redirect_response = RedirectResponse(url="/admin_menu", status_code=303)
@@ -1100,11 +1186,13 @@ async def crear_genero(
 
 @app.get("/administrador/peliculas/{idPelicula}", response_class=HTMLResponse)
 async def get_actualizar_pelicula(request: Request, idPelicula: str):
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}")
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
-    directores_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
-    actores_response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
-    reparto_response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto")
+    response, generos_response, directores_response, actores_response, reparto_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}"),
+        http.get(f"{BASE_URL_CONTENIDOS}/generos"),
+        http.get(f"{BASE_URL_CONTENIDOS}/directores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/actores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto"),
+    )
 
     if response.status_code == 200:
         # Obtiene los datos de la pelicula
@@ -1240,11 +1328,11 @@ async def actualizar_pelicula(request: Request, idPelicula: str, actores: list[s
     api_url = f"{BASE_URL_CONTENIDOS}/peliculas/{idPelicula}"
 
     # Enviar la solicitud PUT a la API externa
-    response = requests.put(api_url, json=payload)
+    response = await http.put(api_url, json=payload)
 
     # Comprobar el estado de la respuesta de la API
     if response.status_code == 200:
-        response_delete = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto")
+        response_delete = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto")
         if response_delete.status_code != 200:
             return templates.TemplateResponse(
                 "admin_actualizar_pelicula.html",
@@ -1256,7 +1344,7 @@ async def actualizar_pelicula(request: Request, idPelicula: str, actores: list[s
 
         # Añadir los actores uno por uno al reparto del contenido
         for idActor in actores:
-            response = requests.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto/{idActor}")
+            response = await http.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}/reparto/{idActor}")
 
             if response.status_code != 200:
                 return templates.TemplateResponse(
@@ -1286,10 +1374,12 @@ async def actualizar_pelicula(request: Request, idPelicula: str, actores: list[s
 
 @app.get("/administrador/series/{idSerie}", response_class=HTMLResponse)
 async def get_actualizar_serie(request: Request, idSerie: str):
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}")
-    generos_response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
-    actores_response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
-    reparto_response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto")    
+    response, generos_response, actores_response, reparto_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}"),
+        http.get(f"{BASE_URL_CONTENIDOS}/generos"),
+        http.get(f"{BASE_URL_CONTENIDOS}/actores"),
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto"),
+    )
 
     if response.status_code == 200:
         # Obtiene los datos de la serie
@@ -1400,11 +1490,11 @@ async def actualizar_serie(request: Request, idSerie: str, actores: list[str] =
     api_url = f"{BASE_URL_CONTENIDOS}/series/{idSerie}"
 
     # Enviar la solicitud PUT a la API externa
-    response = requests.put(api_url, json=payload)
+    response = await http.put(api_url, json=payload)
 
     # Comprobar el estado de la respuesta de la API
     if response.status_code == 200:
-        response_delete = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto")
+        response_delete = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto")
         if response_delete.status_code != 200:
             return templates.TemplateResponse(
                 "admin_actualizar_serie.html",
@@ -1416,7 +1506,7 @@ async def actualizar_serie(request: Request, idSerie: str, actores: list[str] =
 
         # Añadir los actores uno por uno al reparto del contenido
         for idActor in actores:
-            response = requests.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto/{idActor}")
+            response = await http.post(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/reparto/{idActor}")
 
             if response.status_code != 200:
                 return templates.TemplateResponse(
@@ -1446,8 +1536,10 @@ async def actualizar_serie(request: Request, idSerie: str, actores: list[str] =
     
 @app.get("/administrador/series/{idSerie}/temporadas/{idTemporada}", response_class=HTMLResponse)
 async def get_actualizar_temporada(request: Request, idSerie: str, idTemporada: str):
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}")
-    series_response = requests.get(f"{BASE_URL_CONTENIDOS}/todoseries")
+    response, series_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}"),
+        http.get(f"{BASE_URL_CONTENIDOS}/todoseries"),
+    )
 
     if response.status_code == 200:
         # Obtiene los datos de la serie
@@ -1517,7 +1609,7 @@ async def actualizar_temporada(request: Request, idTemporada: str):
     api_url = f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}"
 
     # Enviar la solicitud PUT a la API externa
-    response = requests.put(api_url, json=payload)
+    response = await http.put(api_url, json=payload)
 
     # Comprobar el estado de la respuesta de la API
     if response.status_code == 200:
@@ -1540,8 +1632,10 @@ async def actualizar_temporada(request: Request, idTemporada: str):
 
 @app.get("/administrador/series/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}", response_class=HTMLResponse)
 async def get_actualizar_episodio(request: Request, idSerie: str, idTemporada: str, idEpisodio: str):
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}")
-    directores_response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
+    response, directores_response = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}"),
+        http.get(f"{BASE_URL_CONTENIDOS}/directores"),
+    )
 
     if response.status_code == 200:
         # Obtiene los datos de la serie
@@ -1620,7 +1714,7 @@ async def actualizar_episodio(request: Request, idSerie: str, idTemporada: str,
     api_url = f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}"
 
     # Enviar la solicitud PUT a la API externa
-    response = requests.put(api_url, json=payload)
+    response = await http.put(api_url, json=payload)
 
     # Comprobar el estado de la respuesta de la API
     if response.status_code == 200:
@@ -1643,7 +1737,7 @@ async def actualizar_episodio(request: Request, idSerie: str, idTemporada: str,
 
 @app.get("/administrador/generos/{idGenero}", response_class=HTMLResponse)
 async def get_actualizar_genero(request: Request, idGenero: str):
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/generos/{idGenero}")
+    response = await http.get(f"{BASE_URL_CONTENIDOS}/generos/{idGenero}")
 
     if response.status_code == 200:
         # Obtiene los datos de la serie
@@ -1693,7 +1787,7 @@ async def actualizar_genero(request: Request, idGenero: str):
     api_url = f"{BASE_URL_CONTENIDOS}/generos/{idGenero}"
 
     # Enviar la solicitud PUT a la API externa
-    response = requests.put(api_url, json=payload)
+    response = await http.put(api_url, json=payload)
 
     # Comprobar el estado de la respuesta de la API
     if response.status_code == 200:
@@ -1716,16 +1810,16 @@ async def actualizar_genero(request: Request, idGenero: str):
 
 
 @app.get("/peliculas/borrar", response_class=HTMLResponse)
-def borrar_peliculas(request: Request):
+async def borrar_peliculas(request: Request):
     """
     Obtiene la lista de películas desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de películas
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/todopeliculas")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/todopeliculas")
         response.raise_for_status()
         peliculas = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener las películas: {e}</h1>", status_code=500
         )
@@ -1739,33 +1833,33 @@ def borrar_peliculas(request: Request):
 
 
 @app.post("/peliculas/{idPelicula}/borrar")
-def borrar_pelicula(idPelicula: str, request: Request):
+async def borrar_pelicula(idPelicula: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar una película.
     """
     try:
         # Petición a la API de Contenidos para borrar la película
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idPelicula}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar la película: {e}"
 
     # Redirigir nuevamente al listado de películas
     return RedirectResponse(url=f"/peliculas/borrar?mensaje={mensaje}", status_code=303)              
 
 @app.get("/series/borrar", response_class=HTMLResponse)
-def borrar_series(request: Request):
+async def borrar_series(request: Request):
     """
     Obtiene la lista de series desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de series
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/todoseries")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/todoseries")
         response.raise_for_status()
         series = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener las series: {e}</h1>", status_code=500
         )
@@ -1779,33 +1873,33 @@ def borrar_series(request: Request):
 
 
 @app.post("/series/{idSerie}/borrar")
-def borrar_serie(idSerie: str, request: Request):
+async def borrar_serie(idSerie: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar una serie.
     """
     try:
         # Petición a la API de Contenidos para borrar la serie
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar la serie: {e}"
 
     # Redirigir nuevamente al listado de series
     return RedirectResponse(url=f"/series/borrar?mensaje={mensaje}", status_code=303) 
 
 @app.get("/temporadas/borrar", response_class=HTMLResponse)
-def borrar_temporadas(request: Request):
+async def borrar_temporadas(request: Request):
     """
     Obtiene la lista de series desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de series
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/series")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/series")
         response.raise_for_status()
         series = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener las series: {e}</h1>", status_code=500
         )
@@ -1818,17 +1912,17 @@ def borrar_temporadas(request: Request):
     )
 
 @app.post("/series/{idSerie}/temporadas/{idTemporada}/borrar")
-def borrar_temporada(idSerie: str, idTemporada: str, request: Request):
+async def borrar_temporada(idSerie: str, idTemporada: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar una temporada.
     """
     try:
         # Petición a la API de Contenidos para borrar la temporada
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar la temporada: {e}"
 
     # Redirigir nuevamente al listado de series
@@ -1836,16 +1930,16 @@ def borrar_temporada(idSerie: str, idTemporada: str, request: Request):
 
 # Endpoint para admin borrar episodios
 @app.get("/episodios/borrar", response_class=HTMLResponse)
-def borrar_episodios(request: Request):
+async def borrar_episodios(request: Request):
     """
     Obtiene la lista de series desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de series
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/series")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/series")
         response.raise_for_status()
         series = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener las series: {e}</h1>", status_code=500
         )
@@ -1858,17 +1952,17 @@ def borrar_episodios(request: Request):
     )
 
 @app.post("/series/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}/borrar")
-def borrar_episodio(idSerie: str, idTemporada: str, idEpisodio: str, request: Request):
+async def borrar_episodio(idSerie: str, idTemporada: str, idEpisodio: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar un episodio.
     """
     try:
         # Petición a la API de Contenidos para borrar el episodio
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSerie}/temporadas/{idTemporada}/episodios/{idEpisodio}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar el episodio: {e}"
 
     # Redirigir nuevamente al listado de episodios
@@ -1876,16 +1970,16 @@ def borrar_episodio(idSerie: str, idTemporada: str, idEpisodio: str, request: Re
 
 # Endpoints para borrar generos
 @app.get("/generos/borrar", response_class=HTMLResponse)
-def borrar_generos(request: Request):
+async def borrar_generos(request: Request):
     """
     Obtiene la lista de géneros desde la base de datos y redirige a la página HTML.
     """
     try:
         # Petición a la base de datos para obtener el listado de géneros
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/generos")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/generos")
         response.raise_for_status()
         generos = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener los géneros: {e}</h1>", status_code=500
         )
@@ -1898,16 +1992,16 @@ def borrar_generos(request: Request):
     )
 
 @app.post("/generos/{idGenero}/borrar")
-def borrar_genero(idGenero: str, request: Request):
+async def borrar_genero(idGenero: str, request: Request):
     """
     Elimina un género de la base de datos.
     """
     try:
         # Petición a la base de datos para borrar el género
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/generos/{idGenero}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/generos/{idGenero}")
         response.raise_for_status()
         mensaje = response.json().get("message")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar el género: {e}"
 
     # Redirigir nuevamente al listado de géneros con el mensaje
@@ -1942,7 +2036,7 @@ async def crear_actor(
     }
 
     # Hacer la solicitud POST al microservicio de contenidos para crear el actor
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/actores", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/actores", json=data)
 
     # Redirigir con un mensaje si el actor se creó correctamente
     if response.status_code == 200:
@@ -1988,7 +2082,7 @@ async def crear_director(
     }
 
     # Hacer la solicitud POST al microservicio de contenidos para crear el director
-    response = requests.post(f"{BASE_URL_CONTENIDOS}/directores", json=data)
+    response = await http.post(f"{BASE_URL_CONTENIDOS}/directores", json=data)
 
     # Redirigir con un mensaje si el director se creó correctamente
     if response.status_code == 200:
@@ -2009,7 +2103,7 @@ async def crear_director(
 @app.get("/actores/actualizar", response_class=HTMLResponse)
 async def actualizar_actores(request: Request, success: str = None):
     # Realizar una solicitud GET a la API de contenidos para obtener la lista de actores
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
+    response = await http.get(f"{BASE_URL_CONTENIDOS}/actores")
 
     # Verifica si la respuesta fue exitosa
     if response.status_code == 200:
@@ -2042,7 +2136,7 @@ async def actualizar_actor(request: Request):
         actores_actualizados.append(actor_data)
 
     for actor in actores_actualizados:
-        response = requests.put(
+        response = await http.put(
             f"{BASE_URL_CONTENIDOS}/actores/{actor['id']}", json=actor
         )
         if response.status_code != 200:
@@ -2057,16 +2151,16 @@ async def actualizar_actor(request: Request):
 
 # Endpoints para eliminar actores o directores
 @app.get("/actores/borrar", response_class=HTMLResponse)
-def borrar_actores(request: Request):
+async def borrar_actores(request: Request):
     """
     Obtiene la lista de actores desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de actores
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/actores")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/actores")
         response.raise_for_status()
         actores = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener actores: {e}</h1>", status_code=500
         )
@@ -2080,17 +2174,17 @@ def borrar_actores(request: Request):
 
 
 @app.post("/actores/{idActor}/borrar")
-def borrar_actor(idActor: str, request: Request):
+async def borrar_actor(idActor: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar un actor.
     """
     try:
         # Petición a la API de Contenidos para borrar el actor
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/actores/{idActor}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/actores/{idActor}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar el actor: {e}"
 
     # Redirigir nuevamente al listado de actores
@@ -2098,16 +2192,16 @@ def borrar_actor(idActor: str, request: Request):
 
 
 @app.get("/directores/borrar", response_class=HTMLResponse)
-def borrar_directores(request: Request):
+async def borrar_directores(request: Request):
     """
     Obtiene la lista de directores desde la API de Contenidos y redirige a la página HTML.
     """
     try:
         # Petición a la API de Contenidos para obtener el listado de actores
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/directores")
         response.raise_for_status()
         directores = response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return HTMLResponse(
             content=f"<h1>Error al obtener directores: {e}</h1>", status_code=500
         )
@@ -2121,17 +2215,17 @@ def borrar_directores(request: Request):
 
 
 @app.post("/directores/{idDirector}/borrar")
-def borrar_director(idDirector: str, request: Request):
+async def borrar_director(idDirector: str, request: Request):
     """
     Realiza una solicitud a la API de Contenidos para eliminar un director.
     """
     try:
         # Petición a la API de Contenidos para borrar el actor
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/directores/{idDirector}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/directores/{idDirector}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al intentar borrar el director: {e}"
 
     # Redirigir nuevamente al listado de actores
@@ -2144,7 +2238,7 @@ def borrar_director(idDirector: str, request: Request):
 @app.get("/directores/actualizar", response_class=HTMLResponse)
 async def actualizar_directores(request: Request, success: str = None):
     # Realizar una solicitud GET a la API de contenidos para obtener la lista de directores
-    response = requests.get(f"{BASE_URL_CONTENIDOS}/directores")
+    response = await http.get(f"{BASE_URL_CONTENIDOS}/directores")
 
     # Verifica si la respuesta fue exitosa
     if response.status_code == 200:
@@ -2178,7 +2272,7 @@ async def actualizar_director(request: Request):
         directores_actualizados.append(director_data)
 
     for director in directores_actualizados:
-        response = requests.put(
+        response = await http.put(
             f"{BASE_URL_CONTENIDOS}/directores/{director['id']}", json=director
         )
         if response.status_code != 200:
@@ -2190,72 +2284,63 @@ async def actualizar_director(request: Request):
 
 # Endpoints para dar / quitar me-gusta
 @app.post("/contenidos/{user_id}/dar-me-gusta/{idContenido}")
-def dar_me_gusta(user_id: str, idContenido: str):
+async def dar_me_gusta(user_id: str, idContenido: str):
     
     try:
         # Petición a la API de Contenidos para dar me gusta
-        response = requests.post(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta/{idContenido}")
+        response = await http.post(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta/{idContenido}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al dar me gusta: {e}"
 
 @app.delete("/contenidos/{user_id}/eliminar-me-gusta/{idContenido}")
-def eliminar_me_gusta(user_id: str, idContenido: str):
+async def eliminar_me_gusta(user_id: str, idContenido: str):
     
     try:
         # Petición a la API de Interacciones para eliminar me gusta
-        response = requests.delete(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta/{idContenido}")
+        response = await http.delete(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta/{idContenido}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al eliminar me gusta: {e}"
 
 # Endpoints para aniadir / eliminar de LP
 @app.post("/contenidos/{userId}/aniadir_a_LP/{contentId}")
-def aniadir_a_LP(userId: str, contentId: str):
+async def aniadir_a_LP(userId: str, contentId: str):
     
     try:
         # Petición a la API de Interacciones para aniadir a LP
-        response = requests.post(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/listaPersonalizada/{contentId}")
+        response = await http.post(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/listaPersonalizada/{contentId}")
         response.raise_for_status()
         mensaje = response.json().get("message")
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al aniadir a LP: {e}"
 
 @app.delete("/contenidos/{user_id}/eliminar_de_LP/{idContenido}")
-def eliminar_de_LP(user_id: str, idContenido: str):
+async def eliminar_de_LP(user_id: str, idContenido: str):
     
     try:
         # Petición a la API de Contenidos para eliminar de LP
-        response = requests.delete(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada/{idContenido}")
+        response = await http.delete(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada/{idContenido}")
         response.raise_for_status()
         mensaje = response.json().get("message")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         mensaje = f"Error al eliminar de LP: {e}"
 
 @app.get("/contenidos/{user_id}/esta_en_lista/{idContenido}")
-def esta_en_lista(user_id: str, idContenido: str):
-    # Realizar la solicitud al endpoint para obtener la lista personalizada del usuario
-    response = requests.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada")
+async def esta_en_lista(user_id: str, idContenido: str):
+    # Consultar directamente si el contenido está en la lista personalizada del usuario
+    response = await http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/listaPersonalizada/{idContenido}")
 
     # Verificar si la solicitud fue exitosa
     if response.status_code == 200:
         try:
-            # Procesar la respuesta JSON (lista de contenidos)
-            lista_personalizada = response.json()
-            
-            # Buscar el contenido por su ID en la lista personalizada
-            for contenido in lista_personalizada:
-                if contenido["id"] == idContenido:  # Si el ID coincide, devolver True
-                    return True
-            
-            # Si no se encuentra el contenido, devolver False
-            return False
-        except ValueError:
+            return response.json()["enListaPersonalizada"]
+        except (ValueError, KeyError):
             # Manejar errores si la respuesta no es JSON válido
             raise HTTPException(
                 status_code=500,
@@ -2270,24 +2355,15 @@ def esta_en_lista(user_id: str, idContenido: str):
 
 
 @app.get("/contenidos/{user_id}/esta_en_mg/{idContenido}")
-def esta_en_mg(user_id: str, idContenido: str):
-    # Realizar la solicitud al endpoint para obtener los contenidos marcados como "Me gusta"
-    response = requests.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta")
+async def esta_en_mg(user_id: str, idContenido: str):
+    # Consultar directamente si el contenido está en los "Me gusta" del usuario
+    response = await http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/me-gusta/{idContenido}")
     
     # Verificar si la solicitud fue exitosa
     if response.status_code == 200:
         try:
-            # Procesar la respuesta JSON (debe ser una lista de objetos que cumplen con ContenidoMeGusta)
-            me_gusta = response.json()
-            
-            # Buscar el contenido por su ID en la lista de "Me gusta"
-            for contenido in me_gusta:
-                if contenido["id"] == idContenido:  # Si el ID coincide, devolver True
-                    return True
-            
-            # Si no se encuentra el contenido, devolver False
-            return False
-        except ValueError:
+            return response.json()["meGusta"]
+        except (ValueError, KeyError):
             # Manejar errores si la respuesta no es JSON válido
             raise HTTPException(
                 status_code=500,
@@ -2299,6 +2375,26 @@ def esta_en_mg(user_id: str, idContenido: str):
             status_code=response.status_code,
             detail=f"Error al obtener los contenidos 'Me gusta': {response.text}"
         )
+
+# Estado de los botones de la página de detalle ("Me gusta" y lista personalizada) con una sola llamada
+@app.get("/contenidos/{user_id}/estado/{idContenido}")
+async def estado_contenido(user_id: str, idContenido: str):
+    response = await http.get(f"{BASE_URL_INTERACCIONES}/usuarios/{user_id}/estado-contenidos",
+                              params={"ids": [idContenido]})
+    if response.status_code == 200:
+        try:
+            estado = response.json()[0]
+            return {"enLista": estado["enListaPersonalizada"], "meGusta": estado["meGusta"]}
+        except (ValueError, KeyError, IndexError):
+            raise HTTPException(
+                status_code=500,
+                detail="La respuesta del servidor no contiene un JSON válido."
+            )
+    else:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Error al obtener el estado del contenido: {response.text}"
+        )
     
 @app.post("/usuarios/{userId}/valorarContenido/{contentId}")
 async def valorarContenido(userId: str, contentId: str, request: Request):
@@ -2312,7 +2408,7 @@ async def valorarContenido(userId: str, contentId: str, request: Request):
 
         valoracion = body["valoracion"]
 
-        response = requests.post(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/valoraciones/{contentId}?valoracion={valoracion}")
+        response = await http.post(f"{BASE_URL_INTERACCIONES}/usuarios/{userId}/valoraciones/{contentId}?valoracion={valoracion}")
 
         if response.status_code == 200:
             return {"message": "Valoración enviada correctamente", "data": response.json()}
@@ -2321,7 +2417,7 @@ async def valorarContenido(userId: str, contentId: str, request: Request):
                 status_code=response.status_code,
                 detail=f"Error al procesar la valoración: {response.text}",
             )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print("Error al conectar con el servicio:", e)  # Log para depurar
         raise HTTPException(status_code=500, detail=f"Error al conectarse al servicio: {e}")
     except Exception as e:
@@ -2330,14 +2426,14 @@ async def valorarContenido(userId: str, contentId: str, request: Request):
     
 # Endpoint para obtener todos los contenidos (para HTML)
 @app.get("/administrador/contenidos")
-def obtener_todos_los_contenidos():
+async def obtener_todos_los_contenidos():
     """
     Endpoint en el servicio de Streamflix que llama al microservicio Contenido
     para obtener todos los contenidos.
     """
     try:
         # Realiza la llamada al microservicio Contenido
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2345,20 +2441,20 @@ def obtener_todos_los_contenidos():
         # Devuelve los contenidos obtenidos
         return response.json()
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al obtener los contenidos: {e}")
     
 # Endpoint para obtener todos los subtitulos de un contenido (para HTML)
 @app.get("/administrador/contenidos/{idSubtitulosContenido}/subtitulos")
-def obtener_subtitulos_contenido(idSubtitulosContenido: str):
+async def obtener_subtitulos_contenido(idSubtitulosContenido: str):
     """
     Endpoint en el servicio de Interface que llama al microservicio Contenido
     para obtener los subtítulos de un contenido específico.
     """
     try:
         # Realiza la llamada al microservicio Contenido para obtener los subtítulos
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2366,20 +2462,20 @@ def obtener_subtitulos_contenido(idSubtitulosContenido: str):
         # Devuelve los subtítulos obtenidos
         return response.json()
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al obtener los subtítulos: {e}")
 
 # Endpoint para obtener todos los subtitulos (para HTML)
 @app.get("/administrador/contenidos/subtitulos")
-def obtener_todos_los_subtitulos():
+async def obtener_todos_los_subtitulos():
     """
     Endpoint en el servicio de Interface que llama al microservicio Contenido
     para obtener todos los subtítulos disponibles.
     """
     try:
         # Realiza la llamada al microservicio Contenido para obtener todos los subtítulos
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2387,7 +2483,7 @@ def obtener_todos_los_subtitulos():
         # Devuelve la lista de subtítulos obtenida
         return response.json()
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al obtener los subtítulos: {e}")
     
@@ -2402,7 +2498,7 @@ async def eliminar_subtitulos(
     """
     try:
         # Realiza la llamada DELETE al microservicio Contenido para eliminar el subtítulo
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos/{idSubtitulo}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos/{idSubtitulo}")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2410,7 +2506,7 @@ async def eliminar_subtitulos(
         # Redirige a la página de actualización de subtítulos con un mensaje de éxito
         return RedirectResponse(url="/administrador/actualizar_subtitulos?success=true&success_message=Se%20han%20actualizado%20los%20subtitulos%20del%20contenido", status_code=303)
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al eliminar subtítulo: {e}")
     
@@ -2418,8 +2514,10 @@ async def eliminar_subtitulos(
 @app.get("/administrador/actualizar_subtitulos",  response_class=HTMLResponse)
 async def actualizar_subtitulos(request: Request, success: str = None):
     # Realizar una solicitud GET a la API de contenidos para obtener los subtitulos y los contenidos
-    responseSub = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos")
-    responseCont = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos")
+    responseSub, responseCont = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos"),
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos"),
+    )
 
     # Verifica si la respuesta fue exitosa
     if responseCont.status_code == 200 and responseSub.status_code == 200:
@@ -2452,7 +2550,7 @@ async def actualizar_subtitulos(
         
 
         # Realiza la llamada GET al endpoint /contenidos/{idContenido}/subtitulos para obtener los subtítulos asignados
-        response_check = requests.get(
+        response_check = await http.get(
             f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos"
         )
 
@@ -2472,7 +2570,7 @@ async def actualizar_subtitulos(
             )
 
         # Si no está asignado, intenta añadirlo
-        response = requests.post(
+        response = await http.post(
             f"{BASE_URL_CONTENIDOS}/contenidos/{idSubtitulosContenido}/subtitulos/{idSubtitulo}"
         )
 
@@ -2485,20 +2583,20 @@ async def actualizar_subtitulos(
             status_code=303
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al asignar subtítulo: {e}")
     
 # Endpoint para obtener todos los doblajes de un contenido (para HTML)
 @app.get("/administrador/contenidos/{idDoblajeContenido}/doblajes")
-def obtener_doblajes_contenido(idDoblajeContenido: str):
+async def obtener_doblajes_contenido(idDoblajeContenido: str):
     """
     Endpoint en el servicio de Interface que llama al microservicio Contenido
     para obtener los doblajes de un contenido específico.
     """
     try:
         # Realiza la llamada al microservicio Contenido para obtener los doblajes
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2506,20 +2604,20 @@ def obtener_doblajes_contenido(idDoblajeContenido: str):
         # Devuelve los doblajes obtenidos
         return response.json()
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al obtener los doblajes: {e}")
     
 # Endpoint para obtener todos los doblajes (para HTML)
 @app.get("/administrador/contenidos/doblajes")
-def obtener_todos_los_doblajes():
+async def obtener_todos_los_doblajes():
     """
     Endpoint en el servicio de Interface que llama al microservicio Contenido
     para obtener todos los doblajes disponibles.
     """
     try:
         # Realiza la llamada al microservicio Contenido para obtener todos los doblajes
-        response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes")
+        response = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2527,7 +2625,7 @@ def obtener_todos_los_doblajes():
         # Devuelve la lista de doblajes obtenida
         return response.json()
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al obtener los doblajes: {e}")
     
@@ -2542,7 +2640,7 @@ async def eliminar_doblajes(
     """
     try:
         # Realiza la llamada DELETE al microservicio Contenido para eliminar el doblaje
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes/{idDoblaje}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes/{idDoblaje}")
         
         # Maneja errores de la respuesta
         response.raise_for_status()
@@ -2550,7 +2648,7 @@ async def eliminar_doblajes(
         # Redirige a la página de actualización de doblajes con un mensaje de éxito
         return RedirectResponse(url="/administrador/actualizar_doblajes?success=true&success_message=Se%20han%20actualizado%20los%20doblajes%20del%20contenido", status_code=303)
     
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al eliminar doblaje: {e}")
     
@@ -2558,8 +2656,10 @@ async def eliminar_doblajes(
 @app.get("/administrador/actualizar_doblajes",  response_class=HTMLResponse)
 async def actualizar_doblajes(request: Request, success: str = None):
     # Realizar una solicitud GET a la API de contenidos para obtener la lista de directores
-    responseDobl = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes")
-    responseCont = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos")
+    responseDobl, responseCont = await asyncio.gather(
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes"),
+        http.get(f"{BASE_URL_CONTENIDOS}/contenidos"),
+    )
 
     # Verifica si la respuesta fue exitosa
     if responseCont.status_code == 200 and responseDobl.status_code == 200:
@@ -2591,7 +2691,7 @@ async def actualizar_doblajes(
     """
     try:
         # Realiza la llamada GET al endpoint /contenidos/{idContenido}/doblajes para obtener los doblajes asignados
-        response_check = requests.get(
+        response_check = await http.get(
             f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes"
         )
 
@@ -2611,7 +2711,7 @@ async def actualizar_doblajes(
             )
 
         # Si no está asignado, intenta añadirlo
-        response = requests.post(
+        response = await http.post(
             f"{BASE_URL_CONTENIDOS}/contenidos/{idDoblajeContenido}/doblajes/{idDoblaje}"
         )
 
@@ -2624,7 +2724,7 @@ async def actualizar_doblajes(
             status_code=303
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Lanza una excepción HTTP si hay algún error en la llamada
         raise HTTPException(status_code=500, detail=f"Error al asignar doblaje: {e}")
     
@@ -2636,7 +2736,7 @@ async def administrar_subtitulos_idiomas(
     Renderiza la página de administración de subtítulos y muestra mensajes según el estado de las operaciones.
     """
     # Realizar una solicitud GET a la API de contenidos para obtener los subtítulos
-    responseSub = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos")
+    responseSub = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos")
 
     # Verifica si la respuesta fue exitosa
     if responseSub.status_code == 200:
@@ -2667,7 +2767,7 @@ async def crear_subtitulo(nuevoIdioma: str = Form(...)):
         idSubtitulo = str(uuid.uuid4())[:8]  # Puedes ajustar el formato del ID según sea necesario
 
         # Enviar la solicitud al microservicio
-        response = requests.post(
+        response = await http.post(
             f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos/{idSubtitulo}/{nuevoIdioma}"
         )
         response.raise_for_status()  # Lanza una excepción si el backend falla
@@ -2678,7 +2778,7 @@ async def crear_subtitulo(nuevoIdioma: str = Form(...)):
             status_code=303,
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Redirige al mismo HTML con un mensaje de error
         return RedirectResponse(
             url=f"/administrador/administrar_subtitulos_idiomas?success=false&message=Error%20al%20crear%20el%20subtítulo",
@@ -2694,7 +2794,7 @@ async def eliminar_subtitulo(idSubtitulo: str = Form(...)):
     """
     try:
         # Realizar la solicitud DELETE al backend
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos/{idSubtitulo}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/subtitulos/{idSubtitulo}")
         response.raise_for_status()  # Lanza una excepción si el backend falla
 
         # Redirige al mismo HTML con un mensaje de éxito
@@ -2703,7 +2803,7 @@ async def eliminar_subtitulo(idSubtitulo: str = Form(...)):
             status_code=303,
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Redirige al mismo HTML con un mensaje de error
         return RedirectResponse(
             url=f"/administrador/administrar_subtitulos_idiomas?success=false&message=Error%20al%20eliminar%20el%20subtítulo",
@@ -2718,7 +2818,7 @@ async def administrar_doblajes_idiomas(
     Renderiza la página de administración de doblajes y muestra mensajes según el estado de las operaciones.
     """
     # Realizar una solicitud GET a la API de contenidos para obtener los doblajes
-    responseSub = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes")
+    responseSub = await http.get(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes")
 
     # Verifica si la respuesta fue exitosa
     if responseSub.status_code == 200:
@@ -2749,7 +2849,7 @@ async def crear_doblaje(nuevoIdioma: str = Form(...)):
         idDoblaje = str(uuid.uuid4())[:8]  # Puedes ajustar el formato del ID según sea necesario
 
         # Enviar la solicitud al microservicio
-        response = requests.post(
+        response = await http.post(
             f"{BASE_URL_CONTENIDOS}/contenidos/doblajes/{idDoblaje}/{nuevoIdioma}"
         )
         response.raise_for_status()  # Lanza una excepción si el backend falla
@@ -2760,7 +2860,7 @@ async def crear_doblaje(nuevoIdioma: str = Form(...)):
             status_code=303,
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Redirige al mismo HTML con un mensaje de error
         return RedirectResponse(
             url=f"/administrador/administrar_doblajes_idiomas?success=false&message=Error%20al%20crear%20el%20doblaje",
@@ -2776,7 +2876,7 @@ async def eliminar_doblaje(idDoblaje: str = Form(...)):
     """
     try:
         # Realizar la solicitud DELETE al backend
-        response = requests.delete(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes/{idDoblaje}")
+        response = await http.delete(f"{BASE_URL_CONTENIDOS}/contenidos/doblajes/{idDoblaje}")
         response.raise_for_status()  # Lanza una excepción si el backend falla
 
         # Redirige al mismo HTML con un mensaje de éxito
@@ -2785,7 +2885,7 @@ async def eliminar_doblaje(idDoblaje: str = Form(...)):
             status_code=303,
         )
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Redirige al mismo HTML con un mensaje de error
         return RedirectResponse(
             url=f"/administrador/administrar_doblajes_idiomas?success=false&message=Error%20al%20eliminar%20el%20doblaje",
@@ -2795,15 +2895,17 @@ async def eliminar_doblaje(idDoblaje: str = Form(...)):
 
 #Endpoint para acceder a la lista de planes de suscripción para actualizarlo o cambiarlo
 @app.get("/usuarios/{user_id}/plan_suscripcion")
-def obtener_planes_de_suscripcion(request: Request, user_id: str, mensaje: str = None):
-    # Se obtienen todos los planes de suscripcion
-    response = requests.get(f"{BASE_URL_USUARIOS}/planes-suscripcion")
-    if response.status_code != 200:
+async def obtener_planes_de_suscripcion(request: Request, user_id: str, mensaje: str = None):
+    # Se obtienen a la vez todos los planes de suscripcion y los datos del usuario
+    planes_response, response = await asyncio.gather(
+        http.get(f"{BASE_URL_USUARIOS}/planes-suscripcion"),
+        http.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}"),
+    )
+    if planes_response.status_code != 200:
         mensaje = "Error: no se ha encontrado ningún Plan de Suscripción"
-    planes_suscripcionBD = response.json()
+    planes_suscripcionBD = planes_response.json()
     
     # Se obtiene el id del plan de suscripción que posee el usuario
-    response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{user_id}")
     if response.status_code != 200:
         mensaje = "Error: No se ha podido obtener el Plan del Usuario"
     usuario = response.json()
@@ -2830,7 +2932,7 @@ async def actualizar_plan(request: Request, user_id: str, plan_id: str = Form(..
     }
 
     # Hacer la solicitud PUT al servicio de usuarios
-    response = requests.put(
+    response = await http.put(
         f"{BASE_URL_USUARIOS}/usuarios/{user_id}/suscripcion",
         json=data
     )
@@ -2845,14 +2947,14 @@ async def actualizar_plan(request: Request, user_id: str, plan_id: str = Form(..
     )
 
 @app.post("/usuarios/{user_id}/cancelar_suscripcion")
-def cancelar_suscripcion(request: Request, user_id: str):
+async def cancelar_suscripcion(request: Request, user_id: str):
     data = {
         "accion": "cancelar",
         "idPlanSuscripcion": None
     }
 
     # Hacer la solicitud PUT al servicio de usuarios
-    response = requests.put(
+    response = await http.put(
         f"{BASE_URL_USUARIOS}/usuarios/{user_id}/suscripcion",
         json=data
     )
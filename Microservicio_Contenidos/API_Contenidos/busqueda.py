@@ -0,0 +1,137 @@
+from sqlalchemy import bindparam, text
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Índice de búsqueda de texto completo (SQLite FTS5) para contenidos y actores.
+
+El índice se mantiene sincronizado desde las funciones de escritura de crud.py, dentro
+de la misma transacción que el cambio. Para reconstruirlo en una base de datos existente:
+
+    python -m API_Contenidos.busqueda     (desde Microservicio_Contenidos, con DB_PATH definido)
+
+"""
+
+# Tablas virtuales FTS5. Los ids no se indexan, solo se guardan para devolverlos.
+# remove_diacritics permite que "animacion" encuentre "Animación".
+SQL_CREAR_INDICE_CONTENIDOS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS "ContenidoBusqueda" USING fts5(
+    "idContenido" UNINDEXED, titulo, descripcion, genero, actores, directores,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+SQL_CREAR_INDICE_ACTORES = """
+CREATE VIRTUAL TABLE IF NOT EXISTS "ActorBusqueda" USING fts5(
+    "idActor" UNINDEXED, nombre, nacionalidad UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# Fila del índice de un contenido: título, descripción, nombre del género, nombres del reparto
+# y nombres de los directores (de la película o de los episodios de la serie)
+SQL_FILAS_CONTENIDOS = """
+INSERT INTO "ContenidoBusqueda" ("idContenido", titulo, descripcion, genero, actores, directores)
+SELECT c.id, c.titulo, c.descripcion, coalesce(g.nombre, ''),
+       coalesce((SELECT group_concat(a.nombre, ' ')
+                 FROM "Reparto" r JOIN "Actor" a ON a.id = r."idActor"
+                 WHERE r."idContenido" = c.id), ''),
+       coalesce((SELECT group_concat(d.nombre, ' ')
+                 FROM "Director" d
+                 WHERE d.id = c."idDirector"
+                    OR d.id IN (SELECT e."idDirector" FROM "Episodio" e WHERE e."idContenido" = c.id)), '')
+FROM "Contenido" c LEFT JOIN "Genero" g ON g.id = c."idGenero"
+"""
+
+SQL_FILAS_ACTORES = """
+INSERT INTO "ActorBusqueda" ("idActor", nombre, nacionalidad)
+SELECT a.id, a.nombre, a.nacionalidad FROM "Actor" a
+"""
+
+# bm25 con pesos por columna: el título pesa más que el resto (el id no está indexado)
+SQL_BUSCAR_CONTENIDOS = """
+SELECT "idContenido", titulo, genero FROM "ContenidoBusqueda"
+WHERE "ContenidoBusqueda" MATCH :consulta
+ORDER BY bm25("ContenidoBusqueda", 0.0, 10.0, 1.0, 5.0, 3.0, 3.0)
+"""
+
+SQL_BUSCAR_ACTORES = """
+SELECT "idActor", nombre, nacionalidad FROM "ActorBusqueda"
+WHERE "ActorBusqueda" MATCH :consulta
+ORDER BY bm25("ActorBusqueda")
+"""
+
+
+# Convierte el texto introducido por el usuario en una consulta FTS5 segura:
+# cada palabra se busca como prefijo y deben aparecer todas
+def construir_consulta(busqueda: str) -> str:
+    terminos = [termino.replace('"', '""') for termino in busqueda.split()]
+    return " ".join(f'"{termino}"*' for termino in terminos if termino)
+
+# Crea las tablas del índice si no existen y, si se acaban de crear, las rellena (lo aplica la
+# migración 4 de migraciones.py, en su transacción)
+def crear_indice(conexion):
+    existia = conexion.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'ContenidoBusqueda'")
+    ).first()
+    conexion.execute(text(SQL_CREAR_INDICE_CONTENIDOS))
+    conexion.execute(text(SQL_CREAR_INDICE_ACTORES))
+    if not existia:
+        reconstruir_indice(conexion)
+        print("Índice de búsqueda creado.")
+
+# Vacía y vuelve a generar el índice completo a partir de las tablas
+def reconstruir_indice(db):
+    db.execute(text('DELETE FROM "ContenidoBusqueda"'))
+    db.execute(text('DELETE FROM "ActorBusqueda"'))
+    db.execute(text(SQL_FILAS_CONTENIDOS))
+    db.execute(text(SQL_FILAS_ACTORES))
+
+# Vuelve a indexar los contenidos indicados (si un id ya no existe, simplemente se elimina del índice)
+def indexar_contenidos(db, ids_contenido: list[str]):
+    ids_contenido = list(set(ids_contenido))
+    if not ids_contenido:
+        return
+    # Los cambios pendientes de la sesión tienen que estar en la base de datos antes de leerlos
+    db.flush()
+    db.execute(
+        text('DELETE FROM "ContenidoBusqueda" WHERE "idContenido" IN :ids').bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids_contenido}
+    )
+    db.execute(
+        text(SQL_FILAS_CONTENIDOS + " WHERE c.id IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids_contenido}
+    )
+
+# Vuelve a indexar un actor (si ya no existe, se elimina del índice)
+def indexar_actor(db, idActor: str):
+    db.flush()
+    db.execute(text('DELETE FROM "ActorBusqueda" WHERE "idActor" = :id'), {"id": idActor})
+    db.execute(text(SQL_FILAS_ACTORES + " WHERE a.id = :id"), {"id": idActor})
+
+def buscar_contenidos(db, busqueda: str):
+    consulta = construir_consulta(busqueda)
+    if not consulta:
+        return []
+    return db.execute(text(SQL_BUSCAR_CONTENIDOS), {"consulta": consulta}).all()
+
+def buscar_actores(db, busqueda: str):
+    consulta = construir_consulta(busqueda)
+    if not consulta:
+        return []
+    return db.execute(text(SQL_BUSCAR_ACTORES), {"consulta": consulta}).all()
+
+
+# Comando para reconstruir el índice de una base de datos existente
+if __name__ == "__main__":
+    from .migraciones import aplicar_migraciones  # Carga models antes que database, como exige el paquete
+    from .database import SessionLocal, engine
+
+    aplicar_migraciones(engine)  # Crea el índice si la base de datos todavía no lo tiene
+    db = SessionLocal()
+    try:
+        reconstruir_indice(db)
+        db.commit()
+        print("Índice de búsqueda reconstruido.")
+    finally:
+        db.close()
@@ -0,0 +1,67 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Registro de cambios del catálogo (tabla Cambio).
+
+Las funciones de escritura de crud.py anotan cada alta, modificación y borrado en la misma
+transacción que el cambio, así que un cambio aparece en el registro si y solo si se ha confirmado.
+Como SQLite solo admite una escritura a la vez, los números de secuencia se confirman en orden y
+quien lee GET /cambios?desde=<último seq leído> no se salta ningún cambio.
+El último seq de una entidad o de un contenido sirve también como versión para los ETag.
+
+"""
+
+CREAR = "crear"
+ACTUALIZAR = "actualizar"
+ELIMINAR = "eliminar"
+
+
+# Anota un cambio en la sesión (se guarda al confirmar la transacción)
+def registrar(db: Session, entidad: str, operacion: str, idEntidad, idContenido: str = None):
+    if isinstance(idEntidad, (tuple, list)):
+        idEntidad = "/".join(str(parte) for parte in idEntidad)
+    db.add(models.Cambio(entidad=entidad, operacion=operacion, idEntidad=str(idEntidad), idContenido=idContenido))
+
+# Anota el mismo cambio para varios contenidos
+def registrar_contenidos(db: Session, operacion: str, ids_contenido):
+    for idContenido in dict.fromkeys(ids_contenido):
+        registrar(db, "Contenido", operacion, idContenido, idContenido)
+
+# Anota el cambio de una fila compartida por varios contenidos (por ejemplo, unos subtítulos con el
+# mismo idSubtitulosContenido) una vez por contenido, para que cambie la versión de todos ellos
+def registrar_compartido(db: Session, entidad: str, operacion: str, idEntidad, ids_contenido):
+    for idContenido in dict.fromkeys(ids_contenido):
+        registrar(db, entidad, operacion, idEntidad, idContenido)
+
+# Devuelve los cambios posteriores a la secuencia indicada, en orden
+def get_cambios(db: Session, desde: int = 0, limit: int = 1000) -> list:
+    return (
+        db.query(models.Cambio)
+        .filter(models.Cambio.seq > desde)
+        .order_by(models.Cambio.seq)
+        .limit(limit)
+        .all()
+    )
+
+# Último número de secuencia del registro (0 si está vacío)
+def get_ultimo_seq(db: Session) -> int:
+    ultimo = db.query(models.Cambio.seq).order_by(models.Cambio.seq.desc()).first()
+    return ultimo.seq if ultimo else 0
+
+# Versión de las entidades indicadas: último seq de sus cambios (0 si no han cambiado)
+def get_version_entidades(db: Session, *entidades: str) -> int:
+    # Una consulta por entidad: el máximo con igualdad se resuelve con una búsqueda en el índice
+    return max(
+        (db.query(func.max(models.Cambio.seq)).filter(models.Cambio.entidad == entidad).scalar() or 0
+         for entidad in entidades),
+        default=0,
+    )
+
+# Versión de un contenido: último seq de los cambios del contenido o de sus temporadas, episodios,
+# reparto, subtítulos y doblajes (0 si no ha cambiado)
+def get_version_contenido(db: Session, idContenido: str) -> int:
+    return db.query(func.max(models.Cambio.seq)).filter(models.Cambio.idContenido == idContenido).scalar() or 0
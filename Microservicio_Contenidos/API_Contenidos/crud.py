@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import and_, bindparam, case, func, update
+from sqlalchemy.orm import Session, aliased, selectinload
+from . import models, schemas, busqueda, cambios, referencias
 import uuid
-from typing import Union
+from typing import Optional, Union
 
 # Función para crear una película
 def create_pelicula(db: Session, pelicula: schemas.PeliculaCreate):  
@@ -18,6 +19,9 @@ def create_pelicula(db: Session, pelicula: schemas.PeliculaCreate):
         idDirector=pelicula.idDirector
     )
     db.add(db_contenido)
+    db.flush()  # Genera el id antes de indexarlo
+    busqueda.indexar_contenidos(db, [db_contenido.id])
+    cambios.registrar(db, "Contenido", cambios.CREAR, db_contenido.id, db_contenido.id)
     db.commit()
     db.refresh(db_contenido)
     
@@ -39,6 +43,9 @@ def create_serie(db: Session, serie: schemas.ContenidoBase):
         idDirector=None
     )
     db.add(db_serie)
+    db.flush()  # Genera el id antes de indexarlo
+    busqueda.indexar_contenidos(db, [db_serie.id])
+    cambios.registrar(db, "Contenido", cambios.CREAR, db_serie.id, db_serie.id)
     db.commit()
     db.refresh(db_serie)
 
@@ -51,6 +58,8 @@ def create_temporada(db: Session, temporada: schemas.TemporadaCreate, idContenid
         numeroTemporada=temporada.numeroTemporada
     )
     db.add(db_temporada)
+    db.flush()  # Genera el idTemporada antes de registrarlo
+    cambios.registrar(db, "Temporada", cambios.CREAR, (idContenido, db_temporada.idTemporada), idContenido)
     db.commit()
     db.refresh(db_temporada)
     return db_temporada
@@ -65,6 +74,8 @@ def create_episodio(db: Session, episodio: schemas.EpisodioCreate, idContenido:
         duracion=episodio.duracion
     )
     db.add(db_episodio)
+    busqueda.indexar_contenidos(db, [idContenido])
+    cambios.registrar(db, "Episodio", cambios.CREAR, (idContenido, idTemporada, db_episodio.idEpisodio), idContenido)
     db.commit()
     db.refresh(db_episodio)
     return db_episodio
@@ -84,6 +95,8 @@ def update_content(db: Session, content_id: str, content_data: Union[schemas.Pel
     # Actualizar los campos del contenido usando setattr
     for key, value in update_data.items():
         setattr(content, key, value)
+    busqueda.indexar_contenidos(db, [content.id])
+    cambios.registrar(db, "Contenido", cambios.ACTUALIZAR, content.id, content.id)
     
     # Confirmar los cambios en la base de datos
     db.commit()
@@ -98,7 +111,9 @@ def create_subtitulos(db:Session , subtitulo_id: str, idioma: str):
         idioma=idioma
     )
     db.add(db_subtitulo)
+    cambios.registrar(db, "Subtitulo", cambios.CREAR, subtitulo_id)
     db.commit()
+    referencias.cache.invalidar("Subtitulo")
     db.refresh(db_subtitulo)
     return db_subtitulo
 
@@ -107,11 +122,18 @@ def delete_subtitulo(db:Session , subtitulo_id: str):
     subtitulo = db.query(models.Subtitulo).filter(models.Subtitulo.idSubtitulo == subtitulo_id).first()
     if subtitulo:
         db.delete(subtitulo)
+        cambios.registrar(db, "Subtitulo", cambios.ELIMINAR, subtitulo_id)
         db.commit()
+        referencias.cache.invalidar("Subtitulo")
         return True
     return False
 
 # Función para añadir subtítulos a un contenido
+# Ids de los contenidos que comparten unos subtítulos o unos doblajes (columna idSubtitulosContenido
+# o idDoblajeContenido de Contenido)
+def get_ids_contenidos_compartidos(db: Session, columna, valor: str) -> list[str]:
+    return [fila.id for fila in db.query(models.Contenido.id).filter(columna == valor)]
+
 def update_subtitulo(db: Session, idSubtitulosContenido: str, subtitulo_id: str):
     content_query = db.query(models.Contenido).filter(models.Contenido.idSubtitulosContenido == idSubtitulosContenido).first()
     subtitulo_query = db.query(models.Subtitulo).filter(models.Subtitulo.idSubtitulo == subtitulo_id).first()
@@ -121,6 +143,8 @@ def update_subtitulo(db: Session, idSubtitulosContenido: str, subtitulo_id: str)
             idSubtitulo = subtitulo_query.idSubtitulo
         )
         db.add(db_SubtituloContenido)
+        cambios.registrar_compartido(db, "SubtituloContenido", cambios.CREAR, (idSubtitulosContenido, subtitulo_id),
+                                     get_ids_contenidos_compartidos(db, models.Contenido.idSubtitulosContenido, idSubtitulosContenido))
         db.commit()
         db.refresh(db_SubtituloContenido)
 
@@ -152,6 +176,8 @@ def delete_subtitulos(db: Session, idSubtitulosContenido: str, subtitulo_id: str
         # Si la relación existe, eliminarla
         if db_SubtituloContenido:
             db.delete(db_SubtituloContenido)
+            cambios.registrar_compartido(db, "SubtituloContenido", cambios.ELIMINAR, (idSubtitulosContenido, subtitulo_id),
+                                         get_ids_contenidos_compartidos(db, models.Contenido.idSubtitulosContenido, idSubtitulosContenido))
             db.commit()
             return {"message": "Subtítulo eliminado correctamente"}
         else:
@@ -166,7 +192,9 @@ def create_doblajes(db: Session, doblaje_id: str, idioma: str):
         idioma=idioma
     )
     db.add(db_doblaje)
+    cambios.registrar(db, "Doblaje", cambios.CREAR, doblaje_id)
     db.commit()
+    referencias.cache.invalidar("Doblaje")
     db.refresh(db_doblaje)
     return db_doblaje
 
@@ -175,7 +203,9 @@ def delete_doblaje(db: Session, doblaje_id: str):
     doblaje = db.query(models.Doblaje).filter(models.Doblaje.idDoblaje == doblaje_id).first()
     if doblaje:
         db.delete(doblaje)
+        cambios.registrar(db, "Doblaje", cambios.ELIMINAR, doblaje_id)
         db.commit()
+        referencias.cache.invalidar("Doblaje")
         return True
     return False
 
@@ -196,6 +226,8 @@ def delete_doblajes(db: Session, idDoblajeContenido: str, doblaje_id: str):
         # Si la relación existe, eliminarla
         if db_DoblajeContenido:
             db.delete(db_DoblajeContenido)
+            cambios.registrar_compartido(db, "DoblajeContenido", cambios.ELIMINAR, (idDoblajeContenido, doblaje_id),
+                                         get_ids_contenidos_compartidos(db, models.Contenido.idDoblajeContenido, idDoblajeContenido))
             db.commit()
             return {"message": "Doblaje eliminado correctamente"}
         else:
@@ -213,6 +245,8 @@ def update_doblaje(db: Session, idDoblajeContenido: str, doblaje_id: str):
             idDoblaje = doblaje_query.idDoblaje
         )
         db.add(db_DoblajeContenido)
+        cambios.registrar_compartido(db, "DoblajeContenido", cambios.CREAR, (idDoblajeContenido, doblaje_id),
+                                     get_ids_contenidos_compartidos(db, models.Contenido.idDoblajeContenido, idDoblajeContenido))
         db.commit()
         db.refresh(db_DoblajeContenido)
 
@@ -249,6 +283,8 @@ def delete_content(db: Session, idContenido: str) -> bool:
     content = db.query(models.Contenido).filter(models.Contenido.id == idContenido).first()
     if content:
         db.delete(content)
+        busqueda.indexar_contenidos(db, [idContenido])
+        cambios.registrar(db, "Contenido", cambios.ELIMINAR, idContenido, idContenido)
         db.commit()
         return True
     return False
@@ -261,6 +297,7 @@ def delete_season(db: Session, idContenido: str, idTemporada: str) -> bool:
     ).first()
     if season:
         db.delete(season)
+        cambios.registrar(db, "Temporada", cambios.ELIMINAR, (idContenido, idTemporada), idContenido)
         db.commit()
         return True
     return False
@@ -274,6 +311,8 @@ def delete_episode(db: Session, idContenido: str, idTemporada: str, idEpisodio:
     ).first()
     if episode:
         db.delete(episode)
+        busqueda.indexar_contenidos(db, [idContenido])
+        cambios.registrar(db, "Episodio", cambios.ELIMINAR, (idContenido, idTemporada, idEpisodio), idContenido)
         db.commit()
         return True
     return False
@@ -288,26 +327,20 @@ def get_pelicula_by_id(db: Session, id_contenido: str):
 def get_serie_by_id(db: Session, id_contenido: str):
     return db.query(models.Contenido).filter(models.Contenido.id == id_contenido and models.Contenido.tipoContenido == "Serie").first()
 
-# Consulta de todos los contenidos
-def get_all_contenidos(db: Session):
-    # Obtener todos los contenidos generales (Peliculas o Series)
-    contenidos = db.query(models.Contenido).all()
-    
-    # Crear una lista para almacenar los resultados
-    resultado_contenidos = []
-
-    # Iterar sobre cada contenido y diferenciar si es Pelicula o Serie
-    for contenido in contenidos:
-        if contenido.tipoContenido == "Pelicula":
-            pelicula = get_pelicula_by_id(db, contenido.id)  # Obtener detalles de la Película
-            if pelicula:
-                resultado_contenidos.append(pelicula)
-        elif contenido.tipoContenido == "Serie":
-            serie = get_serie_by_id(db, contenido.id)  # Obtener detalles de la Serie
-            if serie:
-                resultado_contenidos.append(serie)
-
-    return resultado_contenidos
+# Consulta de todos los contenidos (Peliculas o Series) con paginación por clave (keyset)
+def get_all_contenidos(db: Session, after: Optional[str] = None, limit: Optional[int] = None):
+    # Una única consulta ordenada por id que se recorre por lotes en lugar de cargarla entera en memoria
+    query = db.query(models.Contenido).filter(
+        models.Contenido.tipoContenido.in_(("Pelicula", "Serie"))
+    ).order_by(models.Contenido.id)
+
+    # Continuar a partir del último id devuelto en la página anterior
+    if after is not None:
+        query = query.filter(models.Contenido.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query.yield_per(500)
 
 # Consulta de todas las series
 def get_todoseries(db: Session):
@@ -329,88 +362,105 @@ def get_temporadas_by_serie(db: Session, idSerie: str):
 def get_contenido_by_id(db: Session, id_contenido: str):
     return db.query(models.Contenido).filter(models.Contenido.id == id_contenido).first()    
 
-def get_serie_con_temporadas_episodios(db: Session, idSerie: str):
+# Función para saber si existe un contenido (sin cargarlo)
+def existe_contenido(db: Session, id_contenido: str) -> bool:
+    return db.query(models.Contenido.id).filter(models.Contenido.id == id_contenido).first() is not None
+
+# Obtiene varios contenidos con una única consulta IN (...), respetando el orden de entrada
+def get_contenidos_by_ids(db: Session, ids_contenido: list[str]):
+    # Eliminar duplicados manteniendo el orden en el que se pidieron
+    ids_unicos = list(dict.fromkeys(ids_contenido))
+    if not ids_unicos:
+        return [], []
+
+    contenidos = db.query(models.Contenido).filter(models.Contenido.id.in_(ids_unicos)).all()
+    contenidos_por_id = {contenido.id: contenido for contenido in contenidos}
+
+    encontrados = [contenidos_por_id[id_contenido] for id_contenido in ids_unicos if id_contenido in contenidos_por_id]
+    no_encontrados = [id_contenido for id_contenido in ids_unicos if id_contenido not in contenidos_por_id]
+    return encontrados, no_encontrados
+
+# Convierte una serie con sus temporadas y episodios ya cargados en la estructura de schemas.SeriesGet
+def construir_arbol_serie(serie):
+    return {
+        "idSerie": serie.id,
+        "titulo": serie.titulo,
+        "Temporadas": [
+            {
+                "idTemporada": temporada.idTemporada,
+                "numeroTemporada": temporada.numeroTemporada,
+                "Episodios": temporada.episodios
+            }
+            for temporada in serie.temporadas
+        ]
+    }
 
-    serie = db.query(models.Contenido).filter(
-        models.Contenido.id == idSerie,
+# Consulta de series que carga temporadas y episodios con una consulta IN (...) por nivel
+def query_series_con_temporadas_episodios(db: Session):
+    return db.query(models.Contenido).filter(
         models.Contenido.tipoContenido == "Serie"
-    ).first()
+    ).options(
+        selectinload(models.Contenido.temporadas).selectinload(models.Temporada.episodios)
+    )
+
+def get_serie_con_temporadas_episodios(db: Session, idSerie: str):
+    serie = query_series_con_temporadas_episodios(db).filter(models.Contenido.id == idSerie).first()
 
     if not serie:
         return None
-    
-    #Obtener todas sus temporadas y episodios
-    temporadas = db.query(models.Temporada).filter(models.Temporada.idContenido == idSerie).all()
-    temporadas_data = []
-
-    for temporada in temporadas:
-        episodios = db.query(models.Episodio).filter(models.Episodio.idTemporada == temporada.idTemporada).all()
-        
-        # Estructura de episodios para la respuesta
-        episodios_data = [
-            schemas.Episodio(
-                idDirector=episodio.idDirector,
-                idEpisodio=episodio.idEpisodio,
-                duracion=episodio.duracion,
-                numeroEpisodio=episodio.numeroEpisodio,
-                idContenido=episodio.idContenido,
-                idTemporada=episodio.idTemporada
-            ) for episodio in episodios
-        ]
 
-        # Añadir los datos de la temporada con sus episodios
-        temporadas_data.append(schemas.TemporadasGet(
-            idTemporada=temporada.idTemporada,
-            numeroTemporada=temporada.numeroTemporada,
-            Episodios=episodios_data
-        ))
-    return schemas.SeriesGet(
-        idSerie=serie.id,
-        titulo=serie.titulo,
-        Temporadas=temporadas_data
-    )
+    return construir_arbol_serie(serie)
 
 def get_all_series_con_temporadas_episodios(db: Session):
-    # Obtener todas las series
-    series = db.query(models.Contenido).filter(models.Contenido.tipoContenido == "Serie").all()
-    series_data = []
-
-    for serie in series:
-        # Obtener todas las temporadas para la serie actual
-        temporadas = db.query(models.Temporada).filter(models.Temporada.idContenido == serie.id).all()
-        temporadas_data = []
-
-        for temporada in temporadas:
-            # Obtener todos los episodios para la temporada actual
-            episodios = db.query(models.Episodio).filter(models.Episodio.idTemporada == temporada.idTemporada).all()
-            
-            # Estructura de episodios para la respuesta
-            episodios_data = [
-                schemas.Episodio(
-                    idDirector=episodio.idDirector,
-                    idEpisodio=episodio.idEpisodio,
-                    duracion=episodio.duracion,
-                    numeroEpisodio=episodio.numeroEpisodio,
-                    idContenido=episodio.idContenido,
-                    idTemporada=episodio.idTemporada
-                ) for episodio in episodios
-            ]
-
-            # Añadir los datos de la temporada con sus episodios
-            temporadas_data.append(schemas.TemporadasGet(
-                idTemporada=temporada.idTemporada,
-                numeroTemporada=temporada.numeroTemporada,
-                Episodios=episodios_data
-            ))
-
-        # Añadir los datos de la serie con sus temporadas
-        series_data.append(schemas.SeriesGet(
-            idSerie=serie.id,
-            titulo=serie.titulo,
-            Temporadas=temporadas_data
-        ))
-
-    return series_data  # Devolver todas las series con temporadas y episodios
+    # Tres consultas en total (series, temporadas y episodios), independientemente del número de series
+    series = query_series_con_temporadas_episodios(db).all()
+
+    return [construir_arbol_serie(serie) for serie in series]  # Devolver todas las series con temporadas y episodios
+
+# Obtiene todos los datos de la página de detalle de un contenido con unas pocas consultas:
+# contenido + género + director, temporadas, episodios, directores de los episodios, reparto, subtítulos y doblajes
+def get_contenido_detalle(db: Session, idContenido: str):
+    fila = db.query(models.Contenido, models.Genero.nombre, models.Director.nombre).outerjoin(
+        models.Genero, models.Genero.id == models.Contenido.idGenero
+    ).outerjoin(
+        models.Director, models.Director.id == models.Contenido.idDirector
+    ).options(
+        selectinload(models.Contenido.temporadas).selectinload(models.Temporada.episodios)
+    ).filter(models.Contenido.id == idContenido).first()
+
+    if not fila:
+        return None
+    contenido, nombre_genero, nombre_director = fila
+
+    # Nombres de todos los directores de los episodios en una sola consulta
+    ids_directores = {episodio.idDirector for temporada in contenido.temporadas for episodio in temporada.episodios}
+    directores = {}
+    if ids_directores:
+        directores = dict(db.query(models.Director.id, models.Director.nombre).filter(
+            models.Director.id.in_(ids_directores)
+        ).all())
+
+    detalle = schemas.Contenido.model_validate(contenido).model_dump()
+    detalle.update(
+        genero=nombre_genero,
+        director=nombre_director,
+        Temporadas=[
+            {
+                "idTemporada": temporada.idTemporada,
+                "numeroTemporada": temporada.numeroTemporada,
+                "Episodios": [
+                    dict(schemas.Episodio.model_validate(episodio).model_dump(),
+                         director=directores.get(episodio.idDirector))
+                    for episodio in temporada.episodios
+                ]
+            }
+            for temporada in contenido.temporadas
+        ],
+        reparto=get_reparto(db, idContenido),
+        subtitulos=get_subtitulos(db, contenido.idSubtitulosContenido),
+        doblajes=get_doblajes(db, contenido.idDoblajeContenido)
+    )
+    return detalle
 
 # Función para obtener una temporada por idContenido y idTemporada
 def get_temporada(db: Session, idContenido: str, idTemporada: str):
@@ -427,6 +477,7 @@ def update_temporada(db: Session, idContenido: str, idTemporada: str, temporada:
     ).first()
     if temporada_query:
         temporada_query.numeroTemporada = temporada.numeroTemporada
+        cambios.registrar(db, "Temporada", cambios.ACTUALIZAR, (idContenido, idTemporada), idContenido)
         db.commit()
         db.refresh(temporada_query)
     return temporada_query
@@ -451,6 +502,8 @@ def update_episodio(db: Session,  idContenido: str, idTemporada: str, idEpisodio
         episodio_actual.duracion = episodio_nuevo.duracion
     if episodio_nuevo.idDirector:
         episodio_actual.idDirector = episodio_nuevo.idDirector
+    busqueda.indexar_contenidos(db, [idContenido])
+    cambios.registrar(db, "Episodio", cambios.ACTUALIZAR, (idContenido, idTemporada, idEpisodio), idContenido)
     db.commit()
     db.refresh(episodio_actual)
 
@@ -471,7 +524,10 @@ def create_genero(db: Session, genero: schemas.GeneroCreate):
         descripcion=genero.descripcion
     )
     db.add(db_genero)
+    db.flush()  # Genera el id antes de registrarlo
+    cambios.registrar(db, "Genero", cambios.CREAR, db_genero.id)
     db.commit()
+    referencias.cache.invalidar("Genero")
     db.refresh(db_genero)
     return db_genero
 
@@ -486,7 +542,10 @@ def update_genero(db: Session, genero_id: str, genero: schemas.GeneroUpdate):
     if db_genero:
         db_genero.nombre = nombre
         db_genero.descripcion = descripcion
+        busqueda.indexar_contenidos(db, [contenido.id for contenido in get_contenidos_por_genero(db, genero_id)])
+        cambios.registrar(db, "Genero", cambios.ACTUALIZAR, genero_id)
         db.commit()
+        referencias.cache.invalidar("Genero")
         db.refresh(db_genero)
     return db_genero
 
@@ -495,7 +554,10 @@ def delete_genero(db: Session, genero_id: str) -> bool:
     genero = db.query(models.Genero).filter(models.Genero.id == genero_id).first()
     if genero:
         db.delete(genero)
+        busqueda.indexar_contenidos(db, [contenido.id for contenido in get_contenidos_por_genero(db, genero_id)])
+        cambios.registrar(db, "Genero", cambios.ELIMINAR, genero_id)
         db.commit()
+        referencias.cache.invalidar("Genero")
         return True
 
 #Funcion para obtener el reparto
@@ -519,6 +581,8 @@ def update_reparto(db: Session, idContenido: str, idActor: str):
             idActor = db_actor.id
         )
         db.add(db_reparto)
+        busqueda.indexar_contenidos(db, [db_contenido.id])
+        cambios.registrar(db, "Reparto", cambios.CREAR, (db_contenido.id, db_actor.id), db_contenido.id)
         db.commit()
         db.refresh(db_reparto)
 
@@ -549,6 +613,12 @@ def get_content_by_director(db: Session, idDirector: str):
     contenidos = db.query(models.Contenido).filter(models.Contenido.idDirector == idDirector ).all()
     return contenidos
 
+# Obtiene los ids de los contenidos dirigidos por un director (películas o episodios de series)
+def get_ids_contenido_por_director(db: Session, idDirector: str):
+    ids_peliculas = db.query(models.Contenido.id).filter(models.Contenido.idDirector == idDirector).all()
+    ids_series = db.query(models.Episodio.idContenido).filter(models.Episodio.idDirector == idDirector).distinct().all()
+    return [fila.id for fila in ids_peliculas] + [fila.idContenido for fila in ids_series]
+
 def get_actors_by_content(db: Session, idContenido: str):
     #Obtener los idActores de Reparto en los que existe el idContenido
     idsActor_by_content = db.query(models.Reparto.idActor).filter(models.Reparto.idContenido == idContenido).all()
@@ -571,8 +641,10 @@ def delete_reparto(db: Session, contenido_id: str):
     reparto = db.query(models.Reparto).filter(models.Reparto.idContenido == contenido_id).all()
     if reparto:
         for item in reparto:
+            cambios.registrar(db, "Reparto", cambios.ELIMINAR, (item.idContenido, item.idActor), item.idContenido)
             db.delete(item)
-            db.commit()
+        busqueda.indexar_contenidos(db, [contenido_id])
+        db.commit()
         return True
     return False
 
@@ -580,6 +652,41 @@ def delete_reparto(db: Session, contenido_id: str):
 def get_contenidos_por_genero(db: Session, idGenero: str):
     return db.query(models.Contenido).filter(models.Contenido.idGenero == idGenero).all()
 
+# Función para saber si un género tiene algún contenido (sin cargar los contenidos)
+def existen_contenidos_genero(db: Session, idGenero: str) -> bool:
+    return db.query(models.Contenido.id).filter(models.Contenido.idGenero == idGenero).first() is not None
+
+# Función para obtener todos los géneros con sus N contenidos mejor valorados en una sola consulta
+def get_generos_con_contenidos(db: Session, por_genero: int):
+    # Posición de cada contenido dentro de su género (función de ventana ROW_NUMBER)
+    posicion = func.row_number().over(
+        partition_by=models.Contenido.idGenero,
+        order_by=(models.Contenido.valoracionPromedio.desc(), models.Contenido.titulo)
+    ).label("posicion")
+    ranking = db.query(models.Contenido, posicion).subquery()
+    contenido_ranking = aliased(models.Contenido, ranking)
+
+    # Se unen todos los géneros (también los que no tienen contenidos) con sus primeros N contenidos
+    filas = db.query(models.Genero, contenido_ranking).outerjoin(
+        contenido_ranking,
+        and_(contenido_ranking.idGenero == models.Genero.id, ranking.c.posicion <= por_genero)
+    ).order_by(models.Genero.nombre, models.Genero.id, ranking.c.posicion).all()
+
+    # Agrupar los contenidos por género manteniendo el orden de la consulta
+    generos = {}
+    for genero, contenido in filas:
+        if genero.id not in generos:
+            generos[genero.id] = {
+                "id": genero.id,
+                "nombre": genero.nombre,
+                "descripcion": genero.descripcion,
+                "contenidos": []
+            }
+        if contenido is not None:
+            generos[genero.id]["contenidos"].append(contenido)
+
+    return list(generos.values())
+
 # Función para crear un actor
 def create_actor(db: Session, actor: schemas.ActorCreate):
     db_actor = models.Actor (
@@ -588,6 +695,9 @@ def create_actor(db: Session, actor: schemas.ActorCreate):
         fechaNacimiento=actor.fechaNacimiento
     )
     db.add(db_actor)
+    db.flush()  # Genera el id antes de indexarlo
+    busqueda.indexar_actor(db, db_actor.id)
+    cambios.registrar(db, "Actor", cambios.CREAR, db_actor.id)
     db.commit()
     db.refresh(db_actor)
     
@@ -601,7 +711,10 @@ def create_director(db: Session, director: schemas.DirectorCreate):
         fechaNacimiento=director.fechaNacimiento
     )
     db.add(db_director)
+    db.flush()  # Genera el id antes de registrarlo
+    cambios.registrar(db, "Director", cambios.CREAR, db_director.id)
     db.commit()
+    referencias.cache.invalidar("Director")
     db.refresh(db_director)
     
     return db_director    
@@ -613,6 +726,9 @@ def update_actor(db: Session, idActor: str, actor: schemas.ActorUpdate):
         actor_query.nombre=actor.nombre
         actor_query.nacionalidad=actor.nacionalidad
         actor_query.fechaNacimiento=actor.fechaNacimiento
+        busqueda.indexar_actor(db, idActor)
+        busqueda.indexar_contenidos(db, [contenido.id for contenido in get_content_by_actor(db, idActor)])
+        cambios.registrar(db, "Actor", cambios.ACTUALIZAR, idActor)
         db.commit()
         db.refresh(actor_query)
     return actor_query
@@ -624,7 +740,10 @@ def update_director(db: Session, idDirector: str, director: schemas.DirectorUpda
         director_query.nombre=director.nombre
         director_query.nacionalidad=director.nacionalidad
         director_query.fechaNacimiento=director.fechaNacimiento
+        busqueda.indexar_contenidos(db, get_ids_contenido_por_director(db, idDirector))
+        cambios.registrar(db, "Director", cambios.ACTUALIZAR, idDirector)
         db.commit()
+        referencias.cache.invalidar("Director")
         db.refresh(director_query)
     return director_query
 
@@ -633,6 +752,9 @@ def delete_actor(db: Session, actor_id: str) -> bool:
     actor = db.query(models.Actor).filter(models.Actor.id == actor_id).first()
     if actor:
         db.delete(actor)
+        busqueda.indexar_actor(db, actor_id)
+        busqueda.indexar_contenidos(db, [contenido.id for contenido in get_content_by_actor(db, actor_id)])
+        cambios.registrar(db, "Actor", cambios.ELIMINAR, actor_id)
         db.commit()
         return True
     return False
@@ -642,55 +764,91 @@ def delete_director(db: Session, director_id: str) -> bool:
     director = db.query(models.Director).filter(models.Director.id == director_id).first()
     if director:
         db.delete(director)
+        busqueda.indexar_contenidos(db, get_ids_contenido_por_director(db, director_id))
+        cambios.registrar(db, "Director", cambios.ELIMINAR, director_id)
         db.commit()
+        referencias.cache.invalidar("Director")
         return True
     return False
 
+# Sentencia que suma :suma y :numero a las valoraciones del contenido :idContenido y recalcula
+# la media en la misma sentencia, de modo que las valoraciones concurrentes no se pisan
+def sentencia_sumar_valoraciones():
+    tabla = models.Contenido.__table__
+    suma = tabla.c.sumaValoraciones + bindparam("suma")
+    numero = tabla.c.numeroValoraciones + bindparam("numero")
+    return (
+        update(tabla)
+        .where(tabla.c.id == bindparam("idContenido"))
+        .values(
+            sumaValoraciones=suma,
+            numeroValoraciones=numero,
+            valoracionPromedio=case((numero > 0, suma / numero), else_=tabla.c.valoracionPromedio),
+        )
+    )
+
+# Devuelve los ids (sin duplicados) de la lista que existen y los que no
+def separar_ids_existentes(db: Session, ids_contenido: list[str]):
+    ids = list(dict.fromkeys(ids_contenido))
+    existentes = {
+        fila.id for fila in db.query(models.Contenido.id).filter(models.Contenido.id.in_(ids))
+    } if ids else set()
+    return existentes, [id_contenido for id_contenido in ids if id_contenido not in existentes]
+
 # Función para dar una valoración a un contenido
 def valorar_contenido(db: Session, idContenido: str, valoracion: int):
-    contenido = db.query(models.Contenido).filter(models.Contenido.id == idContenido).first()
-    if not contenido:
-        return None   
-    contenido.valoracionPromedio = (contenido.valoracionPromedio + valoracion)/2
+    resultado = db.execute(sentencia_sumar_valoraciones(), {"idContenido": idContenido, "suma": valoracion, "numero": 1})
+    if resultado.rowcount == 0:
+        db.commit()
+        return None
+    cambios.registrar(db, "Contenido", cambios.ACTUALIZAR, idContenido, idContenido)
     db.commit()
-    db.refresh(contenido)
-    return contenido
-
-def obtener_contenidos_busqueda(db: Session, busqueda: str):
-    # Se obtienen todos los contenidos que contienen la búsqueda en el título
-    contenidos_por_titulo = db.query(models.Contenido).filter(
-        models.Contenido.titulo.ilike(f"%{busqueda}%")
-    ).all()
-
-    # Se buscan los géneros cuyo nombre incluye la búsqueda
-    generos_coincidentes = db.query(models.Genero).filter(
-        models.Genero.nombre.ilike(f"%{busqueda}%")
-    ).all()
-
-    # Crear un mapa completo de idGenero -> nombre (todos los géneros en la base de datos)
-    todos_los_generos = db.query(models.Genero).all()
-    genero_map = {genero.id: genero.nombre for genero in todos_los_generos}
-
-    # Extraer los IDs de los géneros coincidentes con la búsqueda
-    genero_ids = [genero.id for genero in generos_coincidentes]
-
-    # Buscar contenidos por género
-    contenidos_por_genero = db.query(models.Contenido).filter(
-        models.Contenido.idGenero.in_(genero_ids)
-    ).all()
+    return True
 
-    # Se juntan resultados y eliminan los duplicados
-    contenidos_totales = contenidos_por_titulo + contenidos_por_genero
-    contenidos_unicos = {contenido.id: contenido for contenido in contenidos_totales}.values()
+# Función para sumar varios incrementos de valoraciones ({idContenido, suma, numero}) en una sola
+# transacción. Devuelve (actualizados, ids no encontrados)
+def sumar_valoraciones(db: Session, incrementos: list[schemas.ValoracionAgregada]):
+    existentes, no_encontrados = separar_ids_existentes(db, [incremento.idContenido for incremento in incrementos])
+    filas = [
+        {"idContenido": incremento.idContenido, "suma": incremento.suma, "numero": incremento.numero}
+        for incremento in incrementos if incremento.idContenido in existentes
+    ]
+    if filas:
+        db.connection().execute(sentencia_sumar_valoraciones(), filas)
+        cambios.registrar_contenidos(db, cambios.ACTUALIZAR, [fila["idContenido"] for fila in filas])
+    db.commit()
+    return len(filas), no_encontrados
+
+# Función para fijar la suma y el número de valoraciones (y con ellos la media) de varios contenidos
+# en una sola transacción. Devuelve (actualizados, ids no encontrados)
+def actualizar_valoraciones(db: Session, valoraciones: list[schemas.ValoracionAgregada]):
+    existentes, no_encontrados = separar_ids_existentes(db, [valoracion.idContenido for valoracion in valoraciones])
+    filas = []
+    for valoracion in valoraciones:
+        if valoracion.idContenido not in existentes:
+            continue
+        fila = {"id": valoracion.idContenido,
+                "sumaValoraciones": valoracion.suma,
+                "numeroValoraciones": valoracion.numero}
+        # Sin valoraciones se mantiene la media que tuviera el contenido
+        if valoracion.numero > 0:
+            fila["valoracionPromedio"] = valoracion.suma / valoracion.numero
+        filas.append(fila)
+    if filas:
+        db.bulk_update_mappings(models.Contenido, filas)
+        cambios.registrar_contenidos(db, cambios.ACTUALIZAR, [fila["id"] for fila in filas])
+    db.commit()
+    return len(filas), no_encontrados
 
-    # Formatear la respuesta incluyendo el nombre del género
+def obtener_contenidos_busqueda(db: Session, busqueda_texto: str):
+    # Búsqueda en el índice FTS5 por título, descripción, género, reparto y directores, ordenada por relevancia (bm25)
     resultados = [
         {
-            "id": contenido.id,
-            "titulo": contenido.titulo,
-            "genero": genero_map.get(contenido.idGenero, "Género desconocido")  # Siempre usa el mapa completo
+            "id": fila.idContenido,
+            "titulo": fila.titulo,
+            "genero": fila.genero or "Género desconocido"
         }
-        for contenido in contenidos_unicos
+        for fila in busqueda.buscar_contenidos(db, busqueda_texto)
     ]
 
     if not resultados:
@@ -699,17 +857,15 @@ def obtener_contenidos_busqueda(db: Session, busqueda: str):
     return resultados
 
 
-def obtener_actores_busqueda(db: Session, busqueda: str):
-    actores = db.query(models.Actor).filter(models.Actor.nombre.ilike(f"%{busqueda}%"))
-
-    
+def obtener_actores_busqueda(db: Session, busqueda_texto: str):
+    # Búsqueda en el índice FTS5 por nombre del actor, ordenada por relevancia (bm25)
     actores_coincidentes = [
         {
-            "id": actor.id,
-            "nombre": actor.nombre,
-            "nacionalidad": actor.nacionalidad
+            "id": fila.idActor,
+            "nombre": fila.nombre,
+            "nacionalidad": fila.nacionalidad
         }
-        for actor in actores
+        for fila in busqueda.buscar_actores(db, busqueda_texto)
     ]
 
     if not actores_coincidentes:
@@ -730,6 +886,9 @@ def eliminar_actor(db: Session, idActor: str) -> bool:
         return False
 
     db.delete(actor)
+    busqueda.indexar_actor(db, idActor)
+    busqueda.indexar_contenidos(db, [contenido.id for contenido in get_content_by_actor(db, idActor)])
+    cambios.registrar(db, "Actor", cambios.ELIMINAR, idActor)
     db.commit()  # Confirmar los cambios en la base de datos
     return True
 
@@ -740,6 +899,9 @@ def eliminar_director(db: Session, idDirector: str) -> bool:
         return False
 
     db.delete(director)
+    busqueda.indexar_contenidos(db, get_ids_contenido_por_director(db, idDirector))
+    cambios.registrar(db, "Director", cambios.ELIMINAR, idDirector)
     db.commit()  # Confirmar los cambios en la base de datos
+    referencias.cache.invalidar("Director")
     return True
 
@@ -0,0 +1,53 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from typing import Optional
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Funciones CRUD de lectura de crud.py con sesión asíncrona (AsyncSession), para DB_MODO=async.
+Devuelven lo mismo que sus equivalentes síncronas.
+"""
+
+# Obtiene datos específicos de una Pelicula por id
+async def get_pelicula_by_id(db: AsyncSession, id_contenido: str):
+    return await db.scalar(select(models.Contenido).where(
+        models.Contenido.id == id_contenido,
+        models.Contenido.tipoContenido == "Pelicula").limit(1))
+
+async def get_contenido_by_id(db: AsyncSession, id_contenido: str):
+    return await db.scalar(select(models.Contenido).where(models.Contenido.id == id_contenido).limit(1))
+
+# Consulta de todos los contenidos (Peliculas o Series) con paginación por clave (keyset).
+# Devuelve un resultado asíncrono que se recorre con "async for" leyendo las filas por lotes
+async def get_all_contenidos(db: AsyncSession, after: Optional[str] = None, limit: Optional[int] = None):
+    query = select(models.Contenido).where(
+        models.Contenido.tipoContenido.in_(("Pelicula", "Serie"))
+    ).order_by(models.Contenido.id)
+
+    # Continuar a partir del último id devuelto en la página anterior
+    if after is not None:
+        query = query.where(models.Contenido.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return await db.stream_scalars(query.execution_options(yield_per=500))
+
+# Obtiene varios contenidos con una única consulta IN (...), respetando el orden de entrada
+async def get_contenidos_by_ids(db: AsyncSession, ids_contenido: list[str]):
+    # Eliminar duplicados manteniendo el orden en el que se pidieron
+    ids_unicos = list(dict.fromkeys(ids_contenido))
+    if not ids_unicos:
+        return [], []
+
+    contenidos = (await db.scalars(select(models.Contenido).where(models.Contenido.id.in_(ids_unicos)))).all()
+    contenidos_por_id = {contenido.id: contenido for contenido in contenidos}
+
+    encontrados = [contenidos_por_id[id_contenido] for id_contenido in ids_unicos if id_contenido in contenidos_por_id]
+    no_encontrados = [id_contenido for id_contenido in ids_unicos if id_contenido not in contenidos_por_id]
+    return encontrados, no_encontrados
+
+# Función para obtener los contenidos de un género específico
+async def get_contenidos_por_genero(db: AsyncSession, idGenero: str):
+    return (await db.scalars(select(models.Contenido).where(models.Contenido.idGenero == idGenero))).all()
@@ -0,0 +1,75 @@
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+from . import crud, cambios
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Peticiones condicionales (ETag / If-None-Match) para los endpoints de lectura.
+
+El ETag de una respuesta se forma con la versión de los datos que contiene (el último seq del
+registro de cambios, ver cambios.py). Si el cliente envía en If-None-Match el ETag que ya tiene
+y los datos no han cambiado, se responde 304 sin cuerpo y no se consultan ni serializan los datos.
+
+Los ETags de los endpoints que también están en rutas_async.py (DB_MODO=async) se calculan con las
+funciones etag_* de este módulo, que reciben una Session (en rutas_async.py se llaman con
+AsyncSession.run_sync), para que los dos modos usen el mismo código.
+
+"""
+
+
+def crear_etag(nombre: str, *versiones: int) -> str:
+    return '"' + "-".join([nombre, *(str(version) for version in versiones)]) + '"'
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Se comparan sin el prefijo de ETag débil (W/)
+    return any(valor.strip().removeprefix("W/") == etag for valor in if_none_match.split(","))
+
+
+# Devuelve la respuesta 304 si el cliente ya tiene la versión actual. Si no, añade el ETag a la
+# respuesta del endpoint y devuelve None (el endpoint genera la respuesta como siempre)
+def no_modificado(request: Request, response: Response, etag: str) -> Optional[Response]:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _coincide(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+# Respuesta con un JSON ya serializado y su ETag (o 304 si el cliente ya tiene esa versión)
+def respuesta_json(request: Request, etag: str, contenido: bytes) -> Response:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _coincide(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=contenido, media_type="application/json", headers={"ETag": etag})
+
+
+# ETag de un contenido, o None si no existe. El id forma parte del ETag para que el de un
+# contenido no sirva para otro
+def etag_contenido(db: Session, idContenido: str) -> Optional[str]:
+    if not crud.existe_contenido(db=db, id_contenido=idContenido):
+        return None
+    return crear_etag(f"contenido-{idContenido}", cambios.get_version_contenido(db, idContenido))
+
+
+# ETag del detalle de un contenido, que incluye los nombres de géneros, directores, actores e
+# idiomas, o None si el contenido no existe
+def etag_detalle(db: Session, idContenido: str) -> Optional[str]:
+    if not crud.existe_contenido(db=db, id_contenido=idContenido):
+        return None
+    return crear_etag(
+        f"detalle-{idContenido}",
+        cambios.get_version_contenido(db, idContenido),
+        cambios.get_version_entidades(db, "Genero", "Director", "Actor", "Subtitulo", "Doblaje"),
+    )
+
+
+# ETag de los contenidos de un género, o None si el género no tiene contenidos
+def etag_contenidos_genero(db: Session, idGenero: str) -> Optional[str]:
+    if not crud.existen_contenidos_genero(db=db, idGenero=idGenero):
+        return None
+    return crear_etag(f"genero-contenidos-{idGenero}", cambios.get_version_entidades(db, "Contenido"))
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from . import models, schemas, crud
-from .database import engine, get_db, initialize_database
+from typing import Optional
+from . import models, schemas, crud, cambios, etags, referencias
+from .database import DB_MODO, SessionLocal, engine, get_db, initialize_database
 
 """
 Autor: Grupo GA01 - ASEE
@@ -111,13 +113,23 @@ def delete_doblajes(idDoblajeContenido: str, idDoblaje: str, db: Session = Depen
 
 # Endpoint para obtener todos los subtitulos
 @app.get("/contenidos/subtitulos")
-def get_all_subtitulos(db: Session = Depends(get_db)):
-    return crud.get_all_subtitulos(db=db)
+def get_all_subtitulos(request: Request, db: Session = Depends(get_db)):
+    etag, contenido = referencias.cache.obtener(
+        ("Subtitulo", None),
+        lambda: etags.crear_etag("subtitulos", cambios.get_version_entidades(db, "Subtitulo")),
+        lambda: referencias.a_json(list[schemas.Subtitulo], crud.get_all_subtitulos(db=db)),
+    )
+    return etags.respuesta_json(request, etag, contenido)
 
 # Endpoint para obtener todos los doblajes
 @app.get("/contenidos/doblajes")
-def get_all_doblajes(db: Session = Depends(get_db)):
-    return crud.get_all_doblajes(db=db)
+def get_all_doblajes(request: Request, db: Session = Depends(get_db)):
+    etag, contenido = referencias.cache.obtener(
+        ("Doblaje", None),
+        lambda: etags.crear_etag("doblajes", cambios.get_version_entidades(db, "Doblaje")),
+        lambda: referencias.a_json(list[schemas.Doblaje], crud.get_all_doblajes(db=db)),
+    )
+    return etags.respuesta_json(request, etag, contenido)
 
 # Nuevo endpoint para eliminar contenido en distintos niveles
 @app.delete("/contenidos/{idContenido}/temporadas/{idTemporada}/episodios/{idEpisodio}", tags=["Eliminar contenido"])
@@ -159,10 +171,24 @@ def get_peliculas(idContenido: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Pelicula no encontrada")    
     return contenido
 
+# Devuelve los contenidos como un array JSON que se va enviando según se leen de la base de datos.
+# Paginación opcional: ?after=<último id recibido>&limit=<tamaño de página>
 @app.get("/contenidos", response_model=list[schemas.Contenido])
-def obtener_todos_los_contenidos(db: Session = Depends(get_db)):
-    contenidos = crud.get_all_contenidos(db)
-    return contenidos
+def obtener_todos_los_contenidos(after: Optional[str] = None, limit: Optional[int] = Query(default=None, ge=1)):
+    def generar_json():
+        # La sesión se abre dentro del generador porque la respuesta se sigue enviando tras salir del endpoint
+        db = SessionLocal()
+        try:
+            yield "["
+            for posicion, contenido in enumerate(crud.get_all_contenidos(db, after=after, limit=limit)):
+                if posicion:
+                    yield ","
+                yield schemas.Contenido.model_validate(contenido).model_dump_json()
+            yield "]"
+        finally:
+            db.close()
+
+    return StreamingResponse(generar_json(), media_type="application/json")
 
 @app.get("/todoseries", response_model=list[schemas.Contenido])
 def get_todoseries(db: Session = Depends(get_db)):
@@ -180,14 +206,53 @@ def get_temporadas(idSerie: str, db: Session = Depends(get_db)):
     return temporadas
 
 
+# Endpoints para obtener varios contenidos en una sola llamada (GET ?ids=a&ids=b o POST {"ids": [...]})
+@app.get("/contenidos/batch", response_model=schemas.ContenidosBatch)
+def get_contenidos_batch(ids: list[str] = Query(default=[]), db: Session = Depends(get_db)):
+    contenidos, no_encontrados = crud.get_contenidos_by_ids(db=db, ids_contenido=ids)
+    return schemas.ContenidosBatch(contenidos=contenidos, noEncontrados=no_encontrados)
+
+@app.post("/contenidos/batch", response_model=schemas.ContenidosBatch)
+def post_contenidos_batch(peticion: schemas.ContenidosBatchRequest, db: Session = Depends(get_db)):
+    contenidos, no_encontrados = crud.get_contenidos_by_ids(db=db, ids_contenido=peticion.ids)
+    return schemas.ContenidosBatch(contenidos=contenidos, noEncontrados=no_encontrados)
+
+# Endpoint para actualizar la valoración media de varios contenidos a la vez (lo usa el
+# microservicio de Interacciones, que lleva la suma y el número de valoraciones de cada contenido)
+@app.put("/contenidos/valoraciones", response_model=schemas.ValoracionesLote)
+def actualizar_valoraciones_contenidos(peticion: schemas.ValoracionesLoteRequest, db: Session = Depends(get_db)):
+    actualizados, no_encontrados = crud.actualizar_valoraciones(db=db, valoraciones=peticion.valoraciones)
+    return schemas.ValoracionesLote(actualizados=actualizados, noEncontrados=no_encontrados)
+
+# Endpoint para sumar varias valoraciones (suma y número de cada contenido) en una sola transacción
+@app.post("/contenidos/valoraciones/incrementos", response_model=schemas.ValoracionesLote)
+def sumar_valoraciones_contenidos(peticion: schemas.IncrementosValoracionRequest, db: Session = Depends(get_db)):
+    actualizados, no_encontrados = crud.sumar_valoraciones(db=db, incrementos=peticion.incrementos)
+    return schemas.ValoracionesLote(actualizados=actualizados, noEncontrados=no_encontrados)
+
 @app.get("/contenidos/{idContenido}", response_model=schemas.Contenido)
-def get_contenido(idContenido: str, db: Session = Depends(get_db)):
+def get_contenido(idContenido: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    # Si no se encuentra el contenido, se lanza una excepción 404 (antes de responder 304)
+    etag = etags.etag_contenido(db, idContenido)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Contenido no encontrado")
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
     # Llamada al CRUD para obtener el contenido por id
-    contenido = crud.get_contenido_by_id(db=db, id_contenido=idContenido)    
-    # Si no se encuentra el contenido, se lanza una excepción 404
-    if not contenido:
-        raise HTTPException(status_code=404, detail="Contenido no encontrado")    
-    return contenido
+    return crud.get_contenido_by_id(db=db, id_contenido=idContenido)
+
+# Endpoint con todos los datos de la página de detalle de un contenido (nombres de género y directores,
+# temporadas y episodios, reparto, subtítulos y doblajes)
+@app.get("/contenidos/{idContenido}/detalle", response_model=schemas.ContenidoDetalle)
+def get_contenido_detalle(idContenido: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = etags.etag_detalle(db, idContenido)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Contenido no encontrado")
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
+    return crud.get_contenido_detalle(db=db, idContenido=idContenido)
 
 @app.get("/series/{idSerie}", response_model=schemas.SeriesGet)
 def get_series(idSerie: str, db: Session = Depends(get_db)):
@@ -233,15 +298,37 @@ def update_episodio(idContenido: str, idTemporada: str, idEpisodio: str, episodi
         raise HTTPException(status_code=404, detail="Episodio no actualizado")
     return {"message": "Episodio actualizado exitosamente"}
 
+# Endpoint con todos los géneros y sus N contenidos mejor valorados (catálogo de la pantalla principal)
+@app.get("/generos/contenidos", response_model=list[schemas.GeneroConContenidos])
+def get_generos_con_contenidos(request: Request, response: Response, per_genre: int = Query(default=20, ge=1), db: Session = Depends(get_db)):
+    no_modificado = etags.no_modificado(request, response, etags.crear_etag("generos-contenidos", cambios.get_version_entidades(db, "Genero", "Contenido")))
+    if no_modificado:
+        return no_modificado
+    return crud.get_generos_con_contenidos(db=db, por_genero=per_genre)
+
 @app.get("/generos/{idGenero}", response_model=schemas.Genero)
-def get_genero(idGenero: str, db: Session = Depends(get_db)):
-    genero = crud.get_genero(db=db, genero_id=idGenero)
-    return genero
+def get_genero(idGenero: str, request: Request, db: Session = Depends(get_db)):
+    def calcular_json():
+        genero = crud.get_genero(db=db, genero_id=idGenero)
+        return referencias.a_json(schemas.Genero, genero) if genero else None
+
+    etag, contenido = referencias.cache.obtener(
+        ("Genero", idGenero),
+        lambda: etags.crear_etag(f"genero-{idGenero}", cambios.get_version_entidades(db, "Genero")),
+        calcular_json,
+    )
+    if contenido is None:
+        raise HTTPException(status_code=404, detail="Género no encontrado")
+    return etags.respuesta_json(request, etag, contenido)
 
 @app.get("/generos", response_model=list[schemas.Genero])
-def get_generos(db: Session = Depends(get_db)):
-    generos = crud.get_generos(db=db)
-    return generos
+def get_generos(request: Request, db: Session = Depends(get_db)):
+    etag, contenido = referencias.cache.obtener(
+        ("Genero", None),
+        lambda: etags.crear_etag("generos", cambios.get_version_entidades(db, "Genero")),
+        lambda: referencias.a_json(list[schemas.Genero], crud.get_generos(db=db)),
+    )
+    return etags.respuesta_json(request, etag, contenido)
 
 @app.post("/generos", response_model=schemas.Genero)
 def create_genero(genero: schemas.GeneroCreate, db: Session = Depends(get_db)):
@@ -262,11 +349,15 @@ def delete_genero(idGenero: str, db: Session = Depends(get_db)):
     return {"message": "Género eliminado exitosamente"}    
 
 @app.get("/generos/{idGenero}/contenidos", response_model=list[schemas.Contenido])
-def get_contenidos_genero(idGenero: str, db: Session = Depends(get_db)):
-    contenidos = crud.get_contenidos_por_genero(db=db, idGenero=idGenero)
-    if not contenidos:
+def get_contenidos_genero(idGenero: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    # Se comprueba antes del 304 para no responder 304 a un género sin contenidos
+    etag = etags.etag_contenidos_genero(db, idGenero)
+    if etag is None:
         raise HTTPException(status_code=404, detail="No existe ningún contenido con ese genero")
-    return contenidos 
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
+    return crud.get_contenidos_por_genero(db=db, idGenero=idGenero)
 
 # Endpoint para asignar una nueva valoración a un contenido y recalcular el promedio
 @app.put("/contenidos/{idContenido}/valoracion")
@@ -279,7 +370,7 @@ def actualizar_valoracion_contenido(idContenido: str, valoracion: int, db: Sessi
 #Endpoint para buscar contenidos por: titulo, genero 
 @app.get("/contenidos/{busqueda}/buscar")
 def buscar_contenidos(busqueda: str, db: Session = Depends(get_db)):
-    contenidos = crud.obtener_contenidos_busqueda(db=db, busqueda=busqueda)
+    contenidos = crud.obtener_contenidos_busqueda(db=db, busqueda_texto=busqueda)
     if not contenidos:
         raise HTTPException(status_code=404, detail="No existen resultados para esa búsqueda")
     
@@ -288,7 +379,7 @@ def buscar_contenidos(busqueda: str, db: Session = Depends(get_db)):
 #Endpoint para buscar actores por: nombre
 @app.get("/contenidos/{busqueda}/actores")
 def buscar_actores(busqueda: str, db: Session = Depends(get_db)):
-    actores = crud.obtener_actores_busqueda(db=db, busqueda=busqueda)
+    actores = crud.obtener_actores_busqueda(db=db, busqueda_texto=busqueda)
     if not actores:
         raise HTTPException(status_code=404, detail="No existen actores para esa búsqueda")
     return {"resultados": actores}
@@ -313,18 +404,29 @@ def update_reparto(idContenido: str, idActor: str, db: Session = Depends(get_db)
 
 #Funciones para obtener la información de un actor/director por su ID
 @app.get("/actores/{idActor}", response_model=schemas.Actor)
-def get_actor(idActor: str, db: Session = Depends(get_db)):
+def get_actor(idActor: str, request: Request, response: Response, db: Session = Depends(get_db)):
     actor = crud.get_actor(db=db, idActor=idActor)
     if actor is None:
         raise HTTPException(status_code=404, detail="Actor no encontrado")
+    no_modificado = etags.no_modificado(request, response, etags.crear_etag(f"actor-{idActor}", cambios.get_version_entidades(db, "Actor")))
+    if no_modificado:
+        return no_modificado
     return actor
 
 @app.get("/directores/{idDirector}", response_model=schemas.Director)
-def get_director(idDirector: str, db: Session = Depends(get_db)):
-    director = crud.get_director(db=db, idDirector=idDirector)
-    if director is None:
+def get_director(idDirector: str, request: Request, db: Session = Depends(get_db)):
+    def calcular_json():
+        director = crud.get_director(db=db, idDirector=idDirector)
+        return referencias.a_json(schemas.Director, director) if director else None
+
+    etag, contenido = referencias.cache.obtener(
+        ("Director", idDirector),
+        lambda: etags.crear_etag(f"director-{idDirector}", cambios.get_version_entidades(db, "Director")),
+        calcular_json,
+    )
+    if contenido is None:
         raise HTTPException(status_code=404, detail="Director no encontrado")
-    return director
+    return etags.respuesta_json(request, etag, contenido)
 
 #Funciones para obtener los contenidos relacionados con un actor/director por su ID
 @app.get("/actores/{idActor}/contenidos")
@@ -394,11 +496,17 @@ def delete_director(idDirector: str, db: Session = Depends(get_db)):
 
 #Funciones para obtener todos los actores o directores de la base de datos
 @app.get("/actores", response_model=list[schemas.Actor])
-def get_actores(db: Session = Depends(get_db)):
+def get_actores(request: Request, response: Response, db: Session = Depends(get_db)):
+    no_modificado = etags.no_modificado(request, response, etags.crear_etag("actores", cambios.get_version_entidades(db, "Actor")))
+    if no_modificado:
+        return no_modificado
     return crud.get_actores(db=db)
 
 @app.get("/directores", response_model=list[schemas.Director])
-def get_actores(db: Session = Depends(get_db)):
+def get_directores(request: Request, response: Response, db: Session = Depends(get_db)):
+    no_modificado = etags.no_modificado(request, response, etags.crear_etag("directores", cambios.get_version_entidades(db, "Director")))
+    if no_modificado:
+        return no_modificado
     return crud.get_directores(db=db)
 
 #Funciones para eliminar un actor o director de la base de datos
@@ -426,4 +534,19 @@ def borrar_actor(idDirector: str, db: Session = Depends(get_db)):
     if not eliminado: 
         return {"message": "El director no existe o no se pudo eliminar"}
 
-    return {"message": "Director eliminado correctamente"}
\ No newline at end of file
+    return {"message": "Director eliminado correctamente"}
+
+# Endpoint con los cambios del catálogo posteriores a la secuencia "desde", en orden.
+# Quien lo consulta guarda el último seq recibido y lo pasa en la siguiente llamada;
+# con desde=0 y limit=0 solo se obtiene el último seq (para empezar a seguir los cambios).
+@app.get("/cambios", response_model=schemas.CambiosResponse)
+def get_cambios(desde: int = Query(default=0, ge=0), limit: int = Query(default=1000, ge=0, le=10000),
+                db: Session = Depends(get_db)):
+    ultimo_seq = cambios.get_ultimo_seq(db)
+    lista = cambios.get_cambios(db, desde=desde, limit=limit) if limit else []
+    return schemas.CambiosResponse(cambios=lista, ultimoSeq=ultimo_seq)
+
+# Con DB_MODO=async, los endpoints async def de rutas_async.py (con AsyncSession) sustituyen a los anteriores
+if DB_MODO == "async":
+    from . import rutas_async
+    rutas_async.registrar(app)
@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+from sqlalchemy import inspect, text
+from . import models, busqueda
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Migraciones del esquema de la base de datos contenidos.db.
+
+initialize_database() solo crea las tablas cuando la base de datos no existe, así que los cambios
+del esquema (columnas, tablas e índices nuevos) se aplican a las bases de datos existentes con las
+migraciones de MIGRACIONES. Las versiones aplicadas se guardan en la tabla migracion_esquema y cada
+migración se aplica una sola vez, en orden. Además, cada migración comprueba lo que ya existe
+(por ejemplo, en una base de datos recién creada con create_all), así que repetirla no cambia nada.
+
+Para añadir un cambio del esquema: modificar models.py y añadir al final de MIGRACIONES una
+función con la versión siguiente que haga el mismo cambio en una base de datos existente.
+
+"""
+
+SQL_CREAR_TABLA_MIGRACIONES = """
+CREATE TABLE IF NOT EXISTS migracion_esquema (
+    version INTEGER NOT NULL PRIMARY KEY,
+    descripcion VARCHAR NOT NULL,
+    fecha DATETIME NOT NULL
+)
+"""
+
+
+def _columnas(conexion, tabla: str) -> set:
+    return {columna["name"] for columna in inspect(conexion).get_columns(tabla)}
+
+
+# Versión 1: suma y número de valoraciones de cada contenido
+def _columnas_valoraciones(conexion):
+    columnas = _columnas(conexion, "Contenido")
+    if "sumaValoraciones" not in columnas:
+        conexion.execute(text('ALTER TABLE "Contenido" ADD COLUMN "sumaValoraciones" FLOAT NOT NULL DEFAULT 0'))
+    if "numeroValoraciones" not in columnas:
+        conexion.execute(text('ALTER TABLE "Contenido" ADD COLUMN "numeroValoraciones" INTEGER NOT NULL DEFAULT 0'))
+
+
+# Versión 2: registro de cambios del catálogo (GET /cambios) y sus índices
+def _registro_cambios(conexion):
+    models.Cambio.__table__.create(bind=conexion, checkfirst=True)
+    conexion.execute(text('CREATE INDEX IF NOT EXISTS ix_cambio_entidad_seq ON "Cambio" (entidad, seq)'))
+    conexion.execute(text('CREATE INDEX IF NOT EXISTS ix_cambio_contenido_seq ON "Cambio" ("idContenido", seq)'))
+
+
+# Versión 3: índices de las columnas por las que filtran las consultas más frecuentes.
+# Temporada.idContenido no necesita uno propio: es la primera columna de la clave primaria
+def _indices_consultas(conexion):
+    for sql in (
+        # Contenidos de un género y los mejores de cada género (ROW_NUMBER por género y valoración)
+        'CREATE INDEX IF NOT EXISTS ix_contenido_genero_valoracion ON "Contenido" ("idGenero", "valoracionPromedio")',
+        'CREATE INDEX IF NOT EXISTS ix_contenido_tipo ON "Contenido" ("tipoContenido")',
+        'CREATE INDEX IF NOT EXISTS ix_contenido_director ON "Contenido" ("idDirector")',
+        # Índices declarados en models.py que faltaban en las bases de datos existentes
+        'CREATE INDEX IF NOT EXISTS "ix_Contenido_idSubtitulosContenido" ON "Contenido" ("idSubtitulosContenido")',
+        'CREATE INDEX IF NOT EXISTS "ix_Contenido_idDoblajeContenido" ON "Contenido" ("idDoblajeContenido")',
+        # Episodios de una temporada (relación Temporada.episodios) y de un director
+        'CREATE INDEX IF NOT EXISTS ix_episodio_temporada ON "Episodio" ("idTemporada")',
+        'CREATE INDEX IF NOT EXISTS ix_episodio_director ON "Episodio" ("idDirector")',
+    ):
+        conexion.execute(text(sql))
+    conexion.execute(text("ANALYZE"))  # Estadísticas para que el planificador elija los índices
+
+
+# Versión 4: índice de búsqueda de texto completo (FTS5) de contenidos y actores, rellenado con
+# los datos existentes si no existía
+def _indice_busqueda(conexion):
+    busqueda.crear_indice(conexion)
+
+
+# (versión, descripción, función que recibe la conexión)
+MIGRACIONES = [
+    (1, "Suma y número de valoraciones en Contenido", _columnas_valoraciones),
+    (2, "Registro de cambios del catálogo", _registro_cambios),
+    (3, "Índices de géneros, tipos, directores y episodios", _indices_consultas),
+    (4, "Índice de búsqueda de texto completo", _indice_busqueda),
+]
+
+
+def get_versiones_aplicadas(engine) -> set:
+    with engine.begin() as conexion:
+        conexion.execute(text(SQL_CREAR_TABLA_MIGRACIONES))
+        return {fila[0] for fila in conexion.execute(text("SELECT version FROM migracion_esquema"))}
+
+
+def aplicar_migraciones(engine) -> list[int]:
+    """
+    Aplica, en orden, las migraciones que todavía no se han aplicado a la base de datos.
+    Cada una se aplica en su propia transacción junto con su registro en migracion_esquema.
+    Devuelve las versiones aplicadas.
+    """
+    aplicadas = get_versiones_aplicadas(engine)
+    nuevas = []
+    for version, descripcion, migrar in MIGRACIONES:
+        if version in aplicadas:
+            continue
+        with engine.begin() as conexion:
+            migrar(conexion)
+            conexion.execute(
+                text("INSERT INTO migracion_esquema (version, descripcion, fecha) VALUES (:version, :descripcion, :fecha)"),
+                {"version": version, "descripcion": descripcion,
+                 "fecha": datetime.now(timezone.utc).replace(tzinfo=None)},
+            )
+        print(f"Migración {version} aplicada: {descripcion}")
+        nuevas.append(version)
+    return nuevas
+
+
+if __name__ == "__main__":
+    from .database import engine
+    versiones = aplicar_migraciones(engine)
+    print(f"Migraciones aplicadas: {versiones or 'ninguna'}")
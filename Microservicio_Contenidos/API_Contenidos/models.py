@@ -1,5 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Float, Integer, PrimaryKeyConstraint, ForeignKeyConstraint
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, DateTime, Index, PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy.orm import relationship
 from .database import Base
 
 """
@@ -21,6 +23,10 @@ class Contenido(Base):
     fechaLanzamiento = Column(String)  # Formato: YYYY-MM-DD
     idGenero = Column(String, ForeignKey("Genero.id"))
     valoracionPromedio = Column(Float)  # Escala de 0 a 10
+    # Suma y número de valoraciones recibidas; valoracionPromedio se calcula a partir de ellas
+    # (mientras no haya valoraciones, se mantiene la valoración con la que se creó el contenido)
+    sumaValoraciones = Column(Float, nullable=False, default=0, server_default="0")
+    numeroValoraciones = Column(Integer, nullable=False, default=0, server_default="0")
     idSubtitulosContenido = Column(String, default=lambda: str(uuid.uuid4()), index=True)
     idDoblajeContenido = Column(String, default=lambda: str(uuid.uuid4()), index=True)
 
@@ -28,6 +34,18 @@ class Contenido(Base):
     duracion = Column(Integer, nullable=True)  # En minutos
     idDirector = Column(String, ForeignKey("Director.id"), nullable=True) 
 
+    # Relaciones de solo lectura (viewonly) para cargar el árbol serie -> temporadas -> episodios.
+    # No modifican el comportamiento de los borrados existentes.
+    temporadas = relationship("Temporada", back_populates="contenido", viewonly=True,
+                              order_by="Temporada.numeroTemporada")
+
+    __table_args__ = (
+        # Contenidos de un género y los mejores de cada género (ROW_NUMBER por género y valoración)
+        Index("ix_contenido_genero_valoracion", "idGenero", "valoracionPromedio"),
+        Index("ix_contenido_tipo", "tipoContenido"),
+        Index("ix_contenido_director", "idDirector"),
+    )
+
 class Temporada(Base):
     __tablename__ = "Temporada"
 
@@ -35,6 +53,10 @@ class Temporada(Base):
     idTemporada = Column(String, default=lambda: str(uuid.uuid4()), index=True)
     numeroTemporada = Column(Integer)
 
+    contenido = relationship("Contenido", back_populates="temporadas", viewonly=True)
+    episodios = relationship("Episodio", back_populates="temporada", viewonly=True,
+                             order_by="Episodio.numeroEpisodio")
+
     __table_args__ = (
         PrimaryKeyConstraint('idContenido', 'idTemporada'),
     )
@@ -49,8 +71,12 @@ class Episodio(Base):
     numeroEpisodio = Column(Integer)
     duracion = Column(Integer)  # En minutos
 
+    temporada = relationship("Temporada", back_populates="episodios", viewonly=True)
+
     __table_args__ = (
         PrimaryKeyConstraint('idContenido', 'idTemporada', 'idEpisodio'),
+        Index("ix_episodio_temporada", "idTemporada"),
+        Index("ix_episodio_director", "idDirector"),
     )
 
 class Trailer(Base):
@@ -126,4 +152,23 @@ class Doblaje(Base):
     __tablename__ = "Doblaje"
 
     idDoblaje = Column(String, primary_key=True)
-    idioma = Column(String)
\ No newline at end of file
+    idioma = Column(String)
+
+# Registro de cambios (solo se añaden filas): cada escritura de crud.py guarda aquí, en la misma
+# transacción, qué entidad ha cambiado. seq es creciente y no se reutiliza (AUTOINCREMENT)
+class Cambio(Base):
+    __tablename__ = "Cambio"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entidad = Column(String, nullable=False)  # Contenido, Temporada, Episodio, Genero, Reparto, Actor...
+    operacion = Column(String, nullable=False)  # crear, actualizar o eliminar
+    idEntidad = Column(String, nullable=False)  # Las claves compuestas se separan con "/"
+    idContenido = Column(String, nullable=True)  # Contenido afectado, si lo hay
+    fecha = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    __table_args__ = (
+        # Último cambio de una entidad o de un contenido (versiones para los ETag)
+        Index("ix_cambio_entidad_seq", "entidad", "seq"),
+        Index("ix_cambio_contenido_seq", "idContenido", "seq"),
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,100 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pydantic import TypeAdapter
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Caché en memoria de los datos de referencia (géneros, subtítulos, doblajes y directores).
+
+Estas tablas tienen pocas filas y se leen en casi todas las páginas. La primera lectura guarda la
+respuesta ya convertida a JSON (bytes) junto con su ETag, de modo que las siguientes no consultan
+la base de datos ni pasan por el ORM ni por Pydantic. Las funciones de escritura de crud.py
+invalidan el grupo de la entidad que modifican después de confirmar la transacción.
+
+"""
+
+MAX_ELEMENTOS = int(os.getenv("CACHE_REFERENCIAS_MAX_ELEMENTOS", "1000"))
+
+
+class CacheReferencias:
+    """
+    Respuestas JSON por clave (grupo, identificador), donde el grupo es la entidad
+    (Genero, Subtitulo, Doblaje, Director). Cuando se llena, se descartan las usadas hace más tiempo.
+    Cada grupo tiene una generación que aumenta al invalidarlo: un valor calculado antes de una
+    invalidación no se guarda, aunque termine de calcularse después.
+    """
+
+    def __init__(self, max_elementos: int = MAX_ELEMENTOS):
+        self.max_elementos = max_elementos
+        self._datos = OrderedDict()  # (grupo, identificador) -> (etag, contenido JSON)
+        self._generaciones = {}  # grupo -> número de invalidaciones
+        self._lock = threading.Lock()
+
+    def get(self, clave: tuple):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+            return entrada
+
+    def generacion(self, grupo: str) -> int:
+        with self._lock:
+            return self._generaciones.get(grupo, 0)
+
+    # Guarda la respuesta si el grupo no se ha invalidado desde la generación indicada
+    def guardar(self, clave: tuple, etag: str, contenido: bytes, generacion: int):
+        with self._lock:
+            if self._generaciones.get(clave[0], 0) != generacion:
+                return
+            self._datos[clave] = (etag, contenido)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_elementos:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, grupo: str):
+        with self._lock:
+            self._generaciones[grupo] = self._generaciones.get(grupo, 0) + 1
+            for clave in [clave for clave in self._datos if clave[0] == grupo]:
+                del self._datos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            for grupo in {clave[0] for clave in self._datos}:
+                self._generaciones[grupo] = self._generaciones.get(grupo, 0) + 1
+            self._datos.clear()
+
+    def obtener(self, clave: tuple, calcular_etag, calcular_json):
+        """
+        Devuelve (etag, contenido JSON) de la clave, calculándolos si no están guardados.
+        calcular_json devuelve los bytes de la respuesta, o None si no hay nada que guardar
+        (por ejemplo, un id que no existe); en ese caso devuelve (etag, None).
+        """
+        entrada = self.get(clave)
+        if entrada is not None:
+            return entrada
+        generacion = self.generacion(clave[0])
+        # El ETag se calcula antes que los datos: si cambian entre medias, el ETag guardado
+        # es el anterior y el cliente volverá a pedir los datos en la siguiente petición
+        etag = calcular_etag()
+        contenido = calcular_json()
+        if contenido is not None:
+            self.guardar(clave, etag, contenido, generacion)
+        return etag, contenido
+
+
+@lru_cache(maxsize=None)
+def _adaptador(tipo) -> TypeAdapter:
+    return TypeAdapter(tipo)
+
+
+# Convierte objetos del ORM a JSON (bytes) con el esquema indicado, por ejemplo list[schemas.Genero]
+def a_json(tipo, datos) -> bytes:
+    adaptador = _adaptador(tipo)
+    return adaptador.dump_json(adaptador.validate_python(datos, from_attributes=True))
+
+
+# Caché compartida por todo el microservicio
+cache = CacheReferencias()
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from . import schemas, crud, crud_async, cambios, etags, database
+from .database import get_db_async
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Versiones async def de los endpoints de lectura de main.py, con AsyncSession (DB_MODO=async).
+
+Tienen la misma ruta, método y respuesta que los síncronos, a los que sustituyen con registrar(app),
+para poder comparar los dos modos con la misma carga cambiando solo DB_MODO. Son los endpoints que
+más se llaman: los que usan Interacciones (batch, catálogo y registro de cambios) y los del detalle y
+los listados de la interfaz. Las escrituras (que anotan los cambios e invalidan las cachés) y las
+referencias servidas desde la caché se quedan como están.
+Los ETags se calculan con las funciones etag_* de etags.py, las mismas que usa main.py. Esas
+funciones, las de cambios.py y crud.get_contenido_detalle reciben una Session y se ejecutan con
+AsyncSession.run_sync.
+
+"""
+
+router = APIRouter()
+
+@router.get("/peliculas/{idContenido}", response_model=schemas.Contenido)
+async def get_peliculas(idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    contenido = await crud_async.get_pelicula_by_id(db=db, id_contenido=idContenido)
+    if not contenido:
+        raise HTTPException(status_code=404, detail="Pelicula no encontrada")
+    return contenido
+
+# Devuelve los contenidos como un array JSON que se va enviando según se leen de la base de datos.
+# Paginación opcional: ?after=<último id recibido>&limit=<tamaño de página>
+@router.get("/contenidos", response_model=list[schemas.Contenido])
+async def obtener_todos_los_contenidos(after: Optional[str] = None, limit: Optional[int] = Query(default=None, ge=1)):
+    async def generar_json():
+        # La sesión se abre dentro del generador porque la respuesta se sigue enviando tras salir del endpoint
+        async with database.AsyncSessionLocal() as db:
+            yield "["
+            posicion = 0
+            async for contenido in await crud_async.get_all_contenidos(db, after=after, limit=limit):
+                if posicion:
+                    yield ","
+                yield schemas.Contenido.model_validate(contenido).model_dump_json()
+                posicion += 1
+            yield "]"
+
+    return StreamingResponse(generar_json(), media_type="application/json")
+
+# Endpoints para obtener varios contenidos en una sola llamada (GET ?ids=a&ids=b o POST {"ids": [...]})
+@router.get("/contenidos/batch", response_model=schemas.ContenidosBatch)
+async def get_contenidos_batch(ids: list[str] = Query(default=[]), db: AsyncSession = Depends(get_db_async)):
+    contenidos, no_encontrados = await crud_async.get_contenidos_by_ids(db=db, ids_contenido=ids)
+    return schemas.ContenidosBatch(contenidos=contenidos, noEncontrados=no_encontrados)
+
+@router.post("/contenidos/batch", response_model=schemas.ContenidosBatch)
+async def post_contenidos_batch(peticion: schemas.ContenidosBatchRequest, db: AsyncSession = Depends(get_db_async)):
+    contenidos, no_encontrados = await crud_async.get_contenidos_by_ids(db=db, ids_contenido=peticion.ids)
+    return schemas.ContenidosBatch(contenidos=contenidos, noEncontrados=no_encontrados)
+
+@router.get("/contenidos/{idContenido}", response_model=schemas.Contenido)
+async def get_contenido(idContenido: str, request: Request, response: Response, db: AsyncSession = Depends(get_db_async)):
+    etag = await db.run_sync(etags.etag_contenido, idContenido)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Contenido no encontrado")
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
+    return await crud_async.get_contenido_by_id(db=db, id_contenido=idContenido)
+
+# Endpoint con todos los datos de la página de detalle de un contenido (nombres de género y directores,
+# temporadas y episodios, reparto, subtítulos y doblajes)
+@router.get("/contenidos/{idContenido}/detalle", response_model=schemas.ContenidoDetalle)
+async def get_contenido_detalle(idContenido: str, request: Request, response: Response, db: AsyncSession = Depends(get_db_async)):
+    etag = await db.run_sync(etags.etag_detalle, idContenido)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Contenido no encontrado")
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
+    return await db.run_sync(crud.get_contenido_detalle, idContenido)
+
+@router.get("/generos/{idGenero}/contenidos", response_model=list[schemas.Contenido])
+async def get_contenidos_genero(idGenero: str, request: Request, response: Response, db: AsyncSession = Depends(get_db_async)):
+    # Se comprueba antes del 304 para no responder 304 a un género sin contenidos
+    etag = await db.run_sync(etags.etag_contenidos_genero, idGenero)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="No existe ningún contenido con ese genero")
+    no_modificado = etags.no_modificado(request, response, etag)
+    if no_modificado:
+        return no_modificado
+    return await crud_async.get_contenidos_por_genero(db=db, idGenero=idGenero)
+
+# Endpoint con los cambios del catálogo posteriores a la secuencia "desde", en orden
+@router.get("/cambios", response_model=schemas.CambiosResponse)
+async def get_cambios(desde: int = Query(default=0, ge=0), limit: int = Query(default=1000, ge=0, le=10000),
+                      db: AsyncSession = Depends(get_db_async)):
+    ultimo_seq = await db.run_sync(cambios.get_ultimo_seq)
+    lista = await db.run_sync(cambios.get_cambios, desde, limit) if limit else []
+    return schemas.CambiosResponse(cambios=lista, ultimoSeq=ultimo_seq)
+
+
+# Sustituye en la aplicación los endpoints síncronos por los de este módulo con la misma ruta y método.
+# Se sustituyen en su sitio para mantener el orden en que FastAPI compara las rutas
+def registrar(app: FastAPI):
+    asincronos = {(ruta.path, frozenset(ruta.methods)): ruta for ruta in router.routes}
+    rutas = app.router.routes
+    for posicion, ruta in enumerate(rutas):
+        clave = (getattr(ruta, "path", None), frozenset(getattr(ruta, "methods", None) or ()))
+        if clave in asincronos:
+            rutas[posicion] = asincronos.pop(clave)
+    rutas.extend(asincronos.values())
+    # Al apagar el microservicio se cierran las conexiones del motor asíncrono
+    app.router.on_shutdown.append(database.engine_async.dispose)
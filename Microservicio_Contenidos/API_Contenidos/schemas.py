@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional
 
 class ContenidoBase(BaseModel):
@@ -30,6 +31,47 @@ class Contenido(ContenidoBase):
     id: str #Generado Automaticamente
     class Config:
         from_attributes = True
+
+# Petición para obtener varios contenidos en una sola llamada
+class ContenidosBatchRequest(BaseModel):
+    ids: list[str]
+
+# Respuesta con los contenidos encontrados (en el orden pedido) y los ids que no existen
+class ContenidosBatch(BaseModel):
+    contenidos: list[Contenido]
+    noEncontrados: list[str]
+
+# Suma y número de valoraciones de un contenido (calculados por el microservicio de Interacciones),
+# o cantidades que se suman a ellos en el caso de los incrementos
+class ValoracionAgregada(BaseModel):
+    idContenido: str
+    suma: float
+    numero: int
+
+class ValoracionesLoteRequest(BaseModel):
+    valoraciones: list[ValoracionAgregada]
+
+class IncrementosValoracionRequest(BaseModel):
+    incrementos: list[ValoracionAgregada]
+
+class ValoracionesLote(BaseModel):
+    actualizados: int
+    noEncontrados: list[str]
+
+# Cambio del registro de cambios del catálogo (GET /cambios)
+class Cambio(BaseModel):
+    seq: int
+    entidad: str
+    operacion: str
+    idEntidad: str
+    idContenido: Optional[str] = None
+    fecha: datetime
+    class Config:
+        from_attributes = True
+
+class CambiosResponse(BaseModel):
+    cambios: list[Cambio]
+    ultimoSeq: int  # Último número de secuencia del registro en el momento de la consulta
     
 class PeliculaUpdate(ContenidoUpdate):
     duracion: Optional[int] = None
@@ -100,6 +142,10 @@ class Genero(GeneroBase):
     class Config:
         from_attributes = True
 
+# Género con sus contenidos más destacados (filas del catálogo de la pantalla principal)
+class GeneroConContenidos(Genero):
+    contenidos: list[Contenido]
+
 class TemporadasGet(BaseModel):
     idTemporada: str
     numeroTemporada: int
@@ -153,4 +199,33 @@ class DirectorCreate(BaseModel):
     fechaNacimiento: str
 
 class DirectorUpdate(DirectorCreate):
-    pass    
\ No newline at end of file
+    pass    
+
+class Subtitulo(BaseModel):
+    idSubtitulo: str
+    idioma: str
+    class Config:
+        from_attributes = True
+
+class Doblaje(BaseModel):
+    idDoblaje: str
+    idioma: str
+    class Config:
+        from_attributes = True
+
+# Esquemas para devolver toda la información de la página de detalle de un contenido en una sola llamada
+class EpisodioDetalle(Episodio):
+    director: Optional[str] = None  # Nombre del director del episodio
+
+class TemporadaDetalle(BaseModel):
+    idTemporada: str
+    numeroTemporada: int
+    Episodios: list[EpisodioDetalle]
+
+class ContenidoDetalle(Contenido):
+    genero: Optional[str] = None  # Nombre del género
+    director: Optional[str] = None  # Nombre del director (solo películas)
+    Temporadas: list[TemporadaDetalle] = []  # Solo series
+    reparto: list[Actor] = []
+    subtitulos: list[Subtitulo] = []
+    doblajes: list[Doblaje] = []
@@ -0,0 +1,69 @@
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Tabla de afinidad usuario-género usada para las recomendaciones.
+
+La tabla se actualiza desde crud.py al dar o quitar un "Me gusta" y al añadir una entrada
+al historial, dentro de la misma transacción. Para rellenarla a partir de los datos existentes
+(con los microservicios de Usuarios y Contenidos en marcha):
+
+    python -m API_Interacciones.afinidad     (desde Microservicio_Interacciones, con DB_PATH definido)
+
+"""
+
+# Suma (o resta, si es negativo) puntos a la afinidad de un usuario con un género
+def sumar_puntos(db: Session, idUsuario: str, idGenero: str, puntos: int):
+    tabla = models.AfinidadGeneroUsuario.__table__
+    # Se actualiza con una única sentencia para no perder incrementos concurrentes
+    sentencia = insert(tabla).values(idUsuario=idUsuario, idGenero=idGenero, puntos=puntos)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.idUsuario, tabla.c.idGenero],
+        set_={"puntos": tabla.c.puntos + sentencia.excluded.puntos},
+    )
+    db.execute(sentencia)
+    if puntos < 0:
+        db.query(models.AfinidadGeneroUsuario).filter(
+            models.AfinidadGeneroUsuario.idUsuario == idUsuario,
+            models.AfinidadGeneroUsuario.idGenero == idGenero,
+            models.AfinidadGeneroUsuario.puntos <= 0,
+        ).delete(synchronize_session=False)
+
+# Devuelve los ids de los géneros con más puntos de un usuario, de mayor a menor
+def get_generos_favoritos(db: Session, idUsuario: str, limite: int = 2) -> list[str]:
+    filas = (
+        db.query(models.AfinidadGeneroUsuario.idGenero)
+        .filter(models.AfinidadGeneroUsuario.idUsuario == idUsuario)
+        .order_by(models.AfinidadGeneroUsuario.puntos.desc(), models.AfinidadGeneroUsuario.idGenero)
+        .limit(limite)
+        .all()
+    )
+    return [fila.idGenero for fila in filas]
+
+# Sustituye el contenido de la tabla por los puntos indicados ({(idUsuario, idGenero): puntos})
+def reconstruir(db: Session, puntos_por_usuario_genero: dict):
+    db.query(models.AfinidadGeneroUsuario).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        models.AfinidadGeneroUsuario,
+        [
+            {"idUsuario": idUsuario, "idGenero": idGenero, "puntos": puntos}
+            for (idUsuario, idGenero), puntos in puntos_por_usuario_genero.items()
+            if puntos > 0
+        ],
+    )
+
+
+# Comando para rellenar la tabla de afinidad de una base de datos existente
+if __name__ == "__main__":
+    from .database import SessionLocal
+    from . import crud
+
+    db = SessionLocal()
+    try:
+        total = crud.reconstruir_afinidad_generos(db)
+        print(f"Tabla de afinidad reconstruida: {total} filas.")
+    finally:
+        db.close()
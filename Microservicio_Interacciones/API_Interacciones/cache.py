@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Caché en memoria con caducidad para datos obtenidos de otros microservicios
+"""
+
+_SIN_VALOR = object()
+
+
+class CacheTTL:
+    """
+    Caché en memoria con tiempo de vida (TTL) por entrada y tamaño máximo.
+    Cuando se llena, se descartan las entradas usadas hace más tiempo.
+    Es segura para usarse desde varios hilos y cuenta los aciertos y fallos de get().
+    Cada clave tiene una generación que cambia al invalidarla: un valor calculado antes de una
+    invalidación no se guarda si se pasa a set() la generación leída antes de calcularlo.
+    """
+
+    def __init__(self, ttl: float, max_elementos: int = 10000):
+        self.ttl = ttl
+        self.max_elementos = max_elementos
+        self._datos = OrderedDict()  # clave -> (caducidad, valor)
+        # Generaciones de las últimas claves invalidadas (como mucho max_elementos). Las claves que
+        # no están tienen la generación base, que es al menos la de cualquier clave descartada
+        self._generaciones = OrderedDict()  # clave -> generación
+        self._generacion_base = 0
+        self._invalidaciones = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave, defecto=None):
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is _SIN_VALOR:
+                self.fallos += 1
+                return defecto
+            caducidad, valor = entrada
+            if caducidad <= time.monotonic():
+                del self._datos[clave]
+                self.fallos += 1
+                return defecto
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def generacion(self, clave) -> int:
+        with self._lock:
+            return self._generaciones.get(clave, self._generacion_base)
+
+    # Guarda el valor; si se indica la generación, solo si la clave no se ha invalidado desde entonces
+    def set(self, clave, valor, generacion: int = None):
+        with self._lock:
+            if generacion is not None and self._generaciones.get(clave, self._generacion_base) != generacion:
+                return
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_elementos:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+            self._invalidaciones += 1
+            self._generaciones[clave] = self._invalidaciones
+            self._generaciones.move_to_end(clave)
+            while len(self._generaciones) > self.max_elementos:
+                _, generacion = self._generaciones.popitem(last=False)
+                self._generacion_base = max(self._generacion_base, generacion)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._invalidaciones += 1
+            self._generaciones.clear()
+            self._generacion_base = self._invalidaciones
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasaAciertos": self.aciertos / consultas if consultas else 0.0,
+                "elementos": len(self._datos),
+                "maxElementos": self.max_elementos,
+                "ttl": self.ttl,
+            }
+
+
+class CacheRevalidable:
+    """
+    Caché de valores calculados con una función (stale-while-revalidate).
+    Durante ttl segundos se sirve el valor guardado. Después, y hasta max_obsoleto segundos,
+    se sigue sirviendo el valor anterior mientras se recalcula en segundo plano, de modo que
+    las peticiones no esperan al cálculo. Pasado max_obsoleto, se recalcula en la propia petición.
+    La función devuelve (valor, guardar): si guardar es False (por ejemplo, porque ha fallado
+    otro microservicio) el valor se devuelve pero no se guarda, y se mantiene el anterior.
+    """
+
+    def __init__(self, ttl: float, max_obsoleto: float, max_elementos: int = 1000):
+        self.ttl = ttl
+        self.max_obsoleto = max_obsoleto
+        self.max_elementos = max_elementos
+        self._datos = OrderedDict()  # clave -> (fecha del cálculo, valor)
+        self._recalculando = set()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.obsoletos = 0
+        self.fallos = 0
+
+    def _guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_elementos:
+                self._datos.popitem(last=False)
+
+    def _recalcular(self, clave, calcular):
+        try:
+            valor, guardar = calcular()
+            if guardar:
+                self._guardar(clave, valor)
+        except Exception as e:
+            print(f"Caché: error al recalcular {clave} ({e})")
+        finally:
+            with self._lock:
+                self._recalculando.discard(clave)
+
+    def get(self, clave, calcular):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                edad = ahora - entrada[0]
+                if edad < self.ttl:
+                    self.aciertos += 1
+                    return entrada[1]
+                if edad < self.max_obsoleto:
+                    self.obsoletos += 1
+                    # Solo se lanza un recálculo por clave a la vez
+                    if clave not in self._recalculando:
+                        self._recalculando.add(clave)
+                        threading.Thread(target=self._recalcular, args=(clave, calcular), daemon=True).start()
+                    return entrada[1]
+            self.fallos += 1
+
+        valor, guardar = calcular()
+        if guardar:
+            self._guardar(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
@@ -0,0 +1,213 @@
+import os
+import sys
+import threading
+import time
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Copia en memoria del catálogo de contenidos.
+
+Cada proceso guarda los datos de los contenidos que devuelve en sus respuestas (id, título, género...)
+para no tener que pedirlos al microservicio de Contenidos en cada petición. El catálogo se carga
+entero al arrancar, paginando GET /contenidos, y después sigue el registro de cambios de Contenidos
+(GET /cambios) cada CATALOGO_INTERVALO_CAMBIOS segundos: solo se vuelven a pedir los contenidos
+creados o modificados y se quitan los eliminados. Por seguridad, se vuelve a cargar entero cada
+CATALOGO_INTERVALO segundos.
+Los contenidos que no estén en la copia (por ejemplo, recién creados) se piden a Contenidos y se añaden.
+Los ids que Contenidos no encuentra no se vuelven a pedir hasta la siguiente carga completa
+(o hasta que aparecen en el registro de cambios).
+
+"""
+
+# Segundos entre dos actualizaciones del catálogo
+INTERVALO_ACTUALIZACION = float(os.getenv("CATALOGO_INTERVALO", "3600"))
+# Segundos entre dos consultas del registro de cambios de Contenidos
+INTERVALO_CAMBIOS = float(os.getenv("CATALOGO_INTERVALO_CAMBIOS", "5"))
+# Contenidos por página al cargar el catálogo
+TAMANO_PAGINA = int(os.getenv("CATALOGO_TAMANO_PAGINA", "5000"))
+# Cambios por consulta al registro de cambios
+TAMANO_PAGINA_CAMBIOS = int(os.getenv("CATALOGO_TAMANO_PAGINA_CAMBIOS", "1000"))
+
+
+class ContenidoCatalogo:
+    """
+    Datos de un contenido que se devuelven en las respuestas del microservicio (schemas.ContenidoGetId).
+    Con __slots__ cada contenido ocupa mucho menos que un diccionario.
+    """
+
+    __slots__ = ("id", "titulo", "descripcion", "fechaLanzamiento", "idGenero",
+                 "valoracionPromedio", "idSubtitulosContenido", "idDoblajeContenido")
+
+    def __init__(self, datos: dict):
+        # Los ids se repiten en muchas estructuras: se internan para guardar una sola copia
+        self.id = sys.intern(datos["id"])
+        self.titulo = datos.get("titulo")
+        self.descripcion = datos.get("descripcion")
+        self.fechaLanzamiento = datos.get("fechaLanzamiento")
+        self.idGenero = sys.intern(datos["idGenero"]) if datos.get("idGenero") else None
+        self.valoracionPromedio = datos.get("valoracionPromedio")
+        self.idSubtitulosContenido = datos.get("idSubtitulosContenido")
+        self.idDoblajeContenido = datos.get("idDoblajeContenido")
+
+    def a_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class Catalogo:
+    """
+    Contenidos por id y ids de los contenidos de cada género. Las búsquedas por id no usan el lock
+    (una carga completa construye diccionarios nuevos y los sustituye de una vez).
+    """
+
+    def __init__(self):
+        self.contenidos = {}  # id -> ContenidoCatalogo
+        self.por_genero = {}  # idGenero -> {id: None} (conjunto que mantiene el orden)
+        self.inexistentes = set()  # ids que Contenidos no ha encontrado (hasta la siguiente carga completa)
+        self.cargado = False
+        self.seq = None  # Último cambio del registro de Contenidos aplicado (None: no se siguen los cambios)
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def __len__(self):
+        return len(self.contenidos)
+
+    def get(self, idContenido: str):
+        return self.contenidos.get(idContenido)
+
+    # Devuelve ({id: contenido} de los que están en el catálogo, ids que no están).
+    # Los ids que se sabe que no existen no se devuelven en ninguno de los dos
+    def buscar(self, ids_contenido: list[str]) -> tuple[dict, list[str]]:
+        contenidos, inexistentes = self.contenidos, self.inexistentes
+        encontrados, faltan = {}, []
+        for idContenido in ids_contenido:
+            contenido = contenidos.get(idContenido)
+            if contenido is None:
+                if idContenido not in inexistentes:
+                    faltan.append(idContenido)
+            else:
+                encontrados[idContenido] = contenido.a_dict()
+        return encontrados, faltan
+
+    def ids_genero(self, idGenero: str) -> tuple:
+        with self._lock:
+            return tuple(self.por_genero.get(idGenero, ()))
+
+    # Sustituye todo el catálogo por los contenidos indicados (lista de diccionarios)
+    def reemplazar(self, datos: list[dict]):
+        contenidos, por_genero = {}, {}
+        for contenido in datos:
+            registro = ContenidoCatalogo(contenido)
+            contenidos[registro.id] = registro
+            if registro.idGenero:
+                por_genero.setdefault(registro.idGenero, {})[registro.id] = None
+        with self._lock:
+            self.contenidos, self.por_genero = contenidos, por_genero
+            self.inexistentes = set()
+            self.cargado = True
+
+    # Añade o actualiza contenidos (lista de diccionarios) y elimina los ids indicados
+    def actualizar(self, datos: list[dict], eliminados: list[str] = ()):
+        with self._lock:
+            for contenido in datos:
+                registro = ContenidoCatalogo(contenido)
+                self._quitar_de_genero(self.contenidos.get(registro.id))
+                self.contenidos[registro.id] = registro
+                self.inexistentes.discard(registro.id)
+                if registro.idGenero:
+                    self.por_genero.setdefault(registro.idGenero, {})[registro.id] = None
+            for idContenido in eliminados:
+                self._quitar_de_genero(self.contenidos.pop(idContenido, None))
+
+    # Anota los ids que Contenidos no ha encontrado, para no volver a pedirlos
+    def marcar_inexistentes(self, ids_contenido: list[str]):
+        with self._lock:
+            self.inexistentes.update(ids_contenido)
+
+    def _quitar_de_genero(self, registro):
+        if registro is not None and registro.idGenero:
+            self.por_genero.get(registro.idGenero, {}).pop(registro.id, None)
+
+    # Carga el catálogo completo con obtener_pagina(after, limit), que devuelve una lista de contenidos
+    # ordenada por id a partir del id indicado. Con obtener_cambios(desde, limit) se guarda antes el
+    # último seq del registro de cambios, para seguirlo desde ahí (los cambios que se confirmen
+    # durante la carga se vuelven a aplicar después, lo que no altera el resultado)
+    def cargar(self, obtener_pagina, obtener_cambios=None):
+        seq = obtener_cambios(0, 0)["ultimoSeq"] if obtener_cambios is not None else None
+        datos, after = [], None
+        while True:
+            pagina = obtener_pagina(after, TAMANO_PAGINA)
+            datos.extend(pagina)
+            if len(pagina) < TAMANO_PAGINA:
+                break
+            after = pagina[-1]["id"]
+        self.reemplazar(datos)
+        self.seq = seq
+
+    def aplicar_cambios(self, obtener_cambios, obtener_contenidos) -> int:
+        """
+        Aplica los cambios de contenidos registrados desde el último seq aplicado: se quitan los
+        eliminados y los creados o modificados se piden con obtener_contenidos(ids, fallidos), que
+        devuelve {id: contenido} y añade a fallidos los ids que no se han podido pedir. Si alguno
+        falla, el seq no avanza y los cambios se vuelven a aplicar en la siguiente llamada.
+        Devuelve el número de contenidos afectados.
+        """
+        if self.seq is None:
+            return 0
+        desde, operaciones = self.seq, {}  # idContenido -> última operación
+        while True:
+            cambios = obtener_cambios(desde, TAMANO_PAGINA_CAMBIOS)["cambios"]
+            for cambio in cambios:
+                if cambio["entidad"] == "Contenido":
+                    operaciones[cambio["idContenido"]] = cambio["operacion"]
+                desde = cambio["seq"]
+            if len(cambios) < TAMANO_PAGINA_CAMBIOS:
+                break
+
+        eliminados = [idContenido for idContenido, operacion in operaciones.items() if operacion == "eliminar"]
+        modificados = [idContenido for idContenido, operacion in operaciones.items() if operacion != "eliminar"]
+        fallidos = []
+        nuevos = obtener_contenidos(modificados, fallidos) if modificados else {}
+        fallidos = set(fallidos)
+        # Los modificados que ya no existen se han eliminado después del cambio
+        eliminados += [idContenido for idContenido in modificados if idContenido not in nuevos and idContenido not in fallidos]
+        self.actualizar(list(nuevos.values()), eliminados)
+        if not fallidos:
+            self.seq = desde
+        return len(operaciones)
+
+    def iniciar_actualizacion_periodica(self, obtener_pagina, obtener_cambios=None, obtener_contenidos=None):
+        """
+        Lanza un hilo que carga el catálogo al arrancar (reintentando hasta conseguirlo) y
+        lo vuelve a cargar cada INTERVALO_ACTUALIZACION segundos. Si se indican obtener_cambios y
+        obtener_contenidos, entre dos cargas aplica los cambios cada INTERVALO_CAMBIOS segundos.
+        """
+        if self._hilo is not None:
+            return
+        seguir_cambios = obtener_cambios is not None and obtener_contenidos is not None
+        espera = INTERVALO_CAMBIOS if seguir_cambios else INTERVALO_ACTUALIZACION
+
+        def bucle():
+            ultima_carga = None
+            while True:
+                if ultima_carga is None or time.monotonic() - ultima_carga >= INTERVALO_ACTUALIZACION:
+                    try:
+                        inicio = time.monotonic()
+                        self.cargar(obtener_pagina, obtener_cambios if seguir_cambios else None)
+                        ultima_carga = inicio
+                        print(f"Catálogo: {len(self)} contenidos cargados en {time.monotonic() - inicio:.2f}s")
+                    except Exception as e:
+                        print(f"Catálogo: error al cargar los contenidos ({e})")
+                else:
+                    try:
+                        self.aplicar_cambios(obtener_cambios, obtener_contenidos)
+                    except Exception as e:
+                        print(f"Catálogo: error al aplicar los cambios ({e})")
+                time.sleep(espera if self.cargado else min(espera, 10))
+
+        self._hilo = threading.Thread(target=bucle, name="catalogo", daemon=True)
+        self._hilo.start()
+
+
+# Catálogo compartido por todo el microservicio
+catalogo = Catalogo()
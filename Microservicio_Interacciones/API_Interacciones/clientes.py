@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Cliente HTTP compartido para las llamadas a los microservicios de Usuarios y Contenidos.
+
+Todas las funciones de crud.py usan la misma sesión, de modo que las conexiones TCP se
+reutilizan (keep-alive) en lugar de abrir una nueva en cada llamada.
+
+"""
+
+# Configuración del cliente (modificable mediante variables de entorno)
+TIMEOUT_CONEXION = float(os.getenv("HTTP_TIMEOUT_CONEXION", "3"))  # Segundos para establecer la conexión
+TIMEOUT_LECTURA = float(os.getenv("HTTP_TIMEOUT_LECTURA", "10"))  # Segundos para recibir la respuesta
+MAX_CONEXIONES_POR_HOST = int(os.getenv("HTTP_MAX_CONEXIONES_POR_HOST", "20"))
+REINTENTOS = int(os.getenv("HTTP_REINTENTOS", "3"))
+BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.2"))  # Espera entre reintentos: 0.2s, 0.4s, 0.8s...
+MAX_HILOS = int(os.getenv("HTTP_MAX_HILOS", "8"))  # Peticiones simultáneas de en_paralelo
+MAX_RESPUESTAS_ETAG = int(os.getenv("HTTP_MAX_RESPUESTAS_ETAG", "1000"))  # Respuestas GET con ETag guardadas
+
+
+class SesionMicroservicios(requests.Session):
+    """
+    Sesión de requests que aplica un tiempo de espera por defecto a todas las peticiones.
+    Las respuestas GET con ETag se guardan y, al repetir la petición, se envía If-None-Match:
+    si el microservicio responde 304 (sin cuerpo), se devuelve la respuesta guardada.
+    """
+
+    def __init__(self, max_respuestas_etag: int = MAX_RESPUESTAS_ETAG):
+        super().__init__()
+        self.max_respuestas_etag = max_respuestas_etag
+        self._respuestas_etag = OrderedDict()  # URL -> última respuesta 200 con ETag
+        self._lock_etag = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (TIMEOUT_CONEXION, TIMEOUT_LECTURA))
+        if method.upper() != "GET":
+            return super().request(method, url, **kwargs)
+
+        clave = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        with self._lock_etag:
+            guardada = self._respuestas_etag.get(clave)
+        if guardada is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "If-None-Match": guardada.headers["ETag"]}
+
+        response = super().request(method, url, **kwargs)
+
+        with self._lock_etag:
+            if response.status_code == 304 and guardada is not None:
+                if clave in self._respuestas_etag:
+                    self._respuestas_etag.move_to_end(clave)
+                return guardada
+            if response.status_code == 200 and "ETag" in response.headers:
+                self._respuestas_etag[clave] = response
+                self._respuestas_etag.move_to_end(clave)
+                while len(self._respuestas_etag) > self.max_respuestas_etag:
+                    self._respuestas_etag.popitem(last=False)
+            elif guardada is not None:
+                self._respuestas_etag.pop(clave, None)
+        return response
+
+
+def crear_sesion() -> requests.Session:
+    # Los errores de conexión se reintentan siempre (la petición no ha llegado al servidor).
+    # Los errores de lectura y las respuestas 502/503/504 solo en GET, ya que, por ejemplo,
+    # repetir el PUT de una valoración la aplicaría dos veces.
+    reintentos = Retry(
+        total=REINTENTOS,
+        backoff_factor=BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    # Un pool de conexiones por host; pool_block limita las conexiones simultáneas a cada uno
+    adaptador = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=MAX_CONEXIONES_POR_HOST,
+        pool_block=True,
+        max_retries=reintentos,
+    )
+    sesion = SesionMicroservicios()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+# Sesión compartida por todo el microservicio
+sesion = crear_sesion()
+
+# Hilos para lanzar varias peticiones a la vez
+_ejecutor = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix="clientes")
+
+
+def en_paralelo(funcion, elementos) -> list:
+    """
+    Aplica la función a cada elemento lanzando las llamadas a la vez y devuelve
+    los resultados en el mismo orden. Si alguna llamada falla, se propaga su excepción.
+    """
+    elementos = list(elementos)
+    if len(elementos) <= 1:
+        return [funcion(elemento) for elemento in elementos]
+    return list(_ejecutor.map(funcion, elementos))
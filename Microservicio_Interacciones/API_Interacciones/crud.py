@@ -1,8 +1,10 @@
 from fastapi import HTTPException
-from sqlalchemy import desc, func
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import models, schemas, clientes, afinidad, migraciones, recomendador, tendencias, valoraciones, catalogo
+from .cache import CacheTTL, CacheRevalidable
+from typing import Optional
 import requests
+import os
 
 """
 Autor: Grupo GA01 - ASEE
@@ -22,81 +24,264 @@ BASE_URL_USUARIOS = "http://127.0.0.1:8001"
 BASE_URL_CONTENIDOS = "http://contenidos:8000"  # Nombre del servicio de contenidos
 BASE_URL_USUARIOS = "http://usuarios:8001"    # Nombre del servicio de usuarios
 
-# Función para obtener los géneros de los contenidos del historial y "me gusta" de un usuario
+# Contenidos como máximo en cada petición de get_contenidos_por_lotes
+CONTENIDOS_POR_LOTE = int(os.getenv("CONTENIDOS_POR_LOTE", "100"))
+
+# Caché idUsuario -> {idHistorial, idListaPersonalizada}. Estos ids se asignan al crear el
+# usuario y no cambian, así que no hace falta pedirlos a la API de usuarios en cada llamada
+cache_ids_usuario = CacheTTL(
+    ttl=float(os.getenv("CACHE_USUARIOS_TTL", "600")),
+    max_elementos=int(os.getenv("CACHE_USUARIOS_MAX", "10000")),
+)
+
+# Caché de recomendaciones por usuario: idUsuario -> {limite: recomendaciones}. Solo se invalida
+# cuando cambian los "Me gusta", el historial o las valoraciones de ese usuario (o al caducar)
+cache_recomendaciones = CacheTTL(
+    ttl=float(os.getenv("CACHE_RECOMENDACIONES_TTL", "300")),
+    max_elementos=int(os.getenv("CACHE_RECOMENDACIONES_MAX", "10000")),
+)
+
+# Caché de la respuesta de tendencias: (ventana, limite) -> tendencias. Es la misma para todos
+# los usuarios; al caducar se sigue sirviendo mientras se recalcula en segundo plano
+cache_tendencias = CacheRevalidable(
+    ttl=float(os.getenv("CACHE_TENDENCIAS_TTL", "30")),
+    max_obsoleto=float(os.getenv("CACHE_TENDENCIAS_MAX_OBSOLETO", "600")),
+)
+
+# Función para avisar de que han cambiado las interacciones de un usuario
+def notificar_cambio_interacciones(idUsuario: str):
+    cache_recomendaciones.invalidar(idUsuario)
+    recomendador.motor.marcar_cambio()
+
+# Función para obtener el id del historial y de la lista personalizada de un usuario.
+# Devuelve None si el usuario no existe y lanza requests.RequestException si falla la conexión
+def get_ids_usuario(usuario_id: str) -> Optional[dict]:
+    ids_usuario = cache_ids_usuario.get(usuario_id)
+    if ids_usuario is not None:
+        return ids_usuario
+
+    response = clientes.sesion.get(f"{BASE_URL_USUARIOS}/usuarios/{usuario_id}")
+    if response.status_code != 200:
+        return None
+    usuario = response.json()
+    ids_usuario = {
+        "idHistorial": usuario.get("idHistorial"),
+        "idListaPersonalizada": usuario.get("idListaPersonalizada"),
+    }
+    cache_ids_usuario.set(usuario_id, ids_usuario)
+    return ids_usuario
+
+# Función para obtener varios contenidos de la API de contenidos con una sola llamada
+def get_contenidos_batch(ids_contenido: list[str]) -> dict:
+    if not ids_contenido:
+        return {}
+    response = clientes.sesion.post(f"{BASE_URL_CONTENIDOS}/contenidos/batch", json={"ids": ids_contenido})
+    response.raise_for_status()
+    datos = response.json()
+    if datos["noEncontrados"]:
+        print(f"Contenidos no encontrados: {datos['noEncontrados']}")
+    # Diccionario idContenido -> contenido
+    return {contenido["id"]: contenido for contenido in datos["contenidos"]}
+
+# Función para obtener muchos contenidos de la API de contenidos: se piden en lotes de
+# CONTENIDOS_POR_LOTE a la vez (como mucho HTTP_MAX_HILOS peticiones simultáneas). Si falla algún
+# lote se devuelven los contenidos de los demás (y los ids del lote se añaden a fallidos, si se indica);
+# solo se lanza la excepción si fallan todos
+def get_contenidos_por_lotes(ids_contenido: list[str], fallidos: Optional[list] = None) -> dict:
+    ids_unicos = list(dict.fromkeys(ids_contenido))
+    lotes = [ids_unicos[i:i + CONTENIDOS_POR_LOTE] for i in range(0, len(ids_unicos), CONTENIDOS_POR_LOTE)]
+
+    def obtener_lote(lote):
+        try:
+            return get_contenidos_batch(lote)
+        except requests.RequestException as e:
+            print(f"Error al obtener los contenidos {lote}: {e}")
+            return e
+
+    contenidos = {}
+    errores = []
+    for lote, resultado in zip(lotes, clientes.en_paralelo(obtener_lote, lotes)):
+        if isinstance(resultado, Exception):
+            errores.append(resultado)
+            if fallidos is not None:
+                fallidos.extend(lote)
+        else:
+            contenidos.update(resultado)
+    if errores and len(errores) == len(lotes):
+        raise errores[0]
+    return contenidos
+
+# Función para obtener una página del catálogo de contenidos (ordenado por id, a partir de after)
+def get_pagina_contenidos(after: Optional[str], limit: int) -> list[dict]:
+    params = {"limit": limit}
+    if after is not None:
+        params["after"] = after
+    response = clientes.sesion.get(f"{BASE_URL_CONTENIDOS}/contenidos", params=params)
+    response.raise_for_status()
+    return response.json()
+
+# Función para obtener los cambios del catálogo posteriores a la secuencia "desde"
+# ({"cambios": [...], "ultimoSeq": n}) desde la API de contenidos
+def get_cambios_contenidos(desde: int, limit: int) -> dict:
+    response = clientes.sesion.get(f"{BASE_URL_CONTENIDOS}/cambios", params={"desde": desde, "limit": limit})
+    response.raise_for_status()
+    return response.json()
+
+# Función para obtener contenidos ({id: contenido}) desde la copia del catálogo en memoria.
+# Los que no están en ella se piden a la API de contenidos y se añaden a la copia
+def get_contenidos(ids_contenido: list[str]) -> dict:
+    contenidos, faltan = catalogo.catalogo.buscar(ids_contenido)
+    if faltan:
+        fallidos = []
+        try:
+            nuevos = get_contenidos_por_lotes(faltan, fallidos)
+        except requests.RequestException:
+            if not contenidos:
+                raise
+            nuevos = {}
+        else:
+            fallidos = set(fallidos)
+            catalogo.catalogo.marcar_inexistentes(
+                [idContenido for idContenido in faltan if idContenido not in nuevos and idContenido not in fallidos])
+        catalogo.catalogo.actualizar(list(nuevos.values()))
+        contenidos.update(catalogo.catalogo.buscar(list(nuevos))[0])
+    return contenidos
+
+# Función para obtener el género de un contenido (None si no existe o no tiene género).
+# Lanza requests.RequestException si falla la conexión con la API de contenidos
+def get_genero_contenido(idContenido: str) -> Optional[str]:
+    contenido = get_contenidos([idContenido]).get(idContenido)
+    return contenido["idGenero"] if contenido else None
+
+# Función para anotar, en la transacción de la sesión, que hay que reconstruir la tabla de afinidad
+# porque no se pudo sumar (o restar) un punto. El hilo de migraciones.iniciar_pendientes la
+# reconstruye con el historial y los "Me gusta", así que cuenta también este cambio
+def anotar_reconstruccion_afinidad(db: Session, idContenido: str, error: Exception):
+    print(f"Afinidad: no se pudo obtener el género del contenido {idContenido} ({error}); se reconstruirá la tabla")
+    migraciones.anotar_pendiente(db, migraciones.RELLENO_AFINIDAD)
+
+# Función para sumar (o restar) un punto de afinidad al género de un contenido
+def actualizar_afinidad(db: Session, idUsuario: str, idContenido: str, puntos: int):
+    try:
+        idGenero = get_genero_contenido(idContenido)
+    except requests.RequestException as e:
+        anotar_reconstruccion_afinidad(db, idContenido, e)
+        return
+    if idGenero:
+        afinidad.sumar_puntos(db, idUsuario, idGenero, puntos)
+
+# Función para obtener los géneros favoritos de un usuario a partir de su tabla de afinidad
 def get_generos_usuario(db: Session, usuario_id: str):
-    usuario = None
-    generos_puntos = {}
-    
-    # Obtener el usuario
-    response = requests.get(f"{BASE_URL_USUARIOS}/usuarios").json()
-    for user in response:
-        if user['id'] == usuario_id:
-            usuario = user
-    
-    # Obtener el historial del usuario
-    historial_id = None
-    if usuario:
-        historial_id = usuario['idHistorial']      
-
-    historial = None
-    if historial_id:
-        historial = db.query(models.HistorialUsuario).filter(models.HistorialUsuario.idHistorial == historial_id).all()
-
-    # Obtener los géneros de los contenidos en su historial
-    if historial:
-        for entrada in historial:
-            contenido_response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{entrada.idContenido}")
-            if not contenido_response.ok:
-                return None
-            else:
-                contenido = contenido_response.json()             
-            genero_id = contenido['idGenero']
-
-            if genero_id:
-                if genero_id not in generos_puntos:
-                    generos_puntos[genero_id] = 1
-                else:
-                    generos_puntos[genero_id] += 1   
-    
-    # Obtener los contenidos que al usuario le gustan
-    me_gusta = db.query(models.ListaMeGusta).filter(models.ListaMeGusta.idUsuario == usuario_id).all()
-    if me_gusta:
-        for entrada in me_gusta:
-            contenido_response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{entrada.idContenido}")
-            if not contenido_response.ok:
-                return None
-            else:
-                contenido = contenido_response.json()    
-            genero_id = contenido['idGenero']
-
-            if genero_id:
-                if genero_id not in generos_puntos:
-                    generos_puntos[genero_id] = 1
-                else:
-                    generos_puntos[genero_id] += 1 
-
-    # Ordenar los géneros por el número de repeticiones de mayor a menor
-    generos_ordenados = sorted(generos_puntos.items(), key=lambda x: x[1], reverse=True)
-
-    # Quedarse solo con los dos más repetidos para las recomendaciones
-    top_2_generos = [genero for genero, _ in generos_ordenados[:2]]                          
-
-    # Retornar los géneros
-    return top_2_generos
-
-# Función para obtener contenidos de los dos géneros favoritos de un usuario
-def get_recomendaciones_usuario(db: Session, usuario_id: str):
+    # Quedarse solo con los dos con más puntos para las recomendaciones
+    return afinidad.get_generos_favoritos(db, usuario_id, limite=2)
+
+# Función para obtener la relación idHistorial -> idUsuario de todos los usuarios
+# (la API de usuarios está paginada)
+def get_usuarios_por_historial() -> dict:
+    usuarios_por_historial = {}
+    skip, limit = 0, 100
+    while True:
+        response = clientes.sesion.get(f"{BASE_URL_USUARIOS}/usuarios", params={"skip": skip, "limit": limit})
+        response.raise_for_status()
+        usuarios = response.json()
+        for usuario in usuarios:
+            if usuario.get("idHistorial"):
+                usuarios_por_historial[usuario["idHistorial"]] = usuario["id"]
+        if len(usuarios) < limit:
+            break
+        skip += limit
+    return usuarios_por_historial
+
+# Función para volver a calcular la tabla de afinidad a partir del historial y los "Me gusta"
+def reconstruir_afinidad_generos(db: Session) -> int:
+    usuarios_por_historial = get_usuarios_por_historial()
+
+    # Pares (idUsuario, idContenido) del historial y de los "Me gusta"
+    entradas = [
+        (usuarios_por_historial[fila.idHistorial], fila.idContenido)
+        for fila in db.query(models.HistorialUsuario).all()
+        if fila.idHistorial in usuarios_por_historial
+    ]
+    entradas += [(fila.idUsuario, fila.idContenido) for fila in db.query(models.ListaMeGusta).all()]
+
+    # Géneros de todos los contenidos, en lotes
+    ids_contenido = list({idContenido for _, idContenido in entradas})
+    contenidos, faltan = catalogo.catalogo.buscar(ids_contenido)
+    for i in range(0, len(faltan), 500):
+        contenidos.update(get_contenidos_batch(faltan[i:i + 500]))
+
+    puntos = {}
+    for idUsuario, idContenido in entradas:
+        contenido = contenidos.get(idContenido)
+        if contenido and contenido["idGenero"]:
+            clave = (idUsuario, contenido["idGenero"])
+            puntos[clave] = puntos.get(clave, 0) + 1
+
+    afinidad.reconstruir(db, puntos)
+    db.commit()
+    return len(puntos)
+
+# Función para obtener las puntuaciones del recomendador (filtrado colaborativo) de un usuario
+def get_recomendaciones_puntuadas(db: Session, usuario_id: str, limite: int = 20) -> list[tuple[str, float]]:
+    try:
+        ids_usuario = get_ids_usuario(usuario_id)
+    except requests.RequestException:
+        ids_usuario = None  # Sin historial, se usan solo los "Me gusta" y las valoraciones
+    idHistorial = ids_usuario["idHistorial"] if ids_usuario else None
+    interacciones = recomendador.get_interacciones_usuario(db, usuario_id, idHistorial)
+    return recomendador.motor.recomendar(interacciones, limite)
+
+# Función para obtener las recomendaciones de un usuario (desde la caché si no han cambiado sus interacciones)
+def get_recomendaciones_usuario(db: Session, usuario_id: str, limite: int = 20):
+    # Generación de la caché antes de calcular: si cambian las interacciones del usuario mientras
+    # tanto, el resultado (calculado con las anteriores) no se guarda
+    generacion = cache_recomendaciones.generacion(usuario_id)
+    recomendaciones_usuario = cache_recomendaciones.get(usuario_id)
+    if recomendaciones_usuario is not None and limite in recomendaciones_usuario:
+        return recomendaciones_usuario[limite]
+
+    recomendaciones = calcular_recomendaciones_usuario(db, usuario_id, limite)
+    # No se guardan las listas vacías, que suelen deberse a un error al llamar a otro microservicio
+    if recomendaciones:
+        recomendaciones_usuario = dict(recomendaciones_usuario or {})
+        recomendaciones_usuario[limite] = recomendaciones
+        cache_recomendaciones.set(usuario_id, recomendaciones_usuario, generacion)
+    return recomendaciones
+
+# Función para calcular las recomendaciones de un usuario: los contenidos más parecidos a los que
+# ya ha visto según el recomendador o, si no hay (usuario sin interacciones o modelo sin construir),
+# los contenidos de sus dos géneros favoritos
+def calcular_recomendaciones_usuario(db: Session, usuario_id: str, limite: int = 20):
+    puntuadas = get_recomendaciones_puntuadas(db, usuario_id, limite)
+    if puntuadas:
+        try:
+            contenidos = get_contenidos([idContenido for idContenido, _ in puntuadas])
+            recomendaciones = [contenidos[idContenido] for idContenido, _ in puntuadas if idContenido in contenidos]
+            if recomendaciones:
+                return recomendaciones
+        except requests.RequestException as e:
+            print(f"Error al obtener los contenidos recomendados: {e}")
+
     # Obtenemos los dos géneros favoritos del usuario
     generos = get_generos_usuario(db, usuario_id)
-    
-    # Obtenemos la lista de contenidos en función de esos géneros
+    return get_contenidos_generos(generos)
+
+# Función para obtener la lista de contenidos de varios géneros: de la copia del catálogo
+# o, si todavía no se ha cargado, de la API de contenidos (los de cada género se piden a la vez)
+def get_contenidos_generos(generos: list[str]) -> list:
     recomendaciones = []
-    if generos:
-        lista1 = requests.get(f"{BASE_URL_CONTENIDOS}/generos/{generos[0]}/contenidos").json()
-        recomendaciones.extend(lista1)
-        if len(generos) == 2:
-            lista2 = requests.get(f"{BASE_URL_CONTENIDOS}/generos/{generos[1]}/contenidos").json()
-            recomendaciones.extend(lista2)
+    if generos and catalogo.catalogo.cargado:
+        for genero in generos:
+            ids_genero = catalogo.catalogo.ids_genero(genero)
+            contenidos = get_contenidos(list(ids_genero))
+            recomendaciones.extend(contenidos[idContenido] for idContenido in ids_genero if idContenido in contenidos)
+    elif generos:
+        listas = clientes.en_paralelo(
+            lambda genero: clientes.sesion.get(f"{BASE_URL_CONTENIDOS}/generos/{genero}/contenidos").json(),
+            generos,
+        )
+        for lista in listas:
+            recomendaciones.extend(lista)
 
     return recomendaciones    
 
@@ -104,22 +289,73 @@ def get_recomendaciones_usuario(db: Session, usuario_id: str):
 def mostrar_me_gusta(db: Session, usuario_id: str):
     query = db.query(models.ListaMeGusta).filter(models.ListaMeGusta.idUsuario == usuario_id).all()
     
-    me_gusta = []
-    for item in query:
-        try:
-            contenido = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{item.idContenido}").json()
-            if contenido:
-                me_gusta.append(contenido)
-        except requests.RequestException as e:
-            print(f"Error al obtener el contenido con ID {item.idContenido}: {e}")
+    ids_contenido = [item.idContenido for item in query]
+    try:
+        contenidos = get_contenidos(ids_contenido)
+    except requests.RequestException as e:
+        print(f"Error al obtener los contenidos {ids_contenido}: {e}")
+        return []
+
+    me_gusta = [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
     return me_gusta
 
+# Función para saber si un contenido está en los "Me gusta" de un usuario (búsqueda por clave primaria)
+def esta_en_me_gusta(db: Session, usuario_id: str, contenido_id: str) -> bool:
+    return db.get(models.ListaMeGusta, (usuario_id, contenido_id)) is not None
+
+# Función para obtener el id de la lista personalizada de un usuario
+def get_id_LP_usuario(usuario_id: str) -> str:
+    try:
+        ids_usuario = get_ids_usuario(usuario_id)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=503, detail=f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise HTTPException(status_code=404, detail=f"Error al obtener el usuario con ID {usuario_id}")
+    if not ids_usuario["idListaPersonalizada"]:
+        raise HTTPException(status_code=404, detail=f"No se encontró una ListaPersonalizada para el usuario con ID {usuario_id}")
+    return ids_usuario["idListaPersonalizada"]
+
+# Función para saber si un contenido está en la lista personalizada de un usuario (búsqueda por clave primaria)
+def esta_en_LP(db: Session, usuario_id: str, contenido_id: str) -> bool:
+    id_LP = get_id_LP_usuario(usuario_id)
+    return db.get(models.ListaPersonalizada, (id_LP, contenido_id)) is not None
+
+# Función para saber, para varios contenidos a la vez, si están en los "Me gusta" y en la lista
+# personalizada de un usuario (una consulta por lista)
+def get_estado_contenidos(db: Session, usuario_id: str, ids_contenido: list[str]) -> list[dict]:
+    ids_contenido = list(dict.fromkeys(ids_contenido))
+    if not ids_contenido:
+        return []
+    id_LP = get_id_LP_usuario(usuario_id)
+
+    me_gusta = {
+        fila.idContenido for fila in db.query(models.ListaMeGusta.idContenido).filter(
+            models.ListaMeGusta.idUsuario == usuario_id,
+            models.ListaMeGusta.idContenido.in_(ids_contenido))
+    }
+    lista_personalizada = {
+        fila.idContenido for fila in db.query(models.ListaPersonalizada.idContenido).filter(
+            models.ListaPersonalizada.idLista == id_LP,
+            models.ListaPersonalizada.idContenido.in_(ids_contenido))
+    }
+    return [
+        {
+            "idContenido": id_contenido,
+            "meGusta": id_contenido in me_gusta,
+            "enListaPersonalizada": id_contenido in lista_personalizada,
+        }
+        for id_contenido in ids_contenido
+    ]
+
 #Función para dar "Me Gusta" a un contenido por un usuario
 def dar_me_gusta(db: Session, idUsuario: str, idContenido: str):
     tupla_lista = models.ListaMeGusta(idUsuario=idUsuario,
                                       idContenido=idContenido)
     db.add(tupla_lista)
+    actualizar_afinidad(db, idUsuario, idContenido, 1)
     db.commit()
+    tendencias.contadores.sumar(idContenido, 1)
+    notificar_cambio_interacciones(idUsuario)
     db.refresh(tupla_lista)
     return tupla_lista
 
@@ -128,8 +364,12 @@ def quitar_me_gusta(db: Session, idUsuario: str, idContenido: str) -> bool:
     tupla_lista = db.query(models.ListaMeGusta).filter(models.ListaMeGusta.idUsuario == idUsuario, 
                                                        models.ListaMeGusta.idContenido == idContenido).first()
     if tupla_lista:
+        fecha = tupla_lista.fecha
         db.delete(tupla_lista)
+        actualizar_afinidad(db, idUsuario, idContenido, -1)
         db.commit()
+        tendencias.contadores.quitar(idContenido, fecha)
+        notificar_cambio_interacciones(idUsuario)
         return True
     
     return False
@@ -141,52 +381,47 @@ def valorar_contenido(db: Session, idUsuario: str, idContenido: str, valoracion:
                                                                 models.ValoracionUsuarioContenido.idContenido == idContenido ).first()
     if not valoracion:
         return None
-    #Se hace una llamada a la API de Contenidos 
-    url = f"{BASE_URL_CONTENIDOS}/contenidos/{idContenido}/valoracion"
-
-    # Parámetros del cuerpo de la solicitud
-    params = {
-        "valoracion": valoracion
-    }
-    try:
-        # Hacer la solicitud POST al endpoint
-        response = requests.put(url, params=params)
-
-        # Validar la respuesta
-        if response.status_code == 200:
-            print("Valoración añadida con éxito:", response.json())
-        else:
-            print("Error al añadir la valoración:", response.status_code, response.text)
-
-    except requests.RequestException as e:
-        print("Error al conectar con el servidor:", e)
+    # La media del contenido no se envía ahora a la API de Contenidos: se actualiza la suma y el
+    # número de valoraciones en la misma transacción y se envía en el siguiente lote (valoraciones.py)
 
     # Si existe ya una tupla con esa valoración, se edita
     if tupla_antigua:
+        valoraciones.sumar(db, idContenido, valoracion - tupla_antigua.puntuacion, 0)
         tupla_antigua.puntuacion = valoracion
         db.commit()
+        notificar_cambio_interacciones(idUsuario)
         db.refresh(tupla_antigua)
         return tupla_antigua
     # Si no existe, se crea una nueva
     tupla_nueva = models.ValoracionUsuarioContenido(idUsuario=idUsuario, idContenido=idContenido, puntuacion=valoracion)
     db.add(tupla_nueva)
+    valoraciones.sumar(db, idContenido, valoracion, 1)
     db.commit()
+    notificar_cambio_interacciones(idUsuario)
     db.refresh(tupla_nueva)
     return tupla_nueva    
 
+# Función para enviar a la API de Contenidos un lote de valoraciones agregadas
+# ({"idContenido", "suma", "numero"}), con las que se recalcula la media de cada contenido
+def enviar_valoraciones(lote: list[dict]):
+    response = clientes.sesion.put(f"{BASE_URL_CONTENIDOS}/contenidos/valoraciones", json={"valoraciones": lote})
+    response.raise_for_status()
+    datos = response.json()
+    if datos["noEncontrados"]:
+        print(f"Contenidos no encontrados al enviar las valoraciones: {datos['noEncontrados']}")
+
 # Función para añadir contenido al historial del usuario
 def crear_entrada_historial(db: Session, usuario_id: str, contenido_id: str):
     # Obtener al usuario desde la API de usuarios
     try:
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{usuario_id}")
-        if response.status_code != 200:
-            raise Exception(f"Error al obtener el usuario: {response.status_code} {response.text}")
-        usuario = response.json()
+        ids_usuario = get_ids_usuario(usuario_id)
     except requests.RequestException as e:
         raise Exception(f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise Exception(f"Error al obtener el usuario con ID {usuario_id}")
 
     # Validar si el usuario tiene historial
-    historial_id = usuario['idHistorial']
+    historial_id = ids_usuario['idHistorial']
     if not historial_id:
         raise Exception(f"No se encontró un historial para el usuario con ID {usuario_id}")
 
@@ -197,7 +432,9 @@ def crear_entrada_historial(db: Session, usuario_id: str, contenido_id: str):
             idContenido=contenido_id
         )
         db.add(db_historial)
+        actualizar_afinidad(db, usuario_id, contenido_id, 1)
         db.commit()
+        notificar_cambio_interacciones(usuario_id)
         db.refresh(db_historial)
         return db_historial
     except Exception as e:
@@ -208,15 +445,14 @@ def crear_entrada_historial(db: Session, usuario_id: str, contenido_id: str):
 def get_historial_usuario(db: Session, usuario_id: str):
     # Obtener al usuario desde la API de usuarios
     try:
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{usuario_id}")
-        if response.status_code != 200:
-            return None
-        usuario = response.json()
+        ids_usuario = get_ids_usuario(usuario_id)
     except requests.RequestException as e:
         return None
+    if ids_usuario is None:
+        return None
 
     # Validar si el usuario tiene historial
-    historial_id = usuario.get('idHistorial')
+    historial_id = ids_usuario['idHistorial']
     if not historial_id:
         return None
 
@@ -229,77 +465,72 @@ def get_historial_usuario(db: Session, usuario_id: str):
         return None
 
     # Obtener los contenidos relacionados con las entradas del historial
-    contenidos_historial = []
-    for entrada in historial:
-        try:
-            response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{entrada.idContenido}")
-            if response.status_code == 200:
-                contenidos_historial.append(response.json())
-            else:
-                print(f"Error al obtener el contenido con ID {entrada.idContenido}: {response.status_code}")
-        except requests.RequestException as e:
-            print(f"Error al conectarse con la API de contenidos para ID {entrada.idContenido}: {e}")
+    ids_contenido = [entrada.idContenido for entrada in historial]
+    try:
+        contenidos = get_contenidos(ids_contenido)
+    except requests.RequestException as e:
+        print(f"Error al conectarse con la API de contenidos para los IDs {ids_contenido}: {e}")
+        return []
 
+    contenidos_historial = [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
     return contenidos_historial    
 
-# Obtener los contenidos con más "Me Gusta"
-def get_mas_me_gusta(db: Session, limite: int = 2):
-    return (
-        db.query(
-            models.ListaMeGusta.idContenido.label("idContenido"),
-            func.count(models.ListaMeGusta.idContenido).label("me_gusta_total")
-        )
-        .group_by(models.ListaMeGusta.idContenido)
-        .order_by(desc("me_gusta_total"))
-        .limit(limite)
-        .all()
-    )
-
-#Metodo para obtener las tendencias con el titulo de los Contenidos
-def get_tendencias_completas(db: Session, limite: int = 2):
-    # Obtener idContenido y me_gusta_total de la base de datos
-    contenidos_populares = get_mas_me_gusta(db, limite)
-    tendencias = []
-
-    for contenido in contenidos_populares:
-        id_contenido = contenido.idContenido
-        me_gusta_total = contenido.me_gusta_total
-
-        # Solicitar el título del contenido a la API de contenidos
-        try:
-            response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{id_contenido}")
-            if response.ok:
-                contenido_data = response.json()
-                titulo = contenido_data.get("titulo", "Título desconocido")  # Recuperar el título
-            else:
-                titulo = "Título no disponible"  # En caso de error en la solicitud
-        except requests.RequestException:
+# Obtener los contenidos con más "Me Gusta" en una ventana de tendencias: [(idContenido, puntuacion, me_gusta_total)]
+# Se leen de los contadores en memoria, sin recorrer la tabla de "Me gusta"
+def get_mas_me_gusta(limite: int = 2, ventana: str = tendencias.VENTANA_POR_DEFECTO):
+    return tendencias.contadores.mejores(ventana, limite)
+
+#Metodo para obtener las tendencias con el titulo de los Contenidos (a través de la caché)
+def get_tendencias_completas(db: Session, limite: int = 2, ventana: str = tendencias.VENTANA_POR_DEFECTO):
+    return cache_tendencias.get((ventana, limite), lambda: calcular_tendencias_completas(limite, ventana))
+
+# Calcula las tendencias y devuelve (tendencias, completas); completas es False si no se pudieron
+# obtener los títulos, para no guardar ese resultado en la caché
+def calcular_tendencias_completas(limite: int, ventana: str):
+    contenidos_populares = get_mas_me_gusta(limite, ventana)
+    lista_tendencias = []
+
+    # Solicitar los títulos de todos los contenidos a la API de contenidos en una sola llamada
+    try:
+        contenidos = get_contenidos([contenido[0] for contenido in contenidos_populares])
+        error_conexion = False
+    except requests.RequestException:
+        contenidos = {}
+        error_conexion = True
+
+    for id_contenido, puntuacion, me_gusta_total in contenidos_populares:
+
+        if error_conexion:
             titulo = "Error al obtener título"  # Manejo de excepciones
+        elif id_contenido in contenidos:
+            titulo = contenidos[id_contenido].get("titulo", "Título desconocido")  # Recuperar el título
+        else:
+            titulo = "Título no disponible"  # El contenido no existe en la API de contenidos
 
         # Añadir a la lista de tendencias
-        tendencias.append(
+        lista_tendencias.append(
             schemas.Tendencia(
                 idContenido=id_contenido,
                 titulo=titulo,
                 me_gusta_total=me_gusta_total,
+                puntuacion=puntuacion,
             )
         )
 
-    return tendencias
+    return lista_tendencias, not error_conexion
 
 # Función para insertar un contenido en una lista personalizada.
 def insert_content_into_LP(db: Session, usuario_id: str, contenido_id: str):
     # Obtener al usuario desde la API de usuarios
     try:
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{usuario_id}")
-        if response.status_code != 200:
-            raise Exception(f"Error al obtener el usuario: {response.status_code} {response.text}")
-        usuario = response.json()
+        ids_usuario = get_ids_usuario(usuario_id)
     except requests.RequestException as e:
         raise Exception(f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise Exception(f"Error al obtener el usuario con ID {usuario_id}")
 
     # Validar si el usuario tiene listaPersonalizada
-    id_LP = usuario['idListaPersonalizada']
+    id_LP = ids_usuario['idListaPersonalizada']
     if not id_LP:
         raise Exception(f"No se encontró una ListaPersonalizada para el usuario con ID {usuario_id}")
 
@@ -321,12 +552,11 @@ def insert_content_into_LP(db: Session, usuario_id: str, contenido_id: str):
 def get_LP_user(db: Session, usuario_id: str):
     try:
         # Llamar a la API de usuarios para obtener la información del usuario
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{usuario_id}")
-        if response.status_code != 200:
-            raise Exception(f"Error al obtener el usuario: {response.status_code} {response.text}")
+        ids_usuario = get_ids_usuario(usuario_id)
+        if ids_usuario is None:
+            raise Exception(f"Error al obtener el usuario con ID {usuario_id}")
         
-        usuario = response.json()
-        id_LP = usuario.get("idListaPersonalizada")
+        id_LP = ids_usuario["idListaPersonalizada"]
         
         if not id_LP:
             raise Exception(f"No se encontró una ListaPersonalizada para el usuario con ID {usuario_id}")
@@ -340,19 +570,15 @@ def get_LP_user(db: Session, usuario_id: str):
         if not lista_personalizada:
             return []
         
-        # Obtener los contenidos relacionados
-        contenidos_LP = []
-        for row in lista_personalizada:
-            try:
-                # Consultar la API de contenidos para cada ID
-                response = requests.get(f"{BASE_URL_CONTENIDOS}/contenidos/{row.idContenido}")
-                if response.status_code == 200:
-                    contenidos_LP.append(response.json())
-                else:
-                    print(f"Error al obtener el contenido con ID {row.idContenido}: {response.status_code}")
-            except requests.RequestException as e:
-                print(f"Error al conectarse con la API de contenidos para ID {row.idContenido}: {e}")
-        
+        # Obtener los contenidos relacionados (de la copia del catálogo o de la API de contenidos)
+        ids_contenido = [row.idContenido for row in lista_personalizada]
+        try:
+            contenidos = get_contenidos(ids_contenido)
+        except requests.RequestException as e:
+            print(f"Error al conectarse con la API de contenidos para los IDs {ids_contenido}: {e}")
+            return []
+
+        contenidos_LP = [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
         return contenidos_LP
     except requests.RequestException as e:
         raise HTTPException(
@@ -369,15 +595,14 @@ def get_LP_user(db: Session, usuario_id: str):
 def delete_conent_from_user_LP(db: Session, idUsuario: str, idContenido: str):
     # Obtener al usuario desde la API de usuarios
     try:
-        response = requests.get(f"{BASE_URL_USUARIOS}/usuarios/{idUsuario}")
-        if response.status_code != 200:
-            raise Exception(f"Error al obtener el usuario: {response.status_code} {response.text}")
-        usuario = response.json()
+        ids_usuario = get_ids_usuario(idUsuario)
     except requests.RequestException as e:
         raise Exception(f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise Exception(f"Error al obtener el usuario con ID {idUsuario}")
 
     # Validar si el usuario tiene listaPersonalizada
-    id_LP = usuario['idListaPersonalizada']
+    id_LP = ids_usuario['idListaPersonalizada']
     if not id_LP:
         raise Exception(f"No se encontró una ListaPersonalizada para el usuario con ID {idUsuario}")
 
@@ -0,0 +1,295 @@
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from . import models, crud, afinidad, recomendador, tendencias, valoraciones, catalogo
+from typing import Optional
+import requests
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Funciones CRUD de crud.py con sesión asíncrona (AsyncSession), para DB_MODO=async.
+
+Las consultas propias se hacen con await sobre la AsyncSession. Las funciones de otros módulos que
+reciben una Session (afinidad, valoraciones, recomendador) se ejecutan con AsyncSession.run_sync,
+en la misma transacción. Las llamadas a otros microservicios usan el cliente síncrono de clientes.py,
+así que se ejecutan en el threadpool; los datos que ya están en memoria (catálogo, caché de ids de
+usuario) se leen sin salir del bucle de eventos.
+
+"""
+
+# Función para obtener el id del historial y de la lista personalizada de un usuario (ver crud.get_ids_usuario)
+async def get_ids_usuario(usuario_id: str) -> Optional[dict]:
+    ids_usuario = crud.cache_ids_usuario.get(usuario_id)
+    if ids_usuario is not None:
+        return ids_usuario
+    return await run_in_threadpool(crud.get_ids_usuario, usuario_id)
+
+# Función para obtener contenidos ({id: contenido}) desde la copia del catálogo en memoria.
+# Solo si falta alguno se llama (en el threadpool) a crud.get_contenidos, que lo pide a la API de contenidos
+async def get_contenidos(ids_contenido: list[str]) -> dict:
+    contenidos, faltan = catalogo.catalogo.buscar(ids_contenido)
+    if not faltan:
+        return contenidos
+    return await run_in_threadpool(crud.get_contenidos, ids_contenido)
+
+# Función para sumar (o restar) un punto de afinidad al género de un contenido
+async def actualizar_afinidad(db: AsyncSession, idUsuario: str, idContenido: str, puntos: int):
+    contenido = catalogo.catalogo.get(idContenido)
+    if contenido is not None:
+        idGenero = contenido.idGenero
+    else:
+        try:
+            idGenero = await run_in_threadpool(crud.get_genero_contenido, idContenido)
+        except requests.RequestException as e:
+            await db.run_sync(crud.anotar_reconstruccion_afinidad, idContenido, e)
+            return
+    if idGenero:
+        await db.run_sync(afinidad.sumar_puntos, idUsuario, idGenero, puntos)
+
+# Función para obtener las puntuaciones del recomendador (filtrado colaborativo) de un usuario
+async def get_recomendaciones_puntuadas(db: AsyncSession, usuario_id: str, limite: int = 20) -> list[tuple[str, float]]:
+    try:
+        ids_usuario = await get_ids_usuario(usuario_id)
+    except requests.RequestException:
+        ids_usuario = None  # Sin historial, se usan solo los "Me gusta" y las valoraciones
+    idHistorial = ids_usuario["idHistorial"] if ids_usuario else None
+    interacciones = await db.run_sync(recomendador.get_interacciones_usuario, usuario_id, idHistorial)
+    return recomendador.motor.recomendar(interacciones, limite)
+
+# Función para obtener las recomendaciones de un usuario (desde la caché si no han cambiado sus interacciones)
+async def get_recomendaciones_usuario(db: AsyncSession, usuario_id: str, limite: int = 20):
+    # Generación de la caché antes de calcular: si cambian las interacciones del usuario mientras
+    # tanto, el resultado (calculado con las anteriores) no se guarda
+    generacion = crud.cache_recomendaciones.generacion(usuario_id)
+    recomendaciones_usuario = crud.cache_recomendaciones.get(usuario_id)
+    if recomendaciones_usuario is not None and limite in recomendaciones_usuario:
+        return recomendaciones_usuario[limite]
+
+    recomendaciones = await calcular_recomendaciones_usuario(db, usuario_id, limite)
+    # No se guardan las listas vacías, que suelen deberse a un error al llamar a otro microservicio
+    if recomendaciones:
+        recomendaciones_usuario = dict(recomendaciones_usuario or {})
+        recomendaciones_usuario[limite] = recomendaciones
+        crud.cache_recomendaciones.set(usuario_id, recomendaciones_usuario, generacion)
+    return recomendaciones
+
+# Función para calcular las recomendaciones de un usuario (ver crud.calcular_recomendaciones_usuario)
+async def calcular_recomendaciones_usuario(db: AsyncSession, usuario_id: str, limite: int = 20):
+    puntuadas = await get_recomendaciones_puntuadas(db, usuario_id, limite)
+    if puntuadas:
+        try:
+            contenidos = await get_contenidos([idContenido for idContenido, _ in puntuadas])
+            recomendaciones = [contenidos[idContenido] for idContenido, _ in puntuadas if idContenido in contenidos]
+            if recomendaciones:
+                return recomendaciones
+        except requests.RequestException as e:
+            print(f"Error al obtener los contenidos recomendados: {e}")
+
+    # Contenidos de los dos géneros favoritos del usuario
+    generos = await db.run_sync(afinidad.get_generos_favoritos, usuario_id, 2)
+    if not generos:
+        return []
+    return await run_in_threadpool(crud.get_contenidos_generos, generos)
+
+# Función para mostrar los "Me Gusta" de un usuario concreto
+async def mostrar_me_gusta(db: AsyncSession, usuario_id: str):
+    ids_contenido = (await db.scalars(
+        select(models.ListaMeGusta.idContenido).where(models.ListaMeGusta.idUsuario == usuario_id))).all()
+    try:
+        contenidos = await get_contenidos(ids_contenido)
+    except requests.RequestException as e:
+        print(f"Error al obtener los contenidos {ids_contenido}: {e}")
+        return []
+
+    return [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
+
+# Función para saber si un contenido está en los "Me gusta" de un usuario (búsqueda por clave primaria)
+async def esta_en_me_gusta(db: AsyncSession, usuario_id: str, contenido_id: str) -> bool:
+    return await db.get(models.ListaMeGusta, (usuario_id, contenido_id)) is not None
+
+# Función para obtener el id de la lista personalizada de un usuario
+async def get_id_LP_usuario(usuario_id: str) -> str:
+    try:
+        ids_usuario = await get_ids_usuario(usuario_id)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=503, detail=f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise HTTPException(status_code=404, detail=f"Error al obtener el usuario con ID {usuario_id}")
+    if not ids_usuario["idListaPersonalizada"]:
+        raise HTTPException(status_code=404, detail=f"No se encontró una ListaPersonalizada para el usuario con ID {usuario_id}")
+    return ids_usuario["idListaPersonalizada"]
+
+# Función para saber si un contenido está en la lista personalizada de un usuario (búsqueda por clave primaria)
+async def esta_en_LP(db: AsyncSession, usuario_id: str, contenido_id: str) -> bool:
+    id_LP = await get_id_LP_usuario(usuario_id)
+    return await db.get(models.ListaPersonalizada, (id_LP, contenido_id)) is not None
+
+# Función para saber, para varios contenidos a la vez, si están en los "Me gusta" y en la lista
+# personalizada de un usuario (una consulta por lista)
+async def get_estado_contenidos(db: AsyncSession, usuario_id: str, ids_contenido: list[str]) -> list[dict]:
+    ids_contenido = list(dict.fromkeys(ids_contenido))
+    if not ids_contenido:
+        return []
+    id_LP = await get_id_LP_usuario(usuario_id)
+
+    me_gusta = set((await db.scalars(
+        select(models.ListaMeGusta.idContenido).where(
+            models.ListaMeGusta.idUsuario == usuario_id,
+            models.ListaMeGusta.idContenido.in_(ids_contenido)))).all())
+    lista_personalizada = set((await db.scalars(
+        select(models.ListaPersonalizada.idContenido).where(
+            models.ListaPersonalizada.idLista == id_LP,
+            models.ListaPersonalizada.idContenido.in_(ids_contenido)))).all())
+    return [
+        {
+            "idContenido": id_contenido,
+            "meGusta": id_contenido in me_gusta,
+            "enListaPersonalizada": id_contenido in lista_personalizada,
+        }
+        for id_contenido in ids_contenido
+    ]
+
+#Función para dar "Me Gusta" a un contenido por un usuario
+async def dar_me_gusta(db: AsyncSession, idUsuario: str, idContenido: str):
+    tupla_lista = models.ListaMeGusta(idUsuario=idUsuario, idContenido=idContenido)
+    db.add(tupla_lista)
+    await actualizar_afinidad(db, idUsuario, idContenido, 1)
+    await db.commit()
+    tendencias.contadores.sumar(idContenido, 1)
+    crud.notificar_cambio_interacciones(idUsuario)
+    await db.refresh(tupla_lista)
+    return tupla_lista
+
+#Función para quitar un contenido de la lista de "Me Gusta"
+async def quitar_me_gusta(db: AsyncSession, idUsuario: str, idContenido: str) -> bool:
+    tupla_lista = await db.get(models.ListaMeGusta, (idUsuario, idContenido))
+    if tupla_lista:
+        fecha = tupla_lista.fecha
+        await db.delete(tupla_lista)
+        await actualizar_afinidad(db, idUsuario, idContenido, -1)
+        await db.commit()
+        tendencias.contadores.quitar(idContenido, fecha)
+        crud.notificar_cambio_interacciones(idUsuario)
+        return True
+
+    return False
+
+#Función para valorar un contenido por un usuario (ver crud.valorar_contenido)
+async def valorar_contenido(db: AsyncSession, idUsuario: str, idContenido: str, valoracion: int):
+    tupla_antigua = await db.get(models.ValoracionUsuarioContenido, (idUsuario, idContenido))
+    if not valoracion:
+        return None
+
+    # Si existe ya una tupla con esa valoración, se edita
+    if tupla_antigua:
+        await db.run_sync(valoraciones.sumar, idContenido, valoracion - tupla_antigua.puntuacion, 0)
+        tupla_antigua.puntuacion = valoracion
+        await db.commit()
+        crud.notificar_cambio_interacciones(idUsuario)
+        await db.refresh(tupla_antigua)
+        return tupla_antigua
+    # Si no existe, se crea una nueva
+    tupla_nueva = models.ValoracionUsuarioContenido(idUsuario=idUsuario, idContenido=idContenido, puntuacion=valoracion)
+    db.add(tupla_nueva)
+    await db.run_sync(valoraciones.sumar, idContenido, valoracion, 1)
+    await db.commit()
+    crud.notificar_cambio_interacciones(idUsuario)
+    await db.refresh(tupla_nueva)
+    return tupla_nueva
+
+# Función para obtener el id del historial o de la lista personalizada de un usuario
+# (lanza Exception, como las funciones de escritura de crud.py)
+async def get_id_lista_usuario(usuario_id: str, campo: str, nombre_lista: str) -> str:
+    try:
+        ids_usuario = await get_ids_usuario(usuario_id)
+    except requests.RequestException as e:
+        raise Exception(f"Error al conectarse con la API de usuarios: {e}")
+    if ids_usuario is None:
+        raise Exception(f"Error al obtener el usuario con ID {usuario_id}")
+    if not ids_usuario[campo]:
+        raise Exception(f"No se encontró {nombre_lista} para el usuario con ID {usuario_id}")
+    return ids_usuario[campo]
+
+# Función para añadir contenido al historial del usuario
+async def crear_entrada_historial(db: AsyncSession, usuario_id: str, contenido_id: str):
+    historial_id = await get_id_lista_usuario(usuario_id, "idHistorial", "un historial")
+    try:
+        db_historial = models.HistorialUsuario(idHistorial=historial_id, idContenido=contenido_id)
+        db.add(db_historial)
+        await actualizar_afinidad(db, usuario_id, contenido_id, 1)
+        await db.commit()
+        crud.notificar_cambio_interacciones(usuario_id)
+        await db.refresh(db_historial)
+        return db_historial
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error al añadir contenido al historial en la base de datos: {e}")
+
+# Función para obtener el historial del usuario
+async def get_historial_usuario(db: AsyncSession, usuario_id: str):
+    try:
+        ids_usuario = await get_ids_usuario(usuario_id)
+    except requests.RequestException:
+        return None
+    if ids_usuario is None or not ids_usuario["idHistorial"]:
+        return None
+
+    try:
+        ids_contenido = (await db.scalars(
+            select(models.HistorialUsuario.idContenido).where(
+                models.HistorialUsuario.idHistorial == ids_usuario["idHistorial"]))).all()
+    except Exception:
+        return None
+
+    try:
+        contenidos = await get_contenidos(ids_contenido)
+    except requests.RequestException as e:
+        print(f"Error al conectarse con la API de contenidos para los IDs {ids_contenido}: {e}")
+        return []
+
+    return [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
+
+# Función para insertar un contenido en una lista personalizada
+async def insert_content_into_LP(db: AsyncSession, usuario_id: str, contenido_id: str):
+    id_LP = await get_id_lista_usuario(usuario_id, "idListaPersonalizada", "una ListaPersonalizada")
+    try:
+        db_LP = models.ListaPersonalizada(idLista=id_LP, idContenido=contenido_id)
+        db.add(db_LP)
+        await db.commit()
+        await db.refresh(db_LP)
+        return db_LP
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error al añadir contenido a la LP en la base de datos: {e}")
+
+# Función para obtener la lista personalizada de un usuario concreto
+async def get_LP_user(db: AsyncSession, usuario_id: str):
+    try:
+        id_LP = await get_id_lista_usuario(usuario_id, "idListaPersonalizada", "una ListaPersonalizada")
+        ids_contenido = (await db.scalars(
+            select(models.ListaPersonalizada.idContenido).where(models.ListaPersonalizada.idLista == id_LP))).all()
+        if not ids_contenido:
+            return []
+
+        try:
+            contenidos = await get_contenidos(ids_contenido)
+        except requests.RequestException as e:
+            print(f"Error al conectarse con la API de contenidos para los IDs {ids_contenido}: {e}")
+            return []
+
+        return [contenidos[id_contenido] for id_contenido in ids_contenido if id_contenido in contenidos]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Función para borrar un contenido de la lista personalizada de un usuario concreto
+async def delete_conent_from_user_LP(db: AsyncSession, idUsuario: str, idContenido: str):
+    id_LP = await get_id_lista_usuario(idUsuario, "idListaPersonalizada", "una ListaPersonalizada")
+    row = await db.get(models.ListaPersonalizada, (id_LP, idContenido))
+    if row:
+        await db.delete(row)
+        await db.commit()
+        return True
+
+    return False
@@ -1,7 +1,7 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from . import models, schemas, crud
-from .database import engine, get_db, initialize_database
+from . import models, schemas, crud, migraciones, recomendador, tendencias, valoraciones, catalogo
+from .database import DB_MODO, SessionLocal, engine, get_db, initialize_database
 
 """
 Autor: Grupo GA01 - ASEE
@@ -22,6 +22,22 @@ app = FastAPI(
 # Crear la base de datos
 initialize_database()
 
+# Hacer en segundo plano los rellenos de las migraciones que necesitan otros microservicios
+migraciones.iniciar_pendientes(SessionLocal)
+
+# Cargar la copia del catálogo de contenidos y mantenerla actualizada en segundo plano
+catalogo.catalogo.iniciar_actualizacion_periodica(
+    crud.get_pagina_contenidos, crud.get_cambios_contenidos, crud.get_contenidos_por_lotes)
+
+# Construir el modelo de recomendaciones y reconstruirlo periódicamente en segundo plano
+recomendador.motor.iniciar_reconstruccion_periodica(SessionLocal, crud.get_usuarios_por_historial)
+
+# Cargar los contadores de tendencias y guardarlos periódicamente en segundo plano
+tendencias.contadores.iniciar(SessionLocal)
+
+# Enviar periódicamente a Contenidos las medias de las valoraciones que han cambiado
+valoraciones.envio.iniciar(SessionLocal, crud.enviar_valoraciones)
+
 # Dependency para obtener la sesión de base de datos
 def get_database():
     db = next(get_db())
@@ -29,12 +45,24 @@ def get_database():
 
 # Endpoint para obtener las recomendaciones para los usuarios
 @app.get("/usuarios/{idUsuario}/recomendaciones", response_model=list[schemas.ContenidoGetId])
-def get_recomendaciones(idUsuario: str, db: Session = Depends(get_db)):
-    recomendaciones = crud.get_recomendaciones_usuario(db=db, usuario_id=idUsuario)
+def get_recomendaciones(idUsuario: str, limite: int = Query(default=20, ge=1), db: Session = Depends(get_db)):
+    recomendaciones = crud.get_recomendaciones_usuario(db=db, usuario_id=idUsuario, limite=limite)
     if not recomendaciones:
         raise HTTPException(status_code=404, detail="No se pudieron recuperar las recomendaciones")
     return recomendaciones  
 
+# Endpoint para obtener las puntuaciones del recomendador para un usuario (de mayor a menor)
+@app.get("/usuarios/{idUsuario}/recomendaciones/puntuaciones", response_model=list[schemas.RecomendacionPuntuada])
+def get_recomendaciones_puntuadas(idUsuario: str, limite: int = Query(default=20, ge=1), db: Session = Depends(get_db)):
+    puntuadas = crud.get_recomendaciones_puntuadas(db=db, usuario_id=idUsuario, limite=limite)
+    return [schemas.RecomendacionPuntuada(idContenido=idContenido, puntuacion=puntuacion)
+            for idContenido, puntuacion in puntuadas]
+
+# Endpoint para consultar el estado de la caché de recomendaciones (aciertos, fallos y tamaño)
+@app.get("/recomendaciones/cache", response_model=schemas.EstadisticasCache)
+def get_estadisticas_cache_recomendaciones():
+    return crud.cache_recomendaciones.estadisticas()
+
 # Endpoint para obtener lista de me gusta
 @app.get("/usuarios/{idUsuario}/me-gusta", response_model=list[schemas.ContenidoMeGusta])
 def mostrar_megusta(idUsuario: str, db: Session = Depends(get_db)):
@@ -43,6 +71,17 @@ def mostrar_megusta(idUsuario: str, db: Session = Depends(get_db)):
     #    raise HTTPException(status_code=404, detail="No se pudieron recuperar los me gusta")
     return me_gusta
 
+# Endpoint para saber si un contenido está en los "Me gusta" de un usuario
+@app.get("/usuarios/{idUsuario}/me-gusta/{idContenido}", response_model=schemas.EstadoMeGusta)
+def esta_en_megusta(idUsuario: str, idContenido: str, db: Session = Depends(get_db)):
+    me_gusta = crud.esta_en_me_gusta(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+    return schemas.EstadoMeGusta(idContenido=idContenido, meGusta=me_gusta)
+
+# Endpoint para saber si varios contenidos están en los "Me gusta" y en la lista personalizada de un usuario
+@app.get("/usuarios/{idUsuario}/estado-contenidos", response_model=list[schemas.EstadoContenidoUsuario])
+def get_estado_contenidos(idUsuario: str, ids: list[str] = Query(default=[]), db: Session = Depends(get_db)):
+    return crud.get_estado_contenidos(db=db, usuario_id=idUsuario, ids_contenido=ids)
+
 # Endpoint para dar "Me gusta" a un contenido
 @app.post("/usuarios/{idUsuario}/me-gusta/{idContenido}", response_model=schemas.ListaMeGusta)
 def action_megusta(idUsuario: str, idContenido: str, db: Session = Depends(get_db)):
@@ -83,12 +122,19 @@ def get_historial(idUsuario: str, db: Session = Depends(get_db)):
 
 # Endpoint para obtener los contenidos más populares basados en "me gusta".
 @app.get("/contenido/tendencias", response_model=schemas.TendenciasResponse)
-def obtener_tendencias(limite: int = 2, db: Session = Depends(get_db)):
+def obtener_tendencias(limite: int = Query(default=2, ge=1), ventana: str = tendencias.VENTANA_POR_DEFECTO,
+                       db: Session = Depends(get_db)):
     """
     Devuelve una lista de contenidos populares (tendencias) con su id, título, y número de 'me gusta'.
+    La ventana indica el periodo en el que se tienen en cuenta los 'me gusta' (por ejemplo 1h, 24h, 7d o total).
+    Si la ventana todavía no tiene datos se usa la ventana total, y la respuesta indica la ventana usada.
     """
-    tendencias = crud.get_tendencias_completas(db, limite)
-    return schemas.TendenciasResponse(tendencias=tendencias)
+    if ventana not in tendencias.contadores.nombres_ventanas():
+        raise HTTPException(status_code=400,
+                            detail=f"Ventana no válida. Ventanas disponibles: {', '.join(tendencias.contadores.nombres_ventanas())}")
+    ventana = tendencias.contadores.ventana_con_datos(ventana)
+    lista_tendencias = crud.get_tendencias_completas(db, limite, ventana)
+    return schemas.TendenciasResponse(tendencias=lista_tendencias, ventana=ventana)
 
 
 # Endpoint para añadir contenido a la lista personalizada
@@ -114,10 +160,21 @@ def get_LP_user(idUsuario: str, db: Session = Depends(get_db)):
             detail=f"Error inesperado: {e}"
         )
     
+# Endpoint para saber si un contenido está en la ListaPersonalizada de un usuario
+@app.get("/usuarios/{idUsuario}/listaPersonalizada/{idContenido}", response_model=schemas.EstadoListaPersonalizada)
+def esta_en_LP(idUsuario: str, idContenido: str, db: Session = Depends(get_db)):
+    en_lista = crud.esta_en_LP(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+    return schemas.EstadoListaPersonalizada(idContenido=idContenido, enListaPersonalizada=en_lista)
+
 # Endpoint para eliminar contenido de la listaPersonalizada
 @app.delete("/usuarios/{idUsuario}/listaPersonalizada/{idContenido}")
 def delete_conent_from_user_LP(idUsuario: str, idContenido: str, db: Session = Depends(get_db)):
     eliminado = crud.delete_conent_from_user_LP(db=db, idUsuario=idUsuario, idContenido=idContenido)
     if not eliminado:
         raise HTTPException(status_code=404, detail="Contenido no eliminado de ListaPersonalizada")
-    return {"message": "Contenido eliminado de ListaPersonalizada"}
\ No newline at end of file
+    return {"message": "Contenido eliminado de ListaPersonalizada"}
+
+# Con DB_MODO=async, los endpoints async def de rutas_async.py (con AsyncSession) sustituyen a los anteriores
+if DB_MODO == "async":
+    from . import rutas_async
+    rutas_async.registrar(app)
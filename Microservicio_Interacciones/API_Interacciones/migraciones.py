@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from . import models, crud, valoraciones
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Migraciones del esquema de la base de datos interacciones.db.
+
+initialize_database() solo crea las tablas cuando la base de datos no existe, así que los cambios
+del esquema (columnas, tablas e índices nuevos) se aplican a las bases de datos existentes con las
+migraciones de MIGRACIONES. Las versiones aplicadas se guardan en la tabla migracion_esquema y cada
+migración se aplica una sola vez, en orden. Además, cada migración comprueba lo que ya existe
+(por ejemplo, en una base de datos recién creada con create_all), así que repetirla no cambia nada.
+
+Para añadir un cambio del esquema: modificar models.py y añadir al final de MIGRACIONES una
+función con la versión siguiente que haga el mismo cambio en una base de datos existente.
+
+Los rellenos que necesitan otros microservicios (que pueden no estar disponibles al arrancar) no
+se hacen en la migración: la migración los anota en la tabla migracion_pendiente y un hilo en
+segundo plano los reintenta cada MIGRACIONES_REINTENTO segundos hasta que terminan bien. crud.py
+también anota la reconstrucción de la afinidad cuando no puede actualizarla al momento.
+
+"""
+
+SQL_CREAR_TABLA_MIGRACIONES = """
+CREATE TABLE IF NOT EXISTS migracion_esquema (
+    version INTEGER NOT NULL PRIMARY KEY,
+    descripcion VARCHAR NOT NULL,
+    fecha DATETIME NOT NULL
+)
+"""
+
+SQL_CREAR_TABLA_PENDIENTES = """
+CREATE TABLE IF NOT EXISTS migracion_pendiente (
+    nombre VARCHAR NOT NULL PRIMARY KEY,
+    fecha DATETIME NOT NULL
+)
+"""
+
+# Reconstrucción de la tabla de afinidad usuario-género con el historial y los "Me gusta"
+RELLENO_AFINIDAD = "afinidad_generos"
+
+# Segundos entre dos intentos de los rellenos pendientes
+INTERVALO_REINTENTO = float(os.getenv("MIGRACIONES_REINTENTO", "30"))
+
+
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Anota un relleno de TAREAS_PENDIENTES para hacerlo en segundo plano (con una conexión o una
+# sesión, en su transacción). Si ya estaba anotado se actualiza la fecha, para que un relleno que
+# estuviera en curso no borre la anotación al terminar
+def anotar_pendiente(conexion, nombre: str):
+    conexion.execute(text(SQL_CREAR_TABLA_PENDIENTES))
+    conexion.execute(
+        text("INSERT INTO migracion_pendiente (nombre, fecha) VALUES (:nombre, :fecha) "
+             "ON CONFLICT (nombre) DO UPDATE SET fecha = excluded.fecha"),
+        {"nombre": nombre, "fecha": _ahora()},
+    )
+
+
+# Versión 1: afinidad usuario-género. Se rellena con el historial y los "Me gusta" existentes en
+# segundo plano (necesita los microservicios de Usuarios y Contenidos)
+def _afinidad_generos(conexion):
+    if inspect(conexion).has_table(models.AfinidadGeneroUsuario.__tablename__):
+        return
+    models.AfinidadGeneroUsuario.__table__.create(bind=conexion)
+    anotar_pendiente(conexion, RELLENO_AFINIDAD)
+
+
+# Versión 2: fechas de las interacciones (necesarias para las tendencias) y contadores de tendencias
+def _fechas_y_tendencias(conexion):
+    inspector = inspect(conexion)
+    for modelo in (models.ListaMeGusta, models.HistorialUsuario, models.ValoracionUsuarioContenido):
+        columnas = {columna["name"] for columna in inspector.get_columns(modelo.__tablename__)}
+        if "fecha" not in columnas:
+            conexion.execute(text(f'ALTER TABLE {modelo.__tablename__} ADD COLUMN "fecha" DATETIME'))
+    models.ContadorTendencia.__table__.create(bind=conexion, checkfirst=True)
+
+
+# Versión 3: suma y número de valoraciones por contenido, rellenada con las valoraciones existentes
+def _agregados_valoraciones(conexion):
+    if inspect(conexion).has_table(models.AgregadoValoracionContenido.__tablename__):
+        return
+    models.AgregadoValoracionContenido.__table__.create(bind=conexion)  # Con su índice
+    db = Session(bind=conexion)
+    try:
+        total = valoraciones.reconstruir(db)
+        print(f"Tabla de valoraciones agregadas creada: {total} contenidos.")
+    finally:
+        db.close()
+
+
+# Versión 4: índice de los "Me gusta" por contenido (estado de varios contenidos, recuentos
+# de tendencias). historial_usuario.idHistorial no necesita uno propio: es la primera
+# columna de la clave primaria
+def _indices_consultas(conexion):
+    conexion.execute(text('CREATE INDEX IF NOT EXISTS ix_me_gusta_contenido ON lista_me_gusta ("idContenido")'))
+    conexion.execute(text("ANALYZE"))  # Estadísticas para que el planificador elija los índices
+
+
+# (versión, descripción, función que recibe la conexión)
+MIGRACIONES = [
+    (1, "Afinidad usuario-género", _afinidad_generos),
+    (2, "Fechas de las interacciones y contadores de tendencias", _fechas_y_tendencias),
+    (3, "Suma y número de valoraciones por contenido", _agregados_valoraciones),
+    (4, "Índice de los Me gusta por contenido", _indices_consultas),
+]
+
+# Rellenos que se hacen en segundo plano: nombre -> función que recibe una sesión. Las funciones
+# de crud se buscan al llamarlas (crud puede no estar cargado del todo al importar este módulo)
+TAREAS_PENDIENTES = {
+    RELLENO_AFINIDAD: lambda db: crud.reconstruir_afinidad_generos(db),
+}
+
+
+def get_versiones_aplicadas(engine) -> set:
+    with engine.begin() as conexion:
+        conexion.execute(text(SQL_CREAR_TABLA_MIGRACIONES))
+        return {fila[0] for fila in conexion.execute(text("SELECT version FROM migracion_esquema"))}
+
+
+def aplicar_migraciones(engine) -> list[int]:
+    """
+    Aplica, en orden, las migraciones que todavía no se han aplicado a la base de datos.
+    Cada una se aplica en su propia transacción junto con su registro en migracion_esquema.
+    Devuelve las versiones aplicadas.
+    """
+    aplicadas = get_versiones_aplicadas(engine)
+    nuevas = []
+    for version, descripcion, migrar in MIGRACIONES:
+        if version in aplicadas:
+            continue
+        with engine.begin() as conexion:
+            migrar(conexion)
+            conexion.execute(
+                text("INSERT INTO migracion_esquema (version, descripcion, fecha) VALUES (:version, :descripcion, :fecha)"),
+                {"version": version, "descripcion": descripcion,
+                 "fecha": _ahora()},
+            )
+        print(f"Migración {version} aplicada: {descripcion}")
+        nuevas.append(version)
+    return nuevas
+
+
+# Rellenos pendientes: [(nombre, fecha de la anotación)]
+def get_pendientes(engine) -> list[tuple]:
+    with engine.begin() as conexion:
+        conexion.execute(text(SQL_CREAR_TABLA_PENDIENTES))
+        return [tuple(fila) for fila in conexion.execute(text("SELECT nombre, fecha FROM migracion_pendiente ORDER BY fecha"))]
+
+
+def completar_pendientes(crear_sesion) -> list[str]:
+    """
+    Hace los rellenos anotados en migracion_pendiente y borra la anotación de los que terminan bien.
+    Devuelve los que siguen pendientes.
+    """
+    db = crear_sesion()
+    try:
+        quedan = []
+        for nombre, fecha in get_pendientes(db.get_bind()):
+            try:
+                resultado = TAREAS_PENDIENTES[nombre](db)
+                # Si se ha vuelto a anotar mientras tanto, la anotación se mantiene
+                db.execute(text("DELETE FROM migracion_pendiente WHERE nombre = :nombre AND fecha = :fecha"),
+                           {"nombre": nombre, "fecha": fecha})
+                db.commit()
+                print(f"Relleno {nombre} completado ({resultado})")
+            except Exception as e:
+                db.rollback()
+                print(f"No se pudo hacer el relleno {nombre} ({e}); se reintentará en {INTERVALO_REINTENTO:g}s")
+                quedan.append(nombre)
+        return quedan
+    finally:
+        db.close()
+
+
+def iniciar_pendientes(crear_sesion):
+    """
+    Lanza un hilo que hace los rellenos pendientes y, cada INTERVALO_REINTENTO segundos, reintenta
+    los que han fallado y hace los que se han anotado después.
+    """
+    def bucle():
+        while True:
+            completar_pendientes(crear_sesion)
+            time.sleep(INTERVALO_REINTENTO)
+
+    hilo = threading.Thread(target=bucle, name="migraciones-pendientes", daemon=True)
+    hilo.start()
+    return hilo
+
+
+if __name__ == "__main__":
+    from .database import engine
+    from .database import SessionLocal
+    versiones = aplicar_migraciones(engine)
+    print(f"Migraciones aplicadas: {versiones or 'ninguna'}")
+    pendientes = completar_pendientes(SessionLocal)
+    print(f"Rellenos pendientes: {pendientes or 'ninguno'}")
@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Float, Integer, PrimaryKeyConstraint
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, DateTime, PrimaryKeyConstraint, Index
 from .database import Base
 
 """
@@ -8,11 +9,16 @@ Versión: 1.1
 Descripción: Descripción de los modelos de datos utilizados en la base de datos
 """
 
+# Fecha y hora actual en UTC (sin zona horaria, ya que SQLite no la guarda)
+def ahora() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class ValoracionUsuarioContenido(Base):
     __tablename__ = "valoracion_usuario_contenido"
     idUsuario = Column(String, nullable=False)  # Referencia lógica a Usuarios
     idContenido = Column(String, nullable=False)  # Referencia lógica a Contenido
     puntuacion = Column(Float, nullable=False)  # Escala de 0 a 10
+    fecha = Column(DateTime, default=ahora, onupdate=ahora)  # Última valoración (nula en los datos antiguos)
 
     __table_args__ = (
         PrimaryKeyConstraint('idUsuario', 'idContenido'),
@@ -22,9 +28,11 @@ class ListaMeGusta(Base):
     __tablename__ = "lista_me_gusta"
     idUsuario = Column(String, nullable=False)  # Referencia lógica a Usuarios
     idContenido = Column(String, nullable=False)  # Referencia lógica a Contenido
+    fecha = Column(DateTime, default=ahora)  # Nula en los datos antiguos
         
     __table_args__ = (
         PrimaryKeyConstraint('idUsuario', 'idContenido'),
+        Index('ix_me_gusta_contenido', 'idContenido'),
     )
 
 class ListaPersonalizada(Base):
@@ -40,7 +48,48 @@ class HistorialUsuario(Base):
     __tablename__ = "historial_usuario"
     idHistorial = Column(String, nullable=False)
     idContenido = Column(String, nullable=False)
+    fecha = Column(DateTime, default=ahora)  # Nula en los datos antiguos
 
     __table_args__ = (
         PrimaryKeyConstraint('idHistorial', 'idContenido'),
-    )       
+    )
+
+# Afinidad de cada usuario con cada género: cada entrada del historial y cada "Me gusta"
+# de un contenido del género suma un punto. Se mantiene al escribir en esas listas.
+class AfinidadGeneroUsuario(Base):
+    __tablename__ = "afinidad_genero_usuario"
+    idUsuario = Column(String, nullable=False)  # Referencia lógica a Usuarios
+    idGenero = Column(String, nullable=False)  # Referencia lógica a Genero
+    puntos = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('idUsuario', 'idGenero'),
+        Index('ix_afinidad_usuario_puntos', 'idUsuario', 'puntos'),
+    )
+
+# Contadores de tendencias con decaimiento exponencial, guardados periódicamente
+# (valor del contador en la fecha indicada)
+class ContadorTendencia(Base):
+    __tablename__ = "contador_tendencia"
+    ventana = Column(String, nullable=False)  # Nombre de la ventana: 1h, 24h, 7d...
+    idContenido = Column(String, nullable=False)  # Referencia lógica a Contenido
+    valor = Column(Float, nullable=False)
+    fecha = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('ventana', 'idContenido'),
+    )
+
+# Suma y número de valoraciones de cada contenido. version aumenta con cada cambio y
+# versionEnviada es la última versión enviada al microservicio de Contenidos
+class AgregadoValoracionContenido(Base):
+    __tablename__ = "agregado_valoracion_contenido"
+    idContenido = Column(String, primary_key=True)  # Referencia lógica a Contenido
+    suma = Column(Float, nullable=False, default=0)
+    numero = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)
+    versionEnviada = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_agregado_valoracion_pendientes', 'versionEnviada', 'version'),
+    )
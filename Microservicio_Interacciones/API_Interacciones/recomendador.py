@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Motor de recomendaciones de filtrado colaborativo contenido-contenido.
+
+A partir de los "Me gusta", el historial y las valoraciones se construye la matriz dispersa
+usuarios x contenidos y, con ella, la similitud coseno entre contenidos (contenidos vistos por
+los mismos usuarios se parecen). Las recomendaciones de un usuario son los contenidos más
+parecidos a los que ya ha visto, sin incluir estos últimos.
+
+La matriz de similitud se reconstruye en segundo plano cada RECOMENDADOR_INTERVALO segundos
+si ha habido cambios. Las interacciones del propio usuario se leen en cada petición, así que
+sus últimos cambios se tienen en cuenta sin esperar a la reconstrucción.
+
+"""
+
+# Peso de cada tipo de interacción en la matriz usuarios x contenidos
+PESO_ME_GUSTA = 1.0
+PESO_HISTORIAL = 0.5
+PESO_VALORACION_MAXIMA = 1.0  # Una valoración de 10 pesa como un "Me gusta"
+
+# Contenidos parecidos que se guardan por cada contenido (limita la memoria de la matriz)
+VECINOS_POR_CONTENIDO = int(os.getenv("RECOMENDADOR_VECINOS", "50"))
+# Segundos entre reconstrucciones del modelo
+INTERVALO_RECONSTRUCCION = float(os.getenv("RECOMENDADOR_INTERVALO", "300"))
+
+
+def peso_valoracion(puntuacion: float) -> float:
+    return PESO_VALORACION_MAXIMA * max(puntuacion, 0) / 10
+
+
+class ModeloContenidoContenido:
+    """
+    Similitud entre contenidos: matriz dispersa contenidos x contenidos (sin la diagonal)
+    y la relación entre cada idContenido y su posición en la matriz.
+    """
+
+    def __init__(self, ids_contenido, similitud: sparse.csr_matrix):
+        self.ids_contenido = ids_contenido
+        self.posiciones = {idContenido: i for i, idContenido in enumerate(ids_contenido)}
+        self.similitud = similitud
+
+    def recomendar(self, interacciones_usuario: dict, limite: int) -> list[tuple[str, float]]:
+        """
+        Devuelve los (idContenido, puntuacion) con mayor puntuación para un usuario con las
+        interacciones indicadas ({idContenido: peso}), excluyendo los contenidos que ya ha visto.
+        """
+        conocidos = [(self.posiciones[idContenido], peso)
+                     for idContenido, peso in interacciones_usuario.items()
+                     if idContenido in self.posiciones]
+        if not conocidos or limite <= 0:
+            return []
+        columnas, pesos = zip(*conocidos)
+        vector = sparse.csr_matrix(
+            (pesos, (np.zeros(len(columnas), dtype=np.int64), columnas)),
+            shape=(1, len(self.ids_contenido)),
+        )
+        puntuaciones = (vector @ self.similitud).toarray().ravel()
+        puntuaciones[list(columnas)] = 0  # Contenidos ya vistos
+
+        candidatos = np.flatnonzero(puntuaciones > 0)
+        if len(candidatos) > limite:
+            candidatos = candidatos[np.argpartition(puntuaciones[candidatos], -limite)[-limite:]]
+        candidatos = candidatos[np.argsort(-puntuaciones[candidatos], kind="stable")]
+        return [(self.ids_contenido[i], float(puntuaciones[i])) for i in candidatos]
+
+
+# Deja en cada fila de la matriz solo los n valores más altos
+def podar_vecinos(matriz: sparse.csr_matrix, n: int) -> sparse.csr_matrix:
+    indptr, datos = matriz.indptr, matriz.data
+    for fila in np.flatnonzero(np.diff(indptr) > n):
+        inicio, fin = indptr[fila], indptr[fila + 1]
+        descartados = np.argpartition(datos[inicio:fin], -n)[:-n]
+        datos[inicio + descartados] = 0
+    matriz.eliminate_zeros()
+    return matriz
+
+
+# Construye el modelo a partir de todas las interacciones de la base de datos.
+# usuarios_por_historial ({idHistorial: idUsuario}) permite unir el historial con el resto de
+# interacciones del mismo usuario; si falta un historial, se trata como un usuario aparte.
+def construir_modelo(db: Session, usuarios_por_historial: dict) -> ModeloContenidoContenido:
+    me_gusta = db.query(models.ListaMeGusta.idUsuario, models.ListaMeGusta.idContenido).all()
+    historial = db.query(models.HistorialUsuario.idHistorial, models.HistorialUsuario.idContenido).all()
+    valoraciones = db.query(
+        models.ValoracionUsuarioContenido.idUsuario,
+        models.ValoracionUsuarioContenido.idContenido,
+        models.ValoracionUsuarioContenido.puntuacion,
+    ).all()
+
+    usuarios = ([fila[0] for fila in me_gusta]
+                + [usuarios_por_historial.get(fila[0], fila[0]) for fila in historial]
+                + [fila[0] for fila in valoraciones])
+    contenidos = ([fila[1] for fila in me_gusta]
+                  + [fila[1] for fila in historial]
+                  + [fila[1] for fila in valoraciones])
+    pesos = np.concatenate([
+        np.full(len(me_gusta), PESO_ME_GUSTA),
+        np.full(len(historial), PESO_HISTORIAL),
+        np.array([peso_valoracion(fila[2]) for fila in valoraciones], dtype=np.float64),
+    ])
+
+    if not contenidos:
+        return ModeloContenidoContenido([], sparse.csr_matrix((0, 0)))
+
+    # Posición de cada usuario y contenido en la matriz
+    _, filas = np.unique(np.array(usuarios, dtype=object), return_inverse=True)
+    ids_contenido, columnas = np.unique(np.array(contenidos, dtype=object), return_inverse=True)
+
+    # Matriz usuarios x contenidos (las interacciones repetidas se suman)
+    interacciones = sparse.csr_matrix(
+        (pesos, (filas, columnas)), shape=(filas.max() + 1, len(ids_contenido))
+    )
+
+    # Similitud coseno: (R^T R)_ij / (|r_i| |r_j|)
+    coocurrencias = (interacciones.T @ interacciones).tocsr()
+    normas = np.sqrt(coocurrencias.diagonal())
+    normas[normas == 0] = 1
+    inversas = sparse.diags(1 / normas)
+    similitud = (inversas @ coocurrencias @ inversas).tocsr()
+    similitud.setdiag(0)
+    similitud.eliminate_zeros()
+    similitud = podar_vecinos(similitud, VECINOS_POR_CONTENIDO)
+
+    return ModeloContenidoContenido(ids_contenido.tolist(), similitud)
+
+
+# Interacciones de un usuario ({idContenido: peso}), con los mismos pesos que el modelo
+def get_interacciones_usuario(db: Session, idUsuario: str, idHistorial: str = None) -> dict:
+    interacciones = {}
+
+    def sumar(idContenido, peso):
+        interacciones[idContenido] = interacciones.get(idContenido, 0) + peso
+
+    for (idContenido,) in db.query(models.ListaMeGusta.idContenido).filter(
+            models.ListaMeGusta.idUsuario == idUsuario):
+        sumar(idContenido, PESO_ME_GUSTA)
+    if idHistorial:
+        for (idContenido,) in db.query(models.HistorialUsuario.idContenido).filter(
+                models.HistorialUsuario.idHistorial == idHistorial):
+            sumar(idContenido, PESO_HISTORIAL)
+    for idContenido, puntuacion in db.query(
+            models.ValoracionUsuarioContenido.idContenido,
+            models.ValoracionUsuarioContenido.puntuacion).filter(
+            models.ValoracionUsuarioContenido.idUsuario == idUsuario):
+        sumar(idContenido, peso_valoracion(puntuacion))
+    return interacciones
+
+
+class Recomendador:
+    """
+    Mantiene el modelo actual del proceso y lo reconstruye cuando hay cambios.
+    """
+
+    def __init__(self):
+        self.modelo = None
+        self._cambios = 0
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    # Las funciones de escritura de crud.py avisan de que las interacciones han cambiado
+    def marcar_cambio(self):
+        with self._lock:
+            self._cambios += 1
+
+    def reconstruir(self, db: Session, usuarios_por_historial: dict):
+        with self._lock:
+            cambios = self._cambios
+        modelo = construir_modelo(db, usuarios_por_historial)
+        with self._lock:
+            self.modelo = modelo
+            self._cambios -= cambios  # Los cambios llegados durante la construcción quedan pendientes
+
+    def recomendar(self, interacciones_usuario: dict, limite: int) -> list[tuple[str, float]]:
+        modelo = self.modelo
+        if modelo is None:
+            return []
+        return modelo.recomendar(interacciones_usuario, limite)
+
+    def iniciar_reconstruccion_periodica(self, crear_sesion, get_usuarios_por_historial):
+        """
+        Lanza un hilo que construye el modelo al arrancar y lo reconstruye cada
+        INTERVALO_RECONSTRUCCION segundos si ha habido cambios.
+        """
+        if self._hilo is not None:
+            return
+
+        def bucle():
+            while True:
+                if self.modelo is None or self._cambios:
+                    usuarios_obtenidos = True
+                    try:
+                        usuarios_por_historial = get_usuarios_por_historial()
+                    except Exception as e:
+                        print(f"Recomendador: no se pudieron obtener los usuarios ({e})")
+                        usuarios_por_historial = {}
+                        usuarios_obtenidos = False
+                    db = crear_sesion()
+                    try:
+                        inicio = time.monotonic()
+                        self.reconstruir(db, usuarios_por_historial)
+                        if not usuarios_obtenidos:
+                            self.marcar_cambio()  # Se vuelve a intentar en la siguiente vuelta
+                        print(f"Recomendador: modelo reconstruido en {time.monotonic() - inicio:.2f}s")
+                    except Exception as e:
+                        print(f"Recomendador: error al reconstruir el modelo ({e})")
+                    finally:
+                        db.close()
+                time.sleep(INTERVALO_RECONSTRUCCION)
+
+        self._hilo = threading.Thread(target=bucle, name="recomendador", daemon=True)
+        self._hilo.start()
+
+
+# Recomendador compartido por todo el microservicio
+motor = Recomendador()
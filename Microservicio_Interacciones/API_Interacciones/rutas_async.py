@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import schemas, crud_async, database
+from .database import get_db_async
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Versiones async def de los endpoints de main.py, con AsyncSession (DB_MODO=async).
+
+Tienen la misma ruta, método y respuesta que los síncronos, a los que sustituyen con registrar(app),
+para poder comparar los dos modos con la misma carga cambiando solo DB_MODO.
+Las tendencias y las estadísticas de la caché no consultan la base de datos y se quedan como están.
+
+"""
+
+router = APIRouter()
+
+# Endpoint para obtener las recomendaciones para los usuarios
+@router.get("/usuarios/{idUsuario}/recomendaciones", response_model=list[schemas.ContenidoGetId])
+async def get_recomendaciones(idUsuario: str, limite: int = Query(default=20, ge=1), db: AsyncSession = Depends(get_db_async)):
+    recomendaciones = await crud_async.get_recomendaciones_usuario(db=db, usuario_id=idUsuario, limite=limite)
+    if not recomendaciones:
+        raise HTTPException(status_code=404, detail="No se pudieron recuperar las recomendaciones")
+    return recomendaciones
+
+# Endpoint para obtener las puntuaciones del recomendador para un usuario (de mayor a menor)
+@router.get("/usuarios/{idUsuario}/recomendaciones/puntuaciones", response_model=list[schemas.RecomendacionPuntuada])
+async def get_recomendaciones_puntuadas(idUsuario: str, limite: int = Query(default=20, ge=1), db: AsyncSession = Depends(get_db_async)):
+    puntuadas = await crud_async.get_recomendaciones_puntuadas(db=db, usuario_id=idUsuario, limite=limite)
+    return [schemas.RecomendacionPuntuada(idContenido=idContenido, puntuacion=puntuacion)
+            for idContenido, puntuacion in puntuadas]
+
+# Endpoint para obtener lista de me gusta
+@router.get("/usuarios/{idUsuario}/me-gusta", response_model=list[schemas.ContenidoMeGusta])
+async def mostrar_megusta(idUsuario: str, db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.mostrar_me_gusta(db=db, usuario_id=idUsuario)
+
+# Endpoint para saber si un contenido está en los "Me gusta" de un usuario
+@router.get("/usuarios/{idUsuario}/me-gusta/{idContenido}", response_model=schemas.EstadoMeGusta)
+async def esta_en_megusta(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    me_gusta = await crud_async.esta_en_me_gusta(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+    return schemas.EstadoMeGusta(idContenido=idContenido, meGusta=me_gusta)
+
+# Endpoint para saber si varios contenidos están en los "Me gusta" y en la lista personalizada de un usuario
+@router.get("/usuarios/{idUsuario}/estado-contenidos", response_model=list[schemas.EstadoContenidoUsuario])
+async def get_estado_contenidos(idUsuario: str, ids: list[str] = Query(default=[]), db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.get_estado_contenidos(db=db, usuario_id=idUsuario, ids_contenido=ids)
+
+# Endpoint para dar "Me gusta" a un contenido
+@router.post("/usuarios/{idUsuario}/me-gusta/{idContenido}", response_model=schemas.ListaMeGusta)
+async def action_megusta(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.dar_me_gusta(db=db, idUsuario=idUsuario, idContenido=idContenido)
+
+# Endpoint para eliminar un "Me gusta" a un contenido
+@router.delete("/usuarios/{idUsuario}/me-gusta/{idContenido}")
+async def action_eliminar_me_gusta(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    eliminado = await crud_async.quitar_me_gusta(db=db, idUsuario=idUsuario, idContenido=idContenido)
+    if not eliminado:
+        raise HTTPException(status_code=404, detail="Contenido no encontrado en la lista de me gusta")
+    return {"message": "Contenido eliminado de la lista de Me gusta"}
+
+# Endpoint para añadir una puntuación a un contenido
+@router.post("/usuarios/{idUsuario}/valoraciones/{idContenido}", response_model=schemas.ValoracionUsuarioContenido)
+async def action_valorar_contenido(valoracion: int, idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    valoracionUsuarioContenido = await crud_async.valorar_contenido(db=db, idUsuario=idUsuario, idContenido=idContenido, valoracion=valoracion)
+    if not valoracionUsuarioContenido:
+        raise HTTPException(status_code=500, detail="Error al añadir la valoración")
+    return valoracionUsuarioContenido
+
+# Endpoint para añadir contenido al historial
+@router.post("/usuarios/{idUsuario}/historial/{idContenido}")
+async def actualizar_historial(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    try:
+        entrada = await crud_async.crear_entrada_historial(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+        return {"message": "Contenido añadido al historial", "entrada": entrada}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint para devolver el historial del usuario
+@router.get("/usuarios/{idUsuario}/historial", response_model=list[schemas.ContenidoGetId])
+async def get_historial(idUsuario: str, db: AsyncSession = Depends(get_db_async)):
+    historial = await crud_async.get_historial_usuario(db=db, usuario_id=idUsuario)
+    if not historial:
+        raise HTTPException(status_code=404, detail="No se ha encontrado historial")
+    return historial
+
+# Endpoint para añadir contenido a la lista personalizada
+@router.post("/usuarios/{idUsuario}/listaPersonalizada/{idContenido}")
+async def insert_content_into_LP(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    try:
+        LP = await crud_async.insert_content_into_LP(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+        return {"message": "Contenido añadido a lista personalizada", "LP": LP}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint para devolver la ListaPersonalizada de usuario
+@router.get("/usuarios/{idUsuario}/listaPersonalizada", response_model=list[schemas.ContenidoGetId])
+async def get_LP_user(idUsuario: str, db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.get_LP_user(db=db, usuario_id=idUsuario)
+
+# Endpoint para saber si un contenido está en la ListaPersonalizada de un usuario
+@router.get("/usuarios/{idUsuario}/listaPersonalizada/{idContenido}", response_model=schemas.EstadoListaPersonalizada)
+async def esta_en_LP(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    en_lista = await crud_async.esta_en_LP(db=db, usuario_id=idUsuario, contenido_id=idContenido)
+    return schemas.EstadoListaPersonalizada(idContenido=idContenido, enListaPersonalizada=en_lista)
+
+# Endpoint para eliminar contenido de la listaPersonalizada
+@router.delete("/usuarios/{idUsuario}/listaPersonalizada/{idContenido}")
+async def delete_conent_from_user_LP(idUsuario: str, idContenido: str, db: AsyncSession = Depends(get_db_async)):
+    eliminado = await crud_async.delete_conent_from_user_LP(db=db, idUsuario=idUsuario, idContenido=idContenido)
+    if not eliminado:
+        raise HTTPException(status_code=404, detail="Contenido no eliminado de ListaPersonalizada")
+    return {"message": "Contenido eliminado de ListaPersonalizada"}
+
+
+# Sustituye en la aplicación los endpoints síncronos por los de este módulo con la misma ruta y método.
+# Se sustituyen en su sitio para mantener el orden en que FastAPI compara las rutas
+def registrar(app: FastAPI):
+    asincronos = {(ruta.path, frozenset(ruta.methods)): ruta for ruta in router.routes}
+    rutas = app.router.routes
+    for posicion, ruta in enumerate(rutas):
+        clave = (getattr(ruta, "path", None), frozenset(getattr(ruta, "methods", None) or ()))
+        if clave in asincronos:
+            rutas[posicion] = asincronos.pop(clave)
+    rutas.extend(asincronos.values())
+    # Al apagar el microservicio se cierran las conexiones del motor asíncrono
+    app.router.on_shutdown.append(database.engine_async.dispose)
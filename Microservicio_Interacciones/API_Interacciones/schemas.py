@@ -32,13 +32,43 @@ class ValoracionUsuarioContenido(BaseModel):
     idContenido: str
     puntuacion: int
 
+# Esquema utilizado para devolver las puntuaciones del recomendador
+class RecomendacionPuntuada(BaseModel):
+    idContenido: str
+    puntuacion: float
+
+# Esquema utilizado para devolver el estado de una caché
+class EstadisticasCache(BaseModel):
+    aciertos: int
+    fallos: int
+    tasaAciertos: float
+    elementos: int
+    maxElementos: int
+    ttl: float
+
+# Esquemas utilizados para indicar si un contenido está en las listas de un usuario
+class EstadoMeGusta(BaseModel):
+    idContenido: str
+    meGusta: bool
+
+class EstadoListaPersonalizada(BaseModel):
+    idContenido: str
+    enListaPersonalizada: bool
+
+class EstadoContenidoUsuario(BaseModel):
+    idContenido: str
+    meGusta: bool
+    enListaPersonalizada: bool
+
 class Tendencia(BaseModel):
     idContenido: str
     titulo: str
     me_gusta_total: int
+    puntuacion: float = 0.0  # "Me gusta" con decaimiento en la ventana consultada
 
 class TendenciasResponse(BaseModel):
     tendencias: list[Tendencia]
+    ventana: Optional[str] = None
 
 class ContenidoMeGusta(BaseModel):
     id: str
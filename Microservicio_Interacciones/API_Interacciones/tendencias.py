@@ -0,0 +1,272 @@
+import atexit
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Contadores de tendencias en memoria con decaimiento exponencial.
+
+Cada "Me gusta" suma 1 a los contadores del contenido en cada ventana. En una ventana de tiempo
+característico tau, lo sumado hace t segundos vale exp(-t / tau), así que las tendencias reflejan
+los "Me gusta" recientes. Al retirar un "Me gusta" se resta lo que vale en ese momento según su
+fecha. La ventana "total" no decae y cuenta todos los "Me gusta" actuales.
+Los "Me gusta" anteriores a las fechas (sin fecha) solo cuentan en la ventana total; mientras una
+ventana no tiene datos, las tendencias se calculan con la ventana total.
+
+Los contadores se guardan en la tabla contador_tendencia cada TENDENCIAS_PERSISTENCIA segundos
+y al apagar el microservicio, y se cargan al arrancar. Cada proceso mantiene sus propios contadores.
+
+"""
+
+VENTANA_TOTAL = "total"
+
+# Ventanas con decaimiento: "nombre=segundos,..." (por defecto 1 hora, 24 horas y 7 días)
+VENTANAS = {
+    nombre.strip(): float(segundos)
+    for nombre, segundos in (
+        ventana.split("=") for ventana in os.getenv("TENDENCIAS_VENTANAS", "1h=3600,24h=86400,7d=604800").split(",")
+    )
+}
+VENTANA_POR_DEFECTO = os.getenv("TENDENCIAS_VENTANA_POR_DEFECTO", "24h")
+# Contenidos que se mantienen ordenados en cada ventana (las lecturas de hasta este tamaño son O(K))
+TAMANO_TOP = int(os.getenv("TENDENCIAS_TAMANO_TOP", "100"))
+# Segundos entre dos guardados de los contadores en la base de datos
+INTERVALO_PERSISTENCIA = float(os.getenv("TENDENCIAS_PERSISTENCIA", "60"))
+
+# Valor por debajo del cual un contador se descarta
+VALOR_MINIMO = 1e-3
+
+
+def _segundos(fecha: datetime) -> float:
+    # Las fechas se guardan en UTC sin zona horaria
+    return fecha.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _fecha(segundos: float) -> datetime:
+    return datetime.fromtimestamp(segundos, timezone.utc).replace(tzinfo=None)
+
+
+class ContadorVentana:
+    """
+    Contadores de una ventana. Para no tener que actualizar todos los contadores con el paso
+    del tiempo, se guardan escalados a una fecha de referencia (valor * exp((t - referencia) / tau)):
+    así el decaimiento es el mismo para todos, el orden solo cambia al sumar y los contenidos
+    con más puntos se pueden mantener ordenados.
+    """
+
+    def __init__(self, tau: float = None, tamano_top: int = TAMANO_TOP):
+        self.tau = tau  # None: sin decaimiento
+        self.tamano_top = tamano_top
+        self.referencia = time.time()
+        self.puntos = {}  # idContenido -> valor escalado a la fecha de referencia
+        self.top = []  # ids con más puntos, de mayor a menor
+
+    def _escala(self, instante: float) -> float:
+        if self.tau is None:
+            return 1.0
+        return math.exp((instante - self.referencia) / self.tau)
+
+    def _renormalizar(self, instante: float):
+        # Cambia la fecha de referencia para que los valores escalados no se desborden y descarta
+        # los contadores que ya no valen nada. Se multiplica por exp(-t / tau) en lugar de dividir
+        # por la escala, que se desbordaría si ha pasado mucho tiempo desde la referencia
+        factor = math.exp((self.referencia - instante) / self.tau)
+        self.puntos = {
+            idContenido: valor * factor
+            for idContenido, valor in self.puntos.items()
+            if valor * factor >= VALOR_MINIMO
+        }
+        self.referencia = instante
+        self.top = [idContenido for idContenido in self.top if idContenido in self.puntos]
+
+    def _actualizar(self, instante: float):
+        # Renormaliza antes de calcular la escala si la referencia se ha quedado antigua
+        if self.tau is not None and (instante - self.referencia) / self.tau > 50:
+            self._renormalizar(instante)
+
+    # Descarta los contadores que han decaído por debajo de VALOR_MINIMO
+    def podar(self, instante: float):
+        if self.tau is not None:
+            self._renormalizar(max(instante, self.referencia))
+
+    def _recalcular_top(self):
+        self.top = heapq.nlargest(self.tamano_top, self.puntos, key=self.puntos.get)
+
+    def sumar(self, idContenido: str, cantidad: float, instante: float):
+        self._actualizar(instante)
+        valor = self.puntos.get(idContenido, 0) + cantidad * self._escala(instante)
+        if valor / self._escala(instante) < VALOR_MINIMO:
+            self.puntos.pop(idContenido, None)
+        else:
+            self.puntos[idContenido] = valor
+
+        if cantidad < 0:
+            # Si baja un contenido del top, otro de fuera puede pasar a ocupar su puesto
+            if idContenido in self.top:
+                self._recalcular_top()
+        elif idContenido in self.top:
+            self.top.sort(key=lambda id_top: self.puntos.get(id_top, 0), reverse=True)
+        elif len(self.top) < self.tamano_top or valor > self.puntos.get(self.top[-1], 0):
+            self.top.append(idContenido)
+            self.top.sort(key=lambda id_top: self.puntos.get(id_top, 0), reverse=True)
+            del self.top[self.tamano_top:]
+
+    def valor(self, idContenido: str, instante: float) -> float:
+        self._actualizar(instante)
+        return self.puntos.get(idContenido, 0) / self._escala(instante)
+
+    def mejores(self, limite: int, instante: float) -> list[tuple[str, float]]:
+        self._actualizar(instante)
+        if limite <= self.tamano_top:
+            ids = self.top[:limite]
+        else:
+            ids = heapq.nlargest(limite, self.puntos, key=self.puntos.get)
+        return [(idContenido, self.valor(idContenido, instante)) for idContenido in ids]
+
+    def cargar(self, valores: dict, instante: float):
+        self.referencia = instante
+        self.puntos = {idContenido: valor for idContenido, valor in valores.items() if valor >= VALOR_MINIMO}
+        self._recalcular_top()
+
+
+class ContadoresTendencias:
+    """
+    Contadores de todas las ventanas del proceso.
+    """
+
+    def __init__(self, ventanas: dict):
+        self.ventanas = {nombre: ContadorVentana(tau) for nombre, tau in ventanas.items()}
+        self.ventanas[VENTANA_TOTAL] = ContadorVentana()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def nombres_ventanas(self) -> list[str]:
+        return list(self.ventanas)
+
+    # Suma (o resta) "Me gusta" a un contenido en todas las ventanas
+    def sumar(self, idContenido: str, cantidad: float = 1, instante: float = None):
+        instante = time.time() if instante is None else instante
+        with self._lock:
+            for ventana in self.ventanas.values():
+                ventana.sumar(idContenido, cantidad, instante)
+
+    # Resta un "Me gusta" dado en la fecha indicada: en cada ventana con decaimiento se resta lo que
+    # vale ahora, exp(-(ahora - fecha) / tau), y nada si no tiene fecha. En la ventana total resta 1
+    def quitar(self, idContenido: str, fecha: datetime = None, instante: float = None):
+        instante = time.time() if instante is None else instante
+        with self._lock:
+            for ventana in self.ventanas.values():
+                if ventana.tau is None:
+                    ventana.sumar(idContenido, -1, instante)
+                elif fecha is not None:
+                    edad = max(instante - _segundos(fecha), 0)
+                    ventana.sumar(idContenido, -math.exp(-edad / ventana.tau), instante)
+
+    # Devuelve la ventana pedida o, si todavía no tiene ningún contador, la ventana total
+    def ventana_con_datos(self, ventana: str) -> str:
+        with self._lock:
+            return ventana if self.ventanas[ventana].puntos else VENTANA_TOTAL
+
+    # Devuelve los (idContenido, valor, total de "Me gusta") con más valor en la ventana
+    def mejores(self, ventana: str, limite: int) -> list[tuple[str, float, int]]:
+        instante = time.time()
+        with self._lock:
+            total = self.ventanas[VENTANA_TOTAL]
+            return [
+                (idContenido, valor, round(total.valor(idContenido, instante)))
+                for idContenido, valor in self.ventanas[ventana].mejores(limite, instante)
+            ]
+
+    def cargar(self, db: Session):
+        """
+        Carga los contadores: el total se cuenta en la tabla de "Me gusta" y las ventanas con
+        decaimiento se leen de contador_tendencia (o, si está vacía, se calculan a partir de
+        las fechas de los "Me gusta"; los que no tienen fecha no cuentan en ellas).
+        """
+        instante = time.time()
+        totales = dict(
+            db.query(models.ListaMeGusta.idContenido, func.count())
+            .group_by(models.ListaMeGusta.idContenido)
+            .all()
+        )
+
+        valores = {nombre: {} for nombre in self.ventanas if nombre != VENTANA_TOTAL}
+        guardados = db.query(models.ContadorTendencia).all()
+        if guardados:
+            for fila in guardados:
+                if fila.ventana in valores:
+                    edad = max(instante - _segundos(fila.fecha), 0)
+                    valores[fila.ventana][fila.idContenido] = fila.valor * math.exp(-edad / self.ventanas[fila.ventana].tau)
+        else:
+            for idContenido, fecha in db.query(models.ListaMeGusta.idContenido, models.ListaMeGusta.fecha).filter(
+                    models.ListaMeGusta.fecha.isnot(None)):
+                edad = max(instante - _segundos(fecha), 0)
+                for nombre in valores:
+                    valores[nombre][idContenido] = valores[nombre].get(idContenido, 0) + math.exp(-edad / self.ventanas[nombre].tau)
+
+        with self._lock:
+            self.ventanas[VENTANA_TOTAL].cargar(totales, instante)
+            for nombre, valores_ventana in valores.items():
+                self.ventanas[nombre].cargar(valores_ventana, instante)
+
+    def guardar(self, db: Session):
+        """
+        Sustituye los contadores guardados por los valores actuales de las ventanas con decaimiento,
+        después de descartar los que ya no valen nada.
+        """
+        instante = time.time()
+        with self._lock:
+            for ventana in self.ventanas.values():
+                ventana.podar(instante)
+            filas = [
+                {"ventana": nombre, "idContenido": idContenido, "valor": ventana.valor(idContenido, instante),
+                 "fecha": _fecha(instante)}
+                for nombre, ventana in self.ventanas.items() if nombre != VENTANA_TOTAL
+                for idContenido in ventana.puntos
+            ]
+        db.query(models.ContadorTendencia).delete(synchronize_session=False)
+        db.bulk_insert_mappings(models.ContadorTendencia, filas)
+        db.commit()
+
+    def iniciar(self, crear_sesion):
+        """
+        Carga los contadores y lanza un hilo que los guarda cada INTERVALO_PERSISTENCIA segundos
+        (y una última vez al apagar el microservicio).
+        """
+        if self._hilo is not None:
+            return
+        db = crear_sesion()
+        try:
+            self.cargar(db)
+        finally:
+            db.close()
+
+        def guardar():
+            db = crear_sesion()
+            try:
+                self.guardar(db)
+            except Exception as e:
+                print(f"Tendencias: error al guardar los contadores ({e})")
+            finally:
+                db.close()
+
+        def bucle():
+            while True:
+                time.sleep(INTERVALO_PERSISTENCIA)
+                guardar()
+
+        self._hilo = threading.Thread(target=bucle, name="tendencias", daemon=True)
+        self._hilo.start()
+        atexit.register(guardar)
+
+
+# Contadores compartidos por todo el microservicio
+contadores = ContadoresTendencias(VENTANAS)
@@ -0,0 +1,141 @@
+import atexit
+import os
+import threading
+import time
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Suma y número de valoraciones de cada contenido.
+
+La tabla agregado_valoracion_contenido se actualiza desde crud.py en la misma transacción que la
+valoración del usuario (una valoración nueva suma 1 al número; si el usuario cambia su valoración,
+solo se suma la diferencia). Las medias de los contenidos que han cambiado se envían al
+microservicio de Contenidos en lotes cada VALORACIONES_INTERVALO_ENVIO segundos.
+
+"""
+
+# Segundos entre dos envíos de las medias al microservicio de Contenidos
+INTERVALO_ENVIO = float(os.getenv("VALORACIONES_INTERVALO_ENVIO", "30"))
+# Contenidos como máximo por cada petición al microservicio de Contenidos
+TAMANO_LOTE = int(os.getenv("VALORACIONES_TAMANO_LOTE", "500"))
+
+
+# Suma (o resta) a la suma y al número de valoraciones de un contenido
+def sumar(db: Session, idContenido: str, suma: float, numero: int):
+    tabla = models.AgregadoValoracionContenido.__table__
+    # Se actualiza con una única sentencia para no perder valoraciones concurrentes
+    sentencia = insert(tabla).values(idContenido=idContenido, suma=suma, numero=numero, version=1, versionEnviada=0)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[tabla.c.idContenido],
+        set_={
+            "suma": tabla.c.suma + sentencia.excluded.suma,
+            "numero": tabla.c.numero + sentencia.excluded.numero,
+            "version": tabla.c.version + 1,
+        },
+    )
+    db.execute(sentencia)
+
+# Rellena la tabla a partir de las valoraciones guardadas. Todos los contenidos quedan pendientes
+# de enviar, de modo que se corrigen las medias que hubiera en Contenidos
+def reconstruir(db: Session) -> int:
+    filas = (
+        db.query(
+            models.ValoracionUsuarioContenido.idContenido,
+            func.sum(models.ValoracionUsuarioContenido.puntuacion),
+            func.count(),
+        )
+        .group_by(models.ValoracionUsuarioContenido.idContenido)
+        .all()
+    )
+    db.query(models.AgregadoValoracionContenido).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        models.AgregadoValoracionContenido,
+        [
+            {"idContenido": idContenido, "suma": suma, "numero": numero, "version": 1, "versionEnviada": 0}
+            for idContenido, suma, numero in filas
+        ],
+    )
+    db.commit()
+    return len(filas)
+
+# Contenidos cuya suma o número ha cambiado desde el último envío
+def get_pendientes(db: Session, limite: int = TAMANO_LOTE) -> list:
+    return (
+        db.query(models.AgregadoValoracionContenido)
+        .filter(models.AgregadoValoracionContenido.version > models.AgregadoValoracionContenido.versionEnviada)
+        .limit(limite)
+        .all()
+    )
+
+# Marca como enviadas las versiones indicadas ({idContenido: version}). Si un contenido ha
+# vuelto a cambiar después de leerlo, sigue pendiente
+def marcar_enviados(db: Session, versiones: dict):
+    tabla = models.AgregadoValoracionContenido.__table__
+    sentencia = (
+        update(tabla)
+        .where(tabla.c.idContenido == bindparam("id"))
+        .where(tabla.c.versionEnviada < bindparam("v"))
+        .values(versionEnviada=bindparam("v"))
+    )
+    db.connection().execute(sentencia, [{"id": idContenido, "v": version} for idContenido, version in versiones.items()])
+    db.commit()
+
+# Envía todos los contenidos pendientes con la función enviar(lote), que recibe una lista de
+# {"idContenido", "suma", "numero"}. Devuelve el número de contenidos enviados
+def enviar_pendientes(db: Session, enviar) -> int:
+    enviados = 0
+    while True:
+        pendientes = get_pendientes(db)
+        if not pendientes:
+            return enviados
+        enviar([
+            {"idContenido": agregado.idContenido, "suma": agregado.suma, "numero": agregado.numero}
+            for agregado in pendientes
+        ])
+        marcar_enviados(db, {agregado.idContenido: agregado.version for agregado in pendientes})
+        enviados += len(pendientes)
+
+
+class EnvioPeriodico:
+    """
+    Hilo que envía las medias pendientes cada INTERVALO_ENVIO segundos (y una última vez al
+    apagar el microservicio). Si un envío falla, se reintenta en la siguiente vuelta.
+    """
+
+    def __init__(self):
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def enviar(self, crear_sesion, enviar):
+        with self._lock:
+            db = crear_sesion()
+            try:
+                enviados = enviar_pendientes(db, enviar)
+                if enviados:
+                    print(f"Valoraciones: enviadas las medias de {enviados} contenidos")
+            except Exception as e:
+                print(f"Valoraciones: error al enviar las medias ({e})")
+            finally:
+                db.close()
+
+    def iniciar(self, crear_sesion, enviar):
+        if self._hilo is not None:
+            return
+
+        def bucle():
+            while True:
+                self.enviar(crear_sesion, enviar)
+                time.sleep(INTERVALO_ENVIO)
+
+        self._hilo = threading.Thread(target=bucle, name="valoraciones", daemon=True)
+        self._hilo.start()
+        atexit.register(self.enviar, crear_sesion, enviar)
+
+
+# Envío compartido por todo el microservicio
+envio = EnvioPeriodico()
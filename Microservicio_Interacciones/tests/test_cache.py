@@ -0,0 +1,40 @@
+from API_Interacciones import crud
+from API_Interacciones.cache import CacheTTL
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Pruebas de la caché de recomendaciones.
+
+"""
+
+
+def test_invalidar_durante_el_calculo_no_guarda_el_resultado(monkeypatch):
+    cache = CacheTTL(ttl=300)
+    monkeypatch.setattr(crud, "cache_recomendaciones", cache)
+
+    def calcular(db, usuario_id, limite):
+        # Un "Me gusta" del usuario se confirma mientras se calculan sus recomendaciones
+        crud.notificar_cambio_interacciones(usuario_id)
+        return [{"id": "antigua"}]
+
+    monkeypatch.setattr(crud, "calcular_recomendaciones_usuario", calcular)
+    monkeypatch.setattr(crud.recomendador.motor, "marcar_cambio", lambda: None)
+
+    assert crud.get_recomendaciones_usuario(None, "u1", 20) == [{"id": "antigua"}]
+    assert cache.get("u1") is None
+
+
+def test_generaciones_de_claves_descartadas():
+    cache = CacheTTL(ttl=300, max_elementos=2)
+    generacion = cache.generacion("u1")
+    cache.invalidar("u1")
+    # Se descarta la generación de u1 al invalidar otras claves
+    cache.invalidar("u2")
+    cache.invalidar("u3")
+
+    cache.set("u1", "antiguo", generacion)
+    assert cache.get("u1") is None
+
+    cache.set("u1", "nuevo", cache.generacion("u1"))
+    assert cache.get("u1") == "nuevo"
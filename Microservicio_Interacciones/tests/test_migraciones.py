@@ -0,0 +1,88 @@
+import pytest
+import requests
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from API_Interacciones import crud, migraciones, models
+from API_Interacciones.database import Base
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Pruebas de las migraciones con una base de datos SQLite temporal.
+
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Base de datos anterior a la tabla de afinidad, con un "Me gusta"
+    engine = create_engine(f"sqlite:///{tmp_path / 'interacciones.db'}")
+    Base.metadata.create_all(bind=engine)
+    models.AfinidadGeneroUsuario.__table__.drop(bind=engine)
+    with engine.begin() as conexion:
+        conexion.execute(text("INSERT INTO lista_me_gusta (idUsuario, idContenido) VALUES ('u1', 'c1')"))
+    yield engine
+    engine.dispose()
+
+
+def nombres_pendientes(engine):
+    return [nombre for nombre, _ in migraciones.get_pendientes(engine)]
+
+
+def test_relleno_de_afinidad_en_segundo_plano(engine, monkeypatch):
+    intentos = []
+
+    def reconstruir(db):
+        intentos.append(db)
+        if len(intentos) == 1:
+            raise ConnectionError("Usuarios no disponible")
+        return 0
+
+    monkeypatch.setitem(migraciones.TAREAS_PENDIENTES, "afinidad_generos", reconstruir)
+
+    # La migración crea la tabla sin llamar a otros microservicios y deja el relleno pendiente
+    migraciones.aplicar_migraciones(engine)
+    assert intentos == []
+    assert nombres_pendientes(engine) == ["afinidad_generos"]
+
+    # Si el relleno falla sigue pendiente; cuando termina bien se borra la anotación
+    crear_sesion = sessionmaker(bind=engine)
+    assert migraciones.completar_pendientes(crear_sesion) == ["afinidad_generos"]
+    assert migraciones.completar_pendientes(crear_sesion) == []
+    assert nombres_pendientes(engine) == []
+    assert len(intentos) == 2
+
+
+def test_afinidad_sin_contenidos_anota_la_reconstruccion(engine, monkeypatch):
+    migraciones.aplicar_migraciones(engine)
+    crear_sesion = sessionmaker(bind=engine)
+    monkeypatch.setitem(migraciones.TAREAS_PENDIENTES, "afinidad_generos", lambda db: 0)
+    assert migraciones.completar_pendientes(crear_sesion) == []
+
+    def sin_conexion(ids_contenido):
+        raise requests.ConnectionError("Contenidos no disponible")
+
+    monkeypatch.setattr(crud, "get_contenidos", sin_conexion)
+    db = crear_sesion()
+    try:
+        # Tanto al sumar como al restar, el punto no se pierde: se reconstruirá la tabla
+        crud.actualizar_afinidad(db, "u1", "c1", -1)
+        db.commit()
+    finally:
+        db.close()
+    assert nombres_pendientes(engine) == ["afinidad_generos"]
+
+
+def test_anotacion_durante_el_relleno_se_mantiene(engine, monkeypatch):
+    migraciones.aplicar_migraciones(engine)
+
+    def reconstruir(db):
+        # Otra petición no puede actualizar la afinidad mientras se reconstruye la tabla
+        with engine.begin() as conexion:
+            migraciones.anotar_pendiente(conexion, "afinidad_generos")
+        return 0
+
+    monkeypatch.setitem(migraciones.TAREAS_PENDIENTES, "afinidad_generos", reconstruir)
+    crear_sesion = sessionmaker(bind=engine)
+    assert migraciones.completar_pendientes(crear_sesion) == []
+    assert nombres_pendientes(engine) == ["afinidad_generos"]
@@ -0,0 +1,127 @@
+import math
+import time
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from API_Interacciones import crud, models, tendencias
+from API_Interacciones.database import Base
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Pruebas de los contadores de tendencias con una base de datos SQLite temporal.
+
+"""
+
+HORA = 3600.0
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'interacciones.db'}")
+    Base.metadata.create_all(bind=engine)
+    sesion = sessionmaker(bind=engine)()
+    yield sesion
+    sesion.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def contadores(monkeypatch):
+    contadores = tendencias.ContadoresTendencias({"1h": HORA, "24h": 24 * HORA})
+    monkeypatch.setattr(tendencias, "contadores", contadores)
+    # Sin llamadas a Contenidos para la afinidad de géneros
+    monkeypatch.setattr(crud, "get_genero_contenido", lambda idContenido: None)
+    return contadores
+
+
+# Base de datos existente: los "Me gusta" anteriores a las fechas tienen fecha NULL
+def test_me_gusta_sin_fecha_usan_la_ventana_total(db, contadores):
+    db.execute(
+        text("INSERT INTO lista_me_gusta (idUsuario, idContenido, fecha) VALUES (:idUsuario, :idContenido, NULL)"),
+        [{"idUsuario": "u1", "idContenido": "c1"}, {"idUsuario": "u2", "idContenido": "c1"},
+         {"idUsuario": "u1", "idContenido": "c2"}],
+    )
+    db.commit()
+
+    contadores.cargar(db)
+
+    assert contadores.mejores("24h", 2) == []
+    ventana = contadores.ventana_con_datos("24h")
+    assert ventana == tendencias.VENTANA_TOTAL
+    assert contadores.mejores(ventana, 2) == [("c1", 2, 2), ("c2", 1, 1)]
+
+    # En cuanto la ventana tiene datos se usa la ventana pedida
+    crud.dar_me_gusta(db, "u3", "c2")
+    assert contadores.ventana_con_datos("24h") == "24h"
+    assert [idContenido for idContenido, _, _ in contadores.mejores("24h", 2)] == ["c2"]
+
+
+def test_quitar_me_gusta_resta_el_valor_decaido(db, contadores):
+    instante = time.time()
+    hace_cinco_horas = instante - 5 * HORA
+    contadores.sumar("c1", 1, hace_cinco_horas)
+    db.add(models.ListaMeGusta(idUsuario="u1", idContenido="c1", fecha=tendencias._fecha(hace_cinco_horas)))
+    db.commit()
+    # Otro "Me gusta" reciente del mismo contenido
+    crud.dar_me_gusta(db, "u2", "c1")
+
+    assert crud.quitar_me_gusta(db, "u1", "c1")
+
+    # Queda solo el "Me gusta" reciente (antes se restaba 1 y la ventana de 1 hora quedaba en ~exp(-5))
+    for nombre in ("1h", "24h"):
+        valor = contadores.ventanas[nombre].valor("c1", time.time())
+        assert valor >= 0
+        assert valor == pytest.approx(1, abs=1e-3)
+    assert contadores.ventanas[tendencias.VENTANA_TOTAL].valor("c1", time.time()) == 1
+
+
+def test_quitar_me_gusta_antiguo_no_deja_valores_negativos(contadores):
+    instante = time.time()
+    inicio = instante - 5 * HORA
+    contadores.sumar("c1", 1, inicio)
+
+    contadores.quitar("c1", tendencias._fecha(inicio), instante)
+
+    for nombre in ("1h", "24h", tendencias.VENTANA_TOTAL):
+        assert contadores.ventanas[nombre].valor("c1", instante) == pytest.approx(0, abs=tendencias.VALOR_MINIMO)
+        assert contadores.ventanas[nombre].valor("c1", instante) >= 0
+    assert contadores.mejores("1h", 5) == []
+
+
+def test_quitar_me_gusta_sin_fecha_solo_resta_en_el_total(contadores):
+    instante = time.time()
+    contadores.ventanas[tendencias.VENTANA_TOTAL].cargar({"c1": 3}, instante)
+    contadores.sumar("c1", 1, instante)
+
+    contadores.quitar("c1", None, instante)
+
+    assert contadores.ventanas["1h"].valor("c1", instante) == pytest.approx(1)
+    assert contadores.ventanas[tendencias.VENTANA_TOTAL].valor("c1", instante) == 3
+    assert math.isclose(contadores.ventanas["24h"].valor("c1", instante), 1)
+
+
+def test_lecturas_sin_escrituras_durante_mucho_tiempo(contadores):
+    instante = time.time()
+    contadores.sumar("c1", 1, instante)
+    contadores.sumar("c2", 1, instante)
+
+    # Un mes después, sin más "Me gusta": la escala exp(t / tau) de la ventana de 1 hora se desbordaría
+    un_mes_despues = instante + 31 * 24 * HORA
+    ventana = contadores.ventanas["1h"]
+    assert ventana.mejores(5, un_mes_despues) == []
+    assert ventana.valor("c1", un_mes_despues) == 0
+    assert ventana.puntos == {}
+
+
+def test_guardar_descarta_los_contadores_sin_valor(db, contadores):
+    instante = time.time()
+    for i in range(50):
+        contadores.sumar(f"c{i}", 1, instante - 20 * HORA)
+    contadores.sumar("reciente", 1, instante)
+
+    contadores.guardar(db)
+
+    assert set(contadores.ventanas["1h"].puntos) == {"reciente"}
+    assert len(contadores.ventanas["24h"].puntos) == 51
+    assert db.query(models.ContadorTendencia).filter(models.ContadorTendencia.ventana == "1h").count() == 1
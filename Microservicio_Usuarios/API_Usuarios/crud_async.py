@@ -0,0 +1,92 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Funciones CRUD de crud.py con sesión asíncrona (AsyncSession), para DB_MODO=async.
+Devuelven lo mismo que sus equivalentes síncronas.
+"""
+
+# Función para crear un nuevo usuario
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    db_user = models.User(
+        nombre=user.nombre,
+        email=user.email,
+        password=user.password,
+        idioma=user.idioma,
+        idPlanSuscripcion=user.idPlanSuscripcion
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+# Función para obtener un usuario por ID
+async def get_user(db: AsyncSession, user_id: str):
+    return await db.scalar(select(models.User).where(models.User.id == user_id).limit(1))
+
+# Función para obtener un usuario por email
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email).limit(1))
+
+# Función para obtener todos los usuarios
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return (await db.scalars(select(models.User).offset(skip).limit(limit))).all()
+
+# Función para actualizar un usuario
+async def update_user(db: AsyncSession, user_id: str, user_data: schemas.UserUpdate):
+    user = await get_user(db, user_id)
+    if user:
+        #Se convierten los datos en un diccionario, excluyendo los campos no enviados
+        update_data = {k: v for k, v in user_data.model_dump(exclude_unset=True).items() if v is not None}
+        for key, value in update_data.items():
+            setattr(user, key, value)
+
+        await db.commit()
+        await db.refresh(user)
+    return user
+
+# Función para obtener un plan de suscripción por ID
+async def get_plan_suscripcion(db: AsyncSession, plan_id: str):
+    return await db.scalar(select(models.PlanSuscripcion).where(models.PlanSuscripcion.id == plan_id).limit(1))
+
+async def get_planes_suscripcion(db: AsyncSession):
+    return (await db.scalars(select(models.PlanSuscripcion))).all()
+
+# Crear un nuevo método de pago
+async def create_metodo_pago(db: AsyncSession, metodo_pago: schemas.MetodoPagoCreate):
+    db_metodo_pago = models.MetodoPago(
+        tipo=metodo_pago.tipo,
+        numeroTarjeta=metodo_pago.numeroTarjeta,
+        emailPaypal=metodo_pago.emailPaypal
+    )
+    db.add(db_metodo_pago)
+    await db.commit()
+    await db.refresh(db_metodo_pago)
+    return db_metodo_pago
+
+# Obtener un método de pago por ID
+async def get_metodo_pago(db: AsyncSession, metodo_pago_id: str):
+    return await db.scalar(select(models.MetodoPago).where(models.MetodoPago.id == metodo_pago_id).limit(1))
+
+# Obtener todos los métodos de pago
+async def get_metodos_pago(db: AsyncSession, skip: int = 0, limit: int = 10):
+    return (await db.scalars(select(models.MetodoPago).offset(skip).limit(limit))).all()
+
+async def get_metodos_pago_usuario(db: AsyncSession, user_id: str):
+    # Una sola consulta: métodos de pago unidos con la relación usuario - método de pago
+    metodos_pago = (await db.scalars(
+        select(models.MetodoPago)
+        .join(models.MetodoPagoUsuario, models.MetodoPagoUsuario.idMetodoPago == models.MetodoPago.id)
+        .where(models.MetodoPagoUsuario.idUsuario == user_id)
+    )).all()
+    return metodos_pago or None
+
+async def create_metodo_pago_usuario(db: AsyncSession, idUsuario: str, idMetodoPago: str):
+    metodoPagoUsuario = models.MetodoPagoUsuario(idUsuario=idUsuario, idMetodoPago=idMetodoPago)
+    db.add(metodoPagoUsuario)
+    await db.commit()
+    await db.refresh(metodoPagoUsuario)
+    return metodoPagoUsuario
@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from . import models, crud 
-import os 
+from . import models, crud, migraciones
+import atexit
+import os
+import re
 
 """
 Autor: Grupo GA01 - ASEE
@@ -23,6 +25,45 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+# Configuración de SQLite de cada conexión (modificable mediante variables de entorno). Las consultas
+# son búsquedas por clave (login, perfil, métodos de pago) sobre pocas filas; las escrituras (registro,
+# cambios de perfil y suscripción) esperan con busy_timeout a la anterior en lugar de fallar.
+# Con SQLITE_JOURNAL_MODE=WAL el login no espera a un registro en curso, pero los cambios recientes
+# quedan en usuarios.db-wal y -shm: usarlo solo montando el directorio de la base de datos en Docker.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "DELETE")
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    # En modo WAL, NORMAL no puede corromper la base de datos; con el diario de SQLite hace falta FULL
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL" if SQLITE_JOURNAL_MODE.upper() == "WAL" else "FULL"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),  # Páginas, o KiB si es negativo (64 MiB)
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", "268435456"),  # Bytes leídos mediante mmap (256 MiB)
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),  # Tablas e índices temporales en memoria
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),  # Milisegundos de espera por un bloqueo
+}
+
+@event.listens_for(engine, "connect")
+def configurar_conexion_sqlite(conexion_dbapi, registro_conexion):
+    cursor = conexion_dbapi.cursor()
+    try:
+        for nombre, valor in SQLITE_PRAGMAS.items():
+            # Un valor vacío deja el valor por defecto de SQLite
+            if valor:
+                if not re.fullmatch(r"-?\w+", valor):
+                    raise ValueError(f"Valor no válido para PRAGMA {nombre}: {valor!r}")
+                cursor.execute(f"PRAGMA {nombre} = {valor}")
+    finally:
+        cursor.close()
+
+# Valores efectivos de la configuración de SQLite (pueden diferir de los pedidos,
+# por ejemplo si SQLite limita mmap_size o la base de datos está en memoria)
+def get_configuracion_sqlite() -> dict:
+    with engine.connect() as conexion:
+        return {nombre: conexion.exec_driver_sql(f"PRAGMA {nombre}").scalar() for nombre in SQLITE_PRAGMAS}
+
+# Se cierran las conexiones al apagar el microservicio (en modo WAL, así usuarios.db-wal se vuelca
+# en la base de datos al cerrarse la última)
+atexit.register(engine.dispose)
+
 # Crear una fábrica de sesiones para hacer queries
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -37,6 +78,28 @@ def get_db():
     finally:
         db.close()
 
+# Modo de acceso a la base de datos de los endpoints: "sync" (def con Session) o "async" (async def
+# con AsyncSession; rutas_async.py sustituye todos los endpoints de main.py)
+DB_MODO = os.getenv("DB_MODO", "sync")
+if DB_MODO not in ("sync", "async"):
+    raise ValueError(f"Valor no válido para DB_MODO: {DB_MODO!r} (sync o async)")
+
+# Motor asíncrono para DB_MODO=async (necesita aiosqlite), con los mismos PRAGMAs que el síncrono.
+# La creación de la base de datos y los planes iniciales siguen usando el motor síncrono
+engine_async = None
+AsyncSessionLocal = None
+if DB_MODO == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    engine_async = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+    event.listen(engine_async.sync_engine, "connect", configurar_conexion_sqlite)
+    # Sin expire_on_commit, los objetos se siguen pudiendo leer tras el commit sin volver a consultarlos
+    AsyncSessionLocal = async_sessionmaker(engine_async, autoflush=False, expire_on_commit=False)
+
+# Dependencia para obtener una sesión asíncrona de base de datos (DB_MODO=async)
+async def get_db_async():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Función para inicializar la base de datos
 def initialize_database():
     if not os.path.exists(DB_PATH):
@@ -60,3 +123,9 @@ def initialize_database():
             print("Valores iniciales insertados (Planes de suscripción).")
         finally:
             db.close()
+
+    # Cambios del esquema para las bases de datos ya existentes (columnas, tablas e índices nuevos)
+    migraciones.aplicar_migraciones(engine)
+
+    # Configuración de SQLite con la que trabaja el microservicio
+    print(f"Configuración de SQLite: {get_configuracion_sqlite()}")
@@ -1,7 +1,7 @@
 from fastapi import FastAPI, Depends, HTTPException
 from sqlalchemy.orm import Session
 from . import models, schemas, crud
-from .database import engine, get_db, initialize_database
+from .database import DB_MODO, engine, get_db, initialize_database
 
 """
 Autor: Grupo GA01 - ASEE
@@ -121,4 +121,9 @@ def get_planes_suscripcion(db: Session = Depends(get_database)):
     planes = crud.get_planes_suscripcion(db=db)
     if not planes:
         raise HTTPException(status_code=404, detail="No se han encontrado Planes de Suscripcion")
-    return planes
\ No newline at end of file
+    return planes
+
+# Con DB_MODO=async, los endpoints async def de rutas_async.py (con AsyncSession) sustituyen a los anteriores
+if DB_MODO == "async":
+    from . import rutas_async
+    rutas_async.registrar(app)
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from sqlalchemy import inspect, text
+from . import models
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Migraciones del esquema de la base de datos usuarios.db.
+
+initialize_database() solo crea las tablas cuando la base de datos no existe, así que los cambios
+del esquema (columnas, tablas e índices nuevos) se aplican a las bases de datos existentes con las
+migraciones de MIGRACIONES. Las versiones aplicadas se guardan en la tabla migracion_esquema y cada
+migración se aplica una sola vez, en orden. Además, cada migración comprueba lo que ya existe
+(por ejemplo, en una base de datos recién creada con create_all), así que repetirla no cambia nada.
+
+Para añadir un cambio del esquema: modificar models.py y añadir al final de MIGRACIONES una
+función con la versión siguiente que haga el mismo cambio en una base de datos existente.
+
+"""
+
+SQL_CREAR_TABLA_MIGRACIONES = """
+CREATE TABLE IF NOT EXISTS migracion_esquema (
+    version INTEGER NOT NULL PRIMARY KEY,
+    descripcion VARCHAR NOT NULL,
+    fecha DATETIME NOT NULL
+)
+"""
+
+
+# Versión 1: índices declarados en models.py (email, plan, historial, métodos de pago...)
+# que falten en una base de datos creada con una versión anterior de los modelos
+def _indices_modelos(conexion):
+    tablas = set(inspect(conexion).get_table_names())
+    for modelo in (models.User, models.MetodoPagoUsuario, models.MetodoPago, models.PlanSuscripcion):
+        if modelo.__tablename__ in tablas:
+            for indice in modelo.__table__.indexes:
+                indice.create(bind=conexion, checkfirst=True)
+
+
+# (versión, descripción, función que recibe la conexión)
+MIGRACIONES = [
+    (1, "Índices de los modelos de usuarios", _indices_modelos),
+]
+
+
+def get_versiones_aplicadas(engine) -> set:
+    with engine.begin() as conexion:
+        conexion.execute(text(SQL_CREAR_TABLA_MIGRACIONES))
+        return {fila[0] for fila in conexion.execute(text("SELECT version FROM migracion_esquema"))}
+
+
+def aplicar_migraciones(engine) -> list[int]:
+    """
+    Aplica, en orden, las migraciones que todavía no se han aplicado a la base de datos.
+    Cada una se aplica en su propia transacción junto con su registro en migracion_esquema.
+    Devuelve las versiones aplicadas.
+    """
+    aplicadas = get_versiones_aplicadas(engine)
+    nuevas = []
+    for version, descripcion, migrar in MIGRACIONES:
+        if version in aplicadas:
+            continue
+        with engine.begin() as conexion:
+            migrar(conexion)
+            conexion.execute(
+                text("INSERT INTO migracion_esquema (version, descripcion, fecha) VALUES (:version, :descripcion, :fecha)"),
+                {"version": version, "descripcion": descripcion,
+                 "fecha": datetime.now(timezone.utc).replace(tzinfo=None)},
+            )
+        print(f"Migración {version} aplicada: {descripcion}")
+        nuevas.append(version)
+    return nuevas
+
+
+if __name__ == "__main__":
+    from .database import engine
+    versiones = aplicar_migraciones(engine)
+    print(f"Migraciones aplicadas: {versiones or 'ninguna'}")
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import schemas, crud_async, database
+from .database import get_db_async
+
+"""
+Autor: Grupo GA01 - ASEE
+Versión: 1.0
+Descripción: Versiones async def de los endpoints de main.py, con AsyncSession (DB_MODO=async).
+
+Tienen la misma ruta, método y respuesta que los síncronos, a los que sustituyen con registrar(app),
+para poder comparar los dos modos con la misma carga cambiando solo DB_MODO.
+
+"""
+
+router = APIRouter()
+
+@router.get("/usuarios", response_model=list[schemas.User])
+async def get_usuarios(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.get_users(db, skip=skip, limit=limit)
+
+@router.get("/usuarios/{idUsuario}", response_model=schemas.User)
+async def get_usuarios(idUsuario: str, db: AsyncSession = Depends(get_db_async)):
+    usuario = await crud_async.get_user(db, user_id=idUsuario)
+    if not usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return usuario
+
+@router.post("/usuarios/registro", response_model=schemas.User)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db_async)):
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email ya registrado")
+    return await crud_async.create_user(db, user)
+
+@router.post("/usuarios/login", response_model=schemas.User)
+async def login_user(credentials: schemas.UserLogin, db: AsyncSession = Depends(get_db_async)):
+    db_user = await crud_async.get_user_by_email(db, email=credentials.email)
+    if not db_user or db_user.password != credentials.password:
+        raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+    return db_user
+
+@router.put("/usuarios/{idUsuario}/perfil")
+async def update_user_profile(idUsuario: str, user_data: schemas.UserUpdate, db: AsyncSession = Depends(get_db_async)):
+    user = await crud_async.update_user(db, user_id=idUsuario, user_data=user_data)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return {"message": "Perfil actualizado exitosamente"}
+
+@router.put("/usuarios/{idUsuario}/idioma")
+async def update_user_language(idUsuario: str, idioma: schemas.UserLanguage, db: AsyncSession = Depends(get_db_async)):
+    user = await crud_async.get_user(db, user_id=idUsuario)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    user.idioma = idioma.idioma
+    await db.commit()
+    return {"message": "Idioma actualizado exitosamente"}
+
+@router.put("/usuarios/{idUsuario}/suscripcion")
+async def update_subscription(idUsuario: str, subscription: schemas.SubscriptionUpdate, db: AsyncSession = Depends(get_db_async)):
+    user = await crud_async.get_user(db, user_id=idUsuario)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    if subscription.accion == "cambiar":
+        nuevoPlan = await crud_async.get_plan_suscripcion(db, subscription.idPlanSuscripcion)
+        if nuevoPlan is None:
+            raise HTTPException(status_code=404, detail="Plan de suscripción no encontrado")
+        user.idPlanSuscripcion = subscription.idPlanSuscripcion
+        await db.commit()
+        return {"message": "Suscripción cambiada exitosamente", "nuevoPlan": subscription.idPlanSuscripcion}
+
+    elif subscription.accion == "cancelar":
+        user.idPlanSuscripcion = None
+        await db.commit()
+        return {"message": "Suscripción cancelada exitosamente"}
+
+    raise HTTPException(status_code=400, detail="Acción no válida")
+
+@router.get("/metodos-pago", response_model=list[schemas.MetodoPago])
+async def get_payment_methods(db: AsyncSession = Depends(get_db_async)):
+    return await crud_async.get_metodos_pago(db)
+
+@router.get("/usuarios/{idUsuario}/metodos-pago", response_model=list[schemas.MetodoPago])
+async def get_user_payment_methods(idUsuario: str, db: AsyncSession = Depends(get_db_async)):
+    user = await crud_async.get_user(db, user_id=idUsuario)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return await crud_async.get_metodos_pago_usuario(db, user_id=idUsuario)
+
+@router.post("/usuarios/{idUsuario}/metodos-pago", response_model=schemas.MetodoPagoUsuarioCreate)
+async def add_payment_method(idUsuario: str, metodo_pago: schemas.MetodoPagoCreate, db: AsyncSession = Depends(get_db_async)):
+    user = await crud_async.get_user(db, user_id=idUsuario)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    metodoPagoCreado = await crud_async.create_metodo_pago(db, metodo_pago)
+    return await crud_async.create_metodo_pago_usuario(db, idUsuario=user.id, idMetodoPago=metodoPagoCreado.id)
+
+@router.get("/planes-suscripcion", response_model=list[schemas.PlanSuscripcion])
+async def get_planes_suscripcion(db: AsyncSession = Depends(get_db_async)):
+    planes = await crud_async.get_planes_suscripcion(db=db)
+    if not planes:
+        raise HTTPException(status_code=404, detail="No se han encontrado Planes de Suscripcion")
+    return planes
+
+
+# Sustituye en la aplicación los endpoints síncronos por los de este módulo con la misma ruta y método.
+# Se sustituyen en su sitio para mantener el orden en que FastAPI compara las rutas
+def registrar(app: FastAPI):
+    asincronos = {(ruta.path, frozenset(ruta.methods)): ruta for ruta in router.routes}
+    rutas = app.router.routes
+    for posicion, ruta in enumerate(rutas):
+        clave = (getattr(ruta, "path", None), frozenset(getattr(ruta, "methods", None) or ()))
+        if clave in asincronos:
+            rutas[posicion] = asincronos.pop(clave)
+    rutas.extend(asincronos.values())
+    # Al apagar el microservicio se cierran las conexiones del motor asíncrono
+    app.router.on_shutdown.append(database.engine_async.dispose)